@@ -3,23 +3,179 @@ import os
 import time
 import queue
 import threading
-import tkinter as tk
-from tkinter import filedialog, simpledialog, messagebox, ttk
-import keyboard
+import signal
+import sys
+import argparse
+try:
+    import tkinter as tk
+    from tkinter import filedialog, simpledialog, messagebox, ttk
+except ImportError:  # Tkinter нужен только для диалогов графического режима, на сервере его может не быть
+    tk = filedialog = simpledialog = messagebox = ttk = None
+try:
+    import keyboard
+except ImportError:  # keyboard нужен только для завершения по Ctrl+C в графическом режиме
+    keyboard = None
+try:
+    import resource
+except ImportError:  # resource нужен только бенчмарку для измерения пиковой памяти, в Windows его нет
+    resource = None
 import logging
+import logging.handlers
+import atexit
 import platform
 import numpy as np
 import configparser
+import csv
+import datetime
+import sqlite3
+import functools
+import json
+import shutil
+import tempfile
+import itertools
+import http.server
+import asyncio
+import re
+import math
+import bisect
+import collections
+import multiprocessing
+from multiprocessing import shared_memory
 from typing import List
 
+class RateLimitFilter(logging.Filter):
+    """
+    Ограничивает повторяющиеся сообщения лога: за interval секунд каждое сообщение записывается не больше burst раз, остальные повторы
+    только подсчитываются. Первое сообщение после окончания интервала записывается с кол-вом подавленных повторов. Сообщения разных
+    камер различаются номером камеры в тексте, поэтому ограничиваются независимо.
+
+    Сообщения хранятся в порядке начала интервала, поэтому истекшие и (при переполнении) самые старые сообщения забываются за O(1).
+    Если у забываемого сообщения есть подавленные повторы, их кол-во записывается отдельной записью через handler, как и при flush()
+    в конце работы, поэтому прекратившаяся серия повторов не теряется.
+    """
+
+    def __init__(self, interval: float = 60.0, burst: int = 5, max_keys: int = 1000, handler: logging.Handler | None = None) -> None:
+        """
+        :param interval: Длительность интервала в секундах, 0 - без ограничения (По умолчанию 60)
+        :param burst: Кол-во одинаковых сообщений, записываемых за интервал (По умолчанию 5)
+        :param max_keys: Максимальное кол-во отслеживаемых сообщений, при превышении забываются самые старые (По умолчанию 1000)
+        :param handler: Обработчик для записей о подавленных повторах забытых сообщений (По умолчанию они не записываются)
+        """
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.max_keys = max_keys
+        self.handler = handler
+        # (уровень, текст) -> [начало интервала, кол-во сообщений за интервал, кол-во подавленных, последняя подавленная запись]
+        self._seen = collections.OrderedDict()
+        self._lock = threading.Lock()  # Короткая блокировка словаря, без ввода-вывода
+
+    @staticmethod
+    def _summary(key: tuple, state: list) -> logging.LogRecord:
+        """
+        Создает запись о подавленных повторах сообщения по последней подавленной записи.
+        """
+        return logging.makeLogRecord(dict(state[3].__dict__, msg=f'{key[1]} (подавлено повторов: {state[2]})', args=None,
+                                          exc_info=None, exc_text=None))
+
+    def _report(self, summaries: list[logging.LogRecord]) -> None:
+        if self.handler is None:
+            return
+        for summary in summaries:
+            self.handler.emit(summary)  # Без фильтров, чтобы не зациклиться на этом же фильтре
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.interval <= 0:
+            return True
+        key = (record.levelno, record.getMessage())
+        now = time.monotonic()
+        summaries = []  # Записи о подавленных повторах забытых сообщений, записываются после снятия блокировки
+        with self._lock:
+            state = self._seen.get(key)
+            if state is None or now - state[0] >= self.interval:
+                suppressed = state[2] if state is not None else 0
+                self._seen[key] = [now, 1, 0, None]
+                self._seen.move_to_end(key)  # Интервал сообщения начался заново
+                # Забываем сообщения с истекшим интервалом, а при переполнении - самые старые
+                while self._seen:
+                    oldest_key, oldest = next(iter(self._seen.items()))
+                    if oldest_key == key or (now - oldest[0] < self.interval and len(self._seen) <= self.max_keys):
+                        break
+                    self._seen.popitem(last=False)
+                    if oldest[2]:
+                        summaries.append(self._summary(oldest_key, oldest))
+            elif state[1] < self.burst:
+                state[1] += 1
+                return True
+            else:
+                state[2] += 1  # Повтор сверх лимита только подсчитывается
+                state[3] = record
+                return False
+        self._report(summaries)
+        if suppressed:
+            record.msg = f'{key[1]} (подавлено повторов: {suppressed})'
+            record.args = None
+        return True
+
+    def flush(self) -> None:
+        """
+        Записывает кол-во подавленных повторов всех сообщений и сбрасывает счетчики. Вызывается при завершении программы.
+        """
+        with self._lock:
+            summaries = [self._summary(key, state) for key, state in self._seen.items() if state[2]]
+            for state in self._seen.values():
+                state[2] = 0
+        self._report(summaries)
+
+
+def setup_logging(max_mb: float = 10.0, backup_count: int = 5, interval: float = 60.0, burst: int = 5) -> None:
+    """
+    Настраивает ротацию файла лога и ограничение повторяющихся сообщений.
+
+    :param max_mb: Размер файла лога в МБ, при превышении которого начинается новый файл, 0 - без ротации (По умолчанию 10)
+    :param backup_count: Кол-во хранимых старых файлов лога my_log.log.1, my_log.log.2, ... (По умолчанию 5)
+    :param interval: Интервал ограничения повторяющихся сообщений в секундах, 0 - без ограничения (По умолчанию 60)
+    :param burst: Кол-во одинаковых сообщений, записываемых за интервал (По умолчанию 5)
+    """
+    file_handler.maxBytes = int(max_mb * 1024 * 1024)
+    file_handler.backupCount = backup_count
+    rate_limit_filter.interval = interval
+    rate_limit_filter.burst = burst
+
+
+def is_main_process() -> bool:
+    """
+    Проверяет, что модуль выполняется в главном процессе программы, а не в процессе камеры или кодировщика.
+
+    Процесс spawn импортирует модуль при распаковке точки входа, еще до того, как parent_process() станет известен,
+    поэтому проверяется и признак _inheriting, который multiprocessing устанавливает на время распаковки.
+    """
+    return multiprocessing.parent_process() is None and not getattr(multiprocessing.current_process(), '_inheriting', False)
+
+
 logger = logging.getLogger(__name__) # Получаем логгер для текущего модуля
 logger.setLevel(logging.DEBUG) # Устанавливаем уровень логирования на DEBUG, чтобы фиксировать все сообщения от этой важности и выше
-file_handler = logging.FileHandler('my_log.log') # Создаем файловый обработчик, чтобы записывать логи в файл 'my_log.log'
-file_handler.setLevel(logging.INFO) # Устанавливаем уровень логирования для обработчика на INFO, чтобы фиксировать сообщения от этой важности и выше
-file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s') # Создаем формат для записи сообщений лога
-file_handler.setFormatter(file_formatter) # Назначаем формат сообщений для обработчика
-logger.addHandler(file_handler) # Добавляем обработчик в логгер
-logger.info('Программа запущена') # Записываем информационное сообщение о запуске программы
+log_queue = queue.SimpleQueue() # Неограниченная очередь записей лога: put() никогда не блокирует поток, который пишет в лог
+queue_handler = logging.handlers.QueueHandler(log_queue) # Обработчик логгера только кладет запись в очередь, без ввода-вывода
+rate_limit_filter = RateLimitFilter(handler=queue_handler) # Ограничиваем повторяющиеся сообщения до постановки в очередь
+queue_handler.addFilter(rate_limit_filter)
+file_handler = None # Файловый обработчик главного процесса
+log_listener = None # Фоновый поток записи лога главного процесса
+# Процессы камер и кодировщика (spawn) импортируют модуль заново: файл лога открывает и пишет только главный процесс,
+# процессы камер передают ему записи через очередь (camera_process)
+if is_main_process():
+    # Создаем файловый обработчик с ротацией по размеру, чтобы записывать логи в файл 'my_log.log' (my_log.log.1, ... - предыдущие файлы)
+    file_handler = logging.handlers.RotatingFileHandler('my_log.log', maxBytes=10 * 1024 * 1024, backupCount=5)
+    file_handler.setLevel(logging.INFO) # Устанавливаем уровень логирования для обработчика на INFO, чтобы фиксировать сообщения от этой важности и выше
+    file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s') # Создаем формат для записи сообщений лога
+    file_handler.setFormatter(file_formatter) # Назначаем формат сообщений для обработчика
+    logger.addHandler(queue_handler) # Добавляем обработчик в логгер
+    # Фоновый поток записывает записи из очереди в файл; при завершении программы дописывает оставшиеся записи
+    log_listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    log_listener.start()
+    atexit.register(log_listener.stop)
+    atexit.register(rate_limit_filter.flush) # Выполняется раньше остановки потока записи: подавленные повторы попадают в лог
+    logger.info('Программа запущена') # Записываем информационное сообщение о запуске программы
 
 # Размеры окна для отображения видео
 WINDOW_WIDTH = 640
@@ -27,20 +183,35 @@ WINDOW_HEIGHT = 360
 
 errors_queue =  queue.Queue(maxsize=0) # Создаем очередь для хранения ошибок с неограниченным размером
 
-root = tk.Tk() # Создаем главное окно Tkinter
-root.withdraw() # Скрываем главное окно (withdraw)
+root = None # Главное окно Tkinter создается только в графическом режиме (init_gui)
 
 threads = [] # Список для хранения потоков
 lock = threading.Lock() # Создаем объект блокировки для управления доступом к общим ресурсам
 stop_event = threading.Event() # Создаем событие для управления остановкой потоков
 start_event = threading.Event() # Создаем событие для управления старта потоков
 
-def error_handling(errors: queue.Queue(), stop_event: threading.Event()) -> None:
+def init_gui() -> tk.Tk:
+    """
+    Создает скрытое главное окно Tkinter для диалогов графического режима.
+
+    :return: Главное окно Tkinter
+    """
+    global root
+    if root is None:
+        root = tk.Tk() # Создаем главное окно Tkinter
+        root.withdraw() # Скрываем главное окно (withdraw)
+    return root
+
+
+def error_handling(errors: queue.Queue(), stop_event: threading.Event(), display: 'PreviewCompositor | NullDisplay | None' = None,
+                   interactive: bool = True) -> None:
     """
     Обрабатывает ошибки открытия камеры, уведомляя пользователя и предлагая варианты действий.
 
     :param errors: Очередь из индексов камер, вызвавших ошибку
     :param stop_event: Ивент-флаг для отслеживания работы программы
+    :param display: Общее окно предпросмотра. Если задано, ошибка показывается плиткой в нем, а не отдельным окном
+    :param interactive: Спрашивать пользователя. Без графического интерфейса ошибка только записывается в лог, работа продолжается
     """
     try:
         # Входим в цикл, пока в очереди есть ошибки и программа не остановлена
@@ -49,6 +220,10 @@ def error_handling(errors: queue.Queue(), stop_event: threading.Event()) -> None
             index = errors.get()
             # Логируем сообщение об ошибке
             logger.error(f"Ошибка: Не удалось открыть камеру {index + 1}")
+            if not interactive:
+                # Без графического интерфейса продолжаем работу с подключившимися камерами
+                logger.info(f'Программа продолжает работу без камеры {index + 1}')
+                continue
             # Запрашиваем у пользователя, продолжать ли выполнение программы после ошибки
             should_continue = messagebox.askyesno("Ошибка камеры",
                                                   f"Ошибка: Не удалось открыть камеру {index + 1}\nПродолжить выполнение программы?")
@@ -59,6 +234,9 @@ def error_handling(errors: queue.Queue(), stop_event: threading.Event()) -> None
             else:
                 # Если пользователь решил продолжить, логируем это событие
                 logger.info(f'Пользователь продолжил программу несмотря на ошибку камеры {index + 1}')
+                if display is not None:
+                    display.mark_failed(index)  # Показываем плитку ошибки в общем окне
+                    continue
                 # Создаем новый поток для отображения ошибки
                 error_thread = threading.Thread(target=show_error, args=(index, stop_event,))
                 threads.append(error_thread)  # Добавляем поток в список потоков
@@ -145,58 +323,3143 @@ def position_window(window_name: str, index: int, num_windows_per_row: int = 2)
         logger.exception(f'Ошибка при позиционировании окна "{window_name}" с индексом {index}: {e}')
 
 
-def capture_and_save(cap: cv2.VideoCapture(), folder_name: str, fps: int, index: int, start_count: int, stop_event: threading.Event()) -> None:
+class NullDisplay:
+    """
+    Заглушка окна предпросмотра для режима без графического интерфейса: кадры не отображаются.
     """
-    Захватывает и сохраняет кадры с камеры в JPG-файлы, отображая видеопоток с подсчетом и отображением реального FPS, пока не получит сигнал остановки.
 
-    :param cap: Камера, с которой захватывается изображение
-    :param folder_name: Путь к папке, куда сохраняются кадры
-    :param fps: Кол-во кадров в секунду для захвата кадров
-    :param index: Индекс камеры, с которой захватывается изображение
+    def update(self, index: int, frame: np.ndarray, real_fps: float | None = None) -> None:
+        pass
+
+    def mark_failed(self, index: int) -> None:
+        pass
+
+
+class PreviewCompositor:
+    """
+    Единое окно предпросмотра: собирает уменьшенные кадры всех камер в мозаику и отображает ее из одного потока.
+
+    Потоки захвата только передают ссылку на последний кадр (update), не обращаясь к HighGUI. Поток отображения
+    с ограниченной частотой уменьшает новые кадры в плитки заранее выделенного холста и вызывает cv2.imshow один раз
+    за обновление. Расположение плиток рассчитывается один раз при создании. Для камер с ошибкой выводится плитка
+    create_error_image.
+    """
+
+    def __init__(self, indices: list[int], columns: int = 2, tile_size: tuple[int, int] = (WINDOW_WIDTH, WINDOW_HEIGHT),
+                 preview_fps: float = 10, window_name: str = "Cameras") -> None:
+        """
+        :param indices: Индексы отображаемых камер
+        :param columns: Кол-во плиток в строке (По умолчанию 2)
+        :param tile_size: Размер плитки (ширина, высота) (По умолчанию (WINDOW_WIDTH, WINDOW_HEIGHT))
+        :param preview_fps: Частота обновления окна (По умолчанию 10)
+        :param window_name: Название окна (По умолчанию "Cameras")
+        """
+        self.window_name = window_name
+        self.preview_fps = preview_fps
+        self.tile_width, self.tile_height = tile_size
+        columns = max(1, min(columns, len(indices)))
+        rows = (len(indices) + columns - 1) // columns
+        # Расположение плиток: индекс камеры -> координаты левого верхнего угла на холсте
+        self.tiles = {index: ((position % columns) * self.tile_width, (position // columns) * self.tile_height)
+                      for position, index in enumerate(indices)}
+        self.canvas = np.zeros((rows * self.tile_height, columns * self.tile_width, 3), dtype=np.uint8)  # Заранее выделенный холст
+        self._lock = threading.Lock()
+        self._pending = {}  # Кадры, пришедшие после последней отрисовки: индекс -> (кадр, FPS)
+        # Плитка ошибки создается один раз и копируется для каждой камеры с ошибкой
+        self._error_tile = cv2.resize(create_error_image(), (self.tile_width, self.tile_height))
+
+    def update(self, index: int, frame: np.ndarray, real_fps: float | None = None) -> None:
+        """
+        Передает последний кадр камеры для отображения. Вызывается из потоков захвата, не копирует кадр.
+
+        :param index: Индекс камеры
+        :param frame: Кадр
+        :param real_fps: Реальный FPS камеры для вывода на плитке
+        """
+        with self._lock:
+            self._pending[index] = (frame, real_fps)
+
+    def mark_failed(self, index: int) -> None:
+        """
+        Отображает плитку ошибки вместо кадров камеры.
+
+        :param index: Индекс камеры
+        """
+        with self._lock:
+            self._pending[index] = (None, None)
+
+    def render(self) -> np.ndarray:
+        """
+        Отрисовывает в холст плитки камер, кадры которых изменились с прошлой отрисовки.
+
+        :return: Холст с мозаикой
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for index, (frame, real_fps) in pending.items():
+            if index not in self.tiles:
+                continue
+            x, y = self.tiles[index]
+            if frame is None:
+                tile = self._error_tile
+            else:
+                tile = cv2.resize(frame, (self.tile_width, self.tile_height), interpolation=cv2.INTER_AREA)
+                if real_fps is not None:
+                    # Отображаем реальный FPS на плитке, исходный кадр не изменяется
+                    cv2.putText(tile, str(int(real_fps)), (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+            self.canvas[y:y + self.tile_height, x:x + self.tile_width] = tile
+        return self.canvas
+
+    def run(self, stop_event: threading.Event) -> None:
+        """
+        Цикл потока отображения: обновляет окно с частотой preview_fps, пока не получит сигнал остановки.
+
+        :param stop_event: Ивент-флаг для отслеживания работы программы
+        """
+        try:
+            period = 1 / self.preview_fps if self.preview_fps > 0 else 0.1
+            cv2.namedWindow(self.window_name, cv2.WINDOW_AUTOSIZE)
+            cv2.moveWindow(self.window_name, 0, 0)  # Окно позиционируется один раз
+            while not stop_event.is_set():
+                started = time.monotonic()
+                cv2.imshow(self.window_name, self.render())
+                cv2.waitKey(1)  # Обрабатываем события окна
+                stop_event.wait(max(0, period - (time.monotonic() - started)))
+            cv2.destroyWindow(self.window_name)
+        except Exception as e:
+            # Логируем непредвиденные ошибки, возникшие в процессе выполнения функции
+            logger.error(f'Непредвиденная ошибка в PreviewCompositor: {e}')
+
+
+class ThreadEncoder:
+    """
+    Кодирует кадры в JPEG в вызывающем потоке (cv2.imencode).
+    """
+
+    def __init__(self, quality: int = 95) -> None:
+        """
+        :param quality: Качество JPEG 0-100 (По умолчанию 95)
+        """
+        self.quality = quality
+
+    def encode(self, frame: np.ndarray) -> bytes:
+        """
+        Кодирует кадр в JPEG.
+
+        :param frame: Кадр для кодирования
+        :return: Байты JPEG-файла
+        """
+        ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise ValueError('cv2.imencode не смог закодировать кадр')
+        return buffer.tobytes()
+
+    def close(self) -> None:
+        """
+        Освобождает ресурсы кодировщика. Для кодирования в потоке дополнительных действий не требуется.
+        """
+        pass
+
+
+_attached_memory = {}  # Разделяемая память, уже подключенная в процессе кодирования: имя -> SharedMemory
+
+
+def _encode_shared_frame(name: str, shape: tuple, dtype: str, quality: int, released: tuple = ()) -> bytes:
+    """
+    Кодирует в JPEG кадр, лежащий в разделяемой памяти. Выполняется в процессах пула ProcessEncoder.
+
+    :param name: Имя блока разделяемой памяти
+    :param shape: Размерность кадра
+    :param dtype: Тип данных кадра (numpy dtype.str)
+    :param quality: Качество JPEG 0-100
+    :param released: Имена блоков, удаленных главным процессом: процесс пула отключается от них
+    :return: Байты JPEG-файла
+    """
+    for stale in released:
+        memory = _attached_memory.pop(stale, None)
+        if memory is not None:
+            memory.close()  # Освобождаем отображение удаленного блока
+    memory = _attached_memory.get(name)
+    if memory is None:
+        memory = shared_memory.SharedMemory(name=name)
+        try:
+            # Блок принадлежит главному процессу: не даем resource_tracker процесса пула удалить его при завершении
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(memory._name, 'shared_memory')
+        except Exception:
+            pass
+        _attached_memory[name] = memory
+    # Оборачиваем память в массив без копирования
+    frame = np.ndarray(shape, dtype=np.dtype(dtype), buffer=memory.buf)
+    ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    del frame  # Освобождаем ссылку на буфер разделяемой памяти
+    if not ok:
+        raise ValueError('cv2.imencode не смог закодировать кадр')
+    return buffer.tobytes()
+
+
+class ProcessEncoder:
+    """
+    Кодирует кадры в JPEG в пуле процессов, чтобы кодирование нескольких камер использовало все ядра процессора.
+
+    Кадр копируется в блок разделяемой памяти (без сериализации pickle), процесс пула кодирует его на месте
+    и возвращает только сжатые байты. Метод encode вызывается параллельно из потоков FrameWriter,
+    каждый вызов занимает свой блок памяти. Процессы пула создаются методом spawn: к моменту создания пула в программе уже
+    работают потоки, а fork скопировал бы занятые ими блокировки. Имена удаленных блоков передаются процессам пула
+    со следующими заданиями, чтобы они не держали отображения удаленной памяти.
+    """
+    RELEASED_NAMES = 64  # Сколько имен удаленных блоков передается процессам пула
+
+    def __init__(self, processes: int = 0, quality: int = 95) -> None:
+        """
+        :param processes: Кол-во процессов кодирования, 0 - по кол-ву ядер (По умолчанию 0)
+        :param quality: Качество JPEG 0-100 (По умолчанию 95)
+        """
+        self.quality = quality
+        self._pool = multiprocessing.get_context('spawn').Pool(processes or os.cpu_count() or 1)
+        self._free_slots = queue.SimpleQueue()  # Свободные блоки разделяемой памяти
+        self._slots = []  # Все созданные блоки, для освобождения при закрытии
+        self._slots_lock = threading.Lock()
+        self._released = collections.deque(maxlen=self.RELEASED_NAMES)  # Имена удаленных блоков для процессов пула
+
+    def _acquire_slot(self, size: int) -> shared_memory.SharedMemory:
+        """
+        Берет свободный блок разделяемой памяти не меньше size байт или создает новый.
+        """
+        try:
+            slot = self._free_slots.get_nowait()
+            if slot.size >= size:
+                return slot
+            self._release_memory(slot)  # Блок мал для нового разрешения, заменяем его
+        except queue.Empty:
+            pass
+        slot = shared_memory.SharedMemory(create=True, size=size)
+        with self._slots_lock:
+            self._slots.append(slot)
+        return slot
+
+    def _release_memory(self, slot: shared_memory.SharedMemory) -> None:
+        """
+        Закрывает и удаляет блок разделяемой памяти.
+        """
+        with self._slots_lock:
+            if slot in self._slots:
+                self._slots.remove(slot)
+            self._released.append(slot.name)
+        slot.close()
+        slot.unlink()
+
+    def encode(self, frame: np.ndarray) -> bytes:
+        """
+        Кодирует кадр в JPEG в одном из процессов пула.
+
+        :param frame: Кадр для кодирования
+        :return: Байты JPEG-файла
+        """
+        frame = np.ascontiguousarray(frame)
+        slot = self._acquire_slot(frame.nbytes)
+        try:
+            # Единственная копия кадра: в разделяемую память
+            np.ndarray(frame.shape, dtype=frame.dtype, buffer=slot.buf)[...] = frame
+            with self._slots_lock:
+                released = tuple(self._released)
+            return self._pool.apply(_encode_shared_frame, (slot.name, frame.shape, frame.dtype.str, self.quality, released))
+        finally:
+            self._free_slots.put(slot)
+
+    def close(self) -> None:
+        """
+        Останавливает пул процессов и удаляет блоки разделяемой памяти.
+        """
+        self._pool.close()
+        self._pool.join()
+        with self._slots_lock:
+            slots = list(self._slots)
+        for slot in slots:
+            self._release_memory(slot)
+
+
+def create_encoder(backend: str = 'thread', processes: int = 0, quality: int = 95) -> ThreadEncoder | ProcessEncoder:
+    """
+    Создает кодировщик JPEG по названию из настроек.
+
+    :param backend: 'thread' - кодирование в потоках записи, 'process' - в пуле процессов (По умолчанию 'thread')
+    :param processes: Кол-во процессов для 'process', 0 - по кол-ву ядер (По умолчанию 0)
+    :param quality: Качество JPEG 0-100 (По умолчанию 95)
+    :return: Кодировщик с методами encode(frame) и close()
+    """
+    if backend == 'process':
+        try:
+            return ProcessEncoder(processes, quality)
+        except Exception as e:
+            # Если пул процессов создать не удалось, продолжаем работу с кодированием в потоках
+            logger.error(f'Не удалось создать пул процессов кодирования, используется кодирование в потоках: {e}')
+    elif backend != 'thread':
+        logger.warning(f'Неизвестный кодировщик "{backend}", используется кодирование в потоках')
+    return ThreadEncoder(quality)
+
+
+FSYNC_POLICIES = ('none', 'group', 'always')  # Политики сброса записанных файлов на диск
+
+
+def session_folder(folder_name: str, start_count: int) -> str:
+    """
+    Возвращает папку сессии в разбитой по времени раскладке: "{папка камеры}/{start_count:06d}".
+
+    :param folder_name: Папка камеры
     :param start_count: Номер итерации программы
-    :param stop_event: Ивент-флаг для отслеживания работы программы
+    :return: Путь к папке сессии
     """
-    try:
+    return os.path.join(folder_name, f"{start_count:06d}")
+
+
+def sync_folders(folders) -> None:
+    """
+    Сбрасывает на диск записи каталогов (имена созданных файлов и папок). В Windows записи каталогов NTFS журналируются,
+    а папку нельзя открыть для os.fsync, поэтому ничего не выполняется.
+
+    :param folders: Пути к папкам
+    """
+    if os.name == 'nt':
+        return
+    for folder in folders:
+        fd = os.open(folder, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class JpegFolderSink:
+    """
+    Приемник кадров, сохраняющий каждый кадр камеры в отдельный JPG-файл.
+
+    В раскладке flat все кадры лежат в папке камеры и называются "{start_count} frame_{n}.jpg". В раскладке sharded кадры
+    раскладываются по папкам сессии, даты и часа захвата: "{start_count:06d}/{ГГГГ-ММ-ДД}/{ЧЧ}/frame_{n:09d}.jpg", поэтому
+    в одной папке не больше часа записи, а имена сортируются по номеру кадра. Созданные папки запоминаются, os.makedirs
+    вызывается один раз на папку.
+
+    Политика fsync определяет, когда файлы сбрасываются на диск: none - решает операционная система, always - каждый файл
+    сразу (надежно, но медленно), group - группами по fsync_batch файлов или раз в fsync_interval секунд (при сбое питания
+    теряется не больше одной группы).
+    """
+    ordered = False  # Порядок записи файлов не важен, кадры одной камеры можно записывать параллельно
+    metrics = None  # Метрики камеры (CameraMetrics), задаются FrameWriter.register
+    index_frame = None  # Регистрация кадра в индексе сессии (FrameIndex.add для камеры), задается FrameWriter.register
+
+    def __init__(self, folder_name: str, start_count: int, encoder: ThreadEncoder | ProcessEncoder | None = None,
+                 layout: str = 'flat', fsync: str = 'none', fsync_batch: int = 64, fsync_interval: float = 1.0) -> None:
+        """
+        :param folder_name: Путь к папке, куда сохраняются кадры
+        :param start_count: Номер итерации программы
+        :param encoder: Кодировщик JPEG (По умолчанию ThreadEncoder)
+        :param layout: Раскладка файлов: flat или sharded (По умолчанию flat)
+        :param fsync: Политика сброса файлов на диск: none, group или always (По умолчанию none)
+        :param fsync_batch: Кол-во файлов в группе для политики group (По умолчанию 64)
+        :param fsync_interval: Максимальное время между сбросами групп в секундах для политики group (По умолчанию 1.0)
+        """
+        self.folder_name = folder_name
+        self.start_count = start_count
+        self.encoder = encoder if encoder is not None else ThreadEncoder()
+        if layout not in ('flat', 'sharded'):
+            logger.warning(f'Неизвестная раскладка файлов "{layout}", используется flat')
+            layout = 'flat'
+        if fsync not in FSYNC_POLICIES:
+            logger.warning(f'Неизвестная политика fsync "{fsync}", используется none')
+            fsync = 'none'
+        self.layout = layout
+        self.fsync = fsync
+        self.fsync_batch = max(1, fsync_batch)
+        self.fsync_interval = fsync_interval
+        self._folders = set()  # Уже созданные папки
+        self._pending = []  # Пути файлов группы, ожидающих fsync (файлы закрыты, чтобы не держать дескрипторы)
+        self._pending_folders = set()  # Папки, в которых с последнего сброса созданы файлы или папки
+        self._pending_lock = threading.Lock()  # Блокировка группы, кадры одной камеры записываются параллельно
+        self._last_commit = time.monotonic()  # Время последнего сброса группы
         # Создаем папку для сохранения кадров, если она не существует
         os.makedirs(folder_name, exist_ok=True)
 
-        frame_count = 0  # Счетчик кадров
-        start_time = time.perf_counter()  # Запоминаем время начала захвата
+    def _shard_folder(self, timestamp: float) -> str:
+        """
+        Возвращает папку часа захвата кадра, создавая ее при первом обращении.
+        """
+        moment = time.localtime(timestamp)
+        day_folder = os.path.join(session_folder(self.folder_name, self.start_count), time.strftime('%Y-%m-%d', moment))
+        folder = os.path.join(day_folder, f"{moment.tm_hour:02d}")
+        if folder not in self._folders:
+            os.makedirs(folder, exist_ok=True)
+            self._folders.add(folder)
+            if self.fsync != 'none':
+                # Имена новых папок тоже должны попасть на диск: сбрасываем родительские каталоги
+                new_folders = {folder, day_folder, os.path.dirname(day_folder), self.folder_name}
+                if self.fsync == 'always':
+                    sync_folders(new_folders)
+                else:
+                    with self._pending_lock:
+                        self._pending_folders.update(new_folders)
+        return folder
 
-        # Запускаем цикл, пока не получен сигнал остановки
-        while not stop_event.is_set():
-            ret, frame = cap.read()  # Захватываем кадр с камеры
+    def write(self, frame_count: int, frame: np.ndarray, timestamp: float) -> int:
+        """
+        Кодирует кадр и сохраняет его в JPG-файл.
 
-            # Формируем имя файла для сохранения кадра
-            filename = os.path.join(folder_name, f"{start_count} frame_{frame_count}.jpg")
-            cv2.imwrite(filename, frame)  # Сохраняем кадр в файл
-            frame_count += 1  # Увеличиваем счетчик кадров
+        :param frame_count: Номер кадра
+        :param frame: Кадр для сохранения
+        :param timestamp: Время захвата кадра (time.time())
+        :return: Кол-во записанных байт
+        """
+        start = time.perf_counter()
+        data = self.encoder.encode(frame)  # Кодируем кадр в JPEG
+        if self.metrics is not None:
+            self.metrics.encode_latency.observe(time.perf_counter() - start)
+        # Формируем имя файла для сохранения кадра
+        if self.layout == 'sharded':
+            folder = self._shard_folder(timestamp)
+            filename = os.path.join(folder, f"frame_{frame_count:09d}.jpg")
+        else:
+            folder = self.folder_name
+            filename = os.path.join(folder, f"{self.start_count} frame_{frame_count}.jpg")
+        if self.fsync == 'none':
+            with open(filename, 'wb') as f:
+                f.write(data)  # Сохраняем кадр в файл
+        elif self.fsync == 'always':
+            with open(filename, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())  # Ждем записи файла на диск
+            sync_folders([folder])
+        else:
+            with open(filename, 'wb') as f:
+                f.write(data)
+            with self._pending_lock:
+                self._pending.append(filename)  # Файл открывается заново при сбросе группы
+                self._pending_folders.add(folder)
+                full = len(self._pending) >= self.fsync_batch or time.monotonic() - self._last_commit >= self.fsync_interval
+            if full:
+                self.commit()
+        if self.index_frame is not None:
+            self.index_frame(frame_count, timestamp, filename, 0, len(data))
+        return len(data)
 
-            # Вычисляем время, прошедшее с начала захвата
-            elapsed_time = time.perf_counter() - start_time
-            if elapsed_time > 0:
-                # Вычисляем реальный FPS
-                real_fps = frame_count // elapsed_time
+    def commit(self) -> int:
+        """
+        Сбрасывает на диск файлы и папки текущей группы (политика group).
+
+        :return: Кол-во сброшенных файлов
+        """
+        with self._pending_lock:
+            files, self._pending = self._pending, []
+            folders, self._pending_folders = self._pending_folders, set()
+            self._last_commit = time.monotonic()
+        for filename in files:
+            try:
+                # Сбрасывается кэш файла, а не дескриптора, поэтому достаточно открыть файл заново (в Windows - для записи)
+                with open(filename, 'r+b') as f:
+                    os.fsync(f.fileno())
+            except FileNotFoundError:
+                pass  # Файл уже удален квотами хранения
+        sync_folders(folders)
+        return len(files)
+
+    def commit_due(self) -> int:
+        """
+        Сбрасывает на диск текущую группу, если с последнего сброса прошло fsync_interval секунд (политика group).
+        Вызывается пулом записи по таймеру, чтобы последние кадры не ждали следующей записи.
+
+        :return: Кол-во сброшенных файлов
+        """
+        with self._pending_lock:
+            due = bool(self._pending or self._pending_folders) and time.monotonic() - self._last_commit >= self.fsync_interval
+        return self.commit() if due else 0
+
+    def close(self) -> None:
+        """
+        Завершает запись: сбрасывает на диск последнюю группу файлов.
+        """
+        self.commit()
+
+
+# Расширения файлов сегментов для поддерживаемых кодеков cv2.VideoWriter
+SEGMENT_EXTENSIONS = {'MJPG': 'avi', 'XVID': 'avi', 'mp4v': 'mp4'}
+
+
+class SegmentSink:
+    """
+    Приемник кадров, записывающий кадры камеры в сменяющиеся видеофайлы (сегменты) через cv2.VideoWriter.
+
+    Новый сегмент начинается, когда текущий достиг заданной длительности или размера, а также при смене разрешения.
+    Граница всегда проходит между кадрами: предыдущий сегмент закрывается (release) до записи первого кадра следующего.
+    Для каждого закрытого сегмента в файл "{start_count} segments.csv" добавляется строка с диапазоном кадров и временем.
+    """
+    ordered = True  # Кадры в видеофайл должны записываться строго по порядку
+    metrics = None  # Метрики камеры (CameraMetrics), задаются FrameWriter.register
+    SIZE_CHECK_INTERVAL = 30  # Через сколько кадров проверять размер файла сегмента
+
+    index_frame = None  # Регистрация кадра в индексе сессии (FrameIndex.add для камеры), задается FrameWriter.register
+
+    def __init__(self, folder_name: str, start_count: int, fps: int, codec: str = 'MJPG',
+                 segment_minutes: float = 10, segment_mb: float = 0) -> None:
+        """
+        :param folder_name: Путь к папке, куда сохраняются сегменты
+        :param start_count: Номер итерации программы
+        :param fps: Кол-во кадров в секунду, записываемое в заголовок видеофайла
+        :param codec: Кодек cv2.VideoWriter: MJPG, XVID или mp4v (По умолчанию MJPG)
+        :param segment_minutes: Максимальная длительность сегмента в минутах, 0 - без ограничения (По умолчанию 10)
+        :param segment_mb: Максимальный размер сегмента в МБ, 0 - без ограничения (По умолчанию 0)
+        """
+        self.folder_name = folder_name
+        self.start_count = start_count
+        self.fps = fps if fps > 0 else 30  # VideoWriter не принимает нулевой FPS
+        self.codec = codec
+        self.extension = SEGMENT_EXTENSIONS.get(codec, 'avi')
+        self.segment_seconds = segment_minutes * 60
+        self.segment_bytes = segment_mb * 1024 * 1024
+        self.sidecar_path = os.path.join(folder_name, f"{start_count} segments.csv")
+        self.segment_number = 0  # Номер следующего сегмента
+        self._video_writer = None  # Текущий открытый видеофайл
+        self._segment = None  # Сведения о текущем сегменте: файл, размер кадра, диапазон кадров и времени
+        # Создаем папку для сохранения сегментов, если она не существует
+        os.makedirs(folder_name, exist_ok=True)
+
+    def _open_segment(self, frame_count: int, frame: np.ndarray, timestamp: float) -> None:
+        """
+        Открывает новый видеофайл под размер кадра.
+        """
+        filename = os.path.join(self.folder_name, f"{self.start_count} segment_{self.segment_number:04d}.{self.extension}")
+        height, width = frame.shape[:2]
+        self._video_writer = cv2.VideoWriter(filename, cv2.VideoWriter_fourcc(*self.codec), self.fps, (width, height))
+        if not self._video_writer.isOpened():
+            self._video_writer = None
+            raise IOError(f'Не удалось открыть видеофайл {filename} с кодеком {self.codec}')
+        self._segment = {
+            'file': os.path.basename(filename),
+            'size': (width, height),
+            'first_frame': frame_count,
+            'last_frame': frame_count,
+            'first_timestamp': timestamp,
+            'last_timestamp': timestamp,
+            'frames': 0,
+            'path': filename,
+        }
+        self.segment_number += 1
+
+    def _close_segment(self) -> int:
+        """
+        Закрывает текущий видеофайл и добавляет запись о нем в файл сопоставления сегментов и кадров.
+
+        :return: Размер закрытого видеофайла в байтах (0, если сегмент не был открыт)
+        """
+        if self._video_writer is None:
+            return 0
+        self._video_writer.release()  # Дописываем индекс контейнера, после этого сегмент можно читать
+        self._video_writer = None
+        segment = self._segment
+        write_header = not os.path.exists(self.sidecar_path)
+        with open(self.sidecar_path, 'a', newline='') as f:
+            sidecar = csv.writer(f)
+            if write_header:
+                sidecar.writerow(['file', 'first_frame', 'last_frame', 'frames', 'first_timestamp', 'last_timestamp'])
+            sidecar.writerow([segment['file'], segment['first_frame'], segment['last_frame'], segment['frames'],
+                              f"{segment['first_timestamp']:.6f}", f"{segment['last_timestamp']:.6f}"])
+        return os.path.getsize(segment['path'])
+
+    def _segment_is_full(self, frame: np.ndarray, timestamp: float) -> bool:
+        """
+        Проверяет, нужно ли начать новый сегмент перед записью кадра.
+        """
+        segment = self._segment
+        if (frame.shape[1], frame.shape[0]) != segment['size']:
+            return True  # Разрешение изменилось, VideoWriter не поддерживает кадры другого размера
+        if self.segment_seconds > 0 and timestamp - segment['first_timestamp'] >= self.segment_seconds:
+            return True
+        if self.segment_bytes > 0 and segment['frames'] % self.SIZE_CHECK_INTERVAL == 0:
+            return os.path.getsize(segment['path']) >= self.segment_bytes
+        return False
+
+    def write(self, frame_count: int, frame: np.ndarray, timestamp: float) -> int:
+        """
+        Записывает кадр в текущий сегмент, при необходимости начиная новый.
+
+        :param frame_count: Номер кадра
+        :param frame: Кадр для сохранения
+        :param timestamp: Время захвата кадра (time.time())
+        :return: Размер сегмента, закрытого при записи этого кадра, в байтах (размер открытого сегмента известен только после закрытия)
+        """
+        written = 0
+        if self._video_writer is not None and self._segment_is_full(frame, timestamp):
+            written = self._close_segment()
+        if self._video_writer is None:
+            self._open_segment(frame_count, frame, timestamp)
+        self._video_writer.write(frame)
+        if self.index_frame is not None:
+            # Смещение - порядковый номер кадра в видеофайле, размер кадра в сегменте неизвестен
+            self.index_frame(frame_count, timestamp, self._segment['path'], self._segment['frames'], 0)
+        self._segment['last_frame'] = frame_count
+        self._segment['last_timestamp'] = timestamp
+        self._segment['frames'] += 1
+        return written
+
+    def close(self) -> int:
+        """
+        Закрывает последний сегмент.
+
+        :return: Размер последнего сегмента в байтах
+        """
+        return self._close_segment()
+
+
+ARCHIVE_INDEX_MAGIC = b'VPFIDX01'  # Заголовок индексного файла архива кадров
+# Запись индекса архива: смещение кадра в файле данных, длина JPEG в байтах, время захвата.
+# Запись с номером N лежит по смещению len(ARCHIVE_INDEX_MAGIC) + N * itemsize, поэтому поиск кадра не требует просмотра файла
+ARCHIVE_INDEX_DTYPE = np.dtype([('offset', '<u8'), ('length', '<u4'), ('timestamp', '<f8')])
+
+
+def archive_paths(folder_name: str, start_count: int) -> tuple[str, str]:
+    """
+    Возвращает пути к файлу данных и индексному файлу архива кадров камеры.
+
+    :param folder_name: Папка камеры
+    :param start_count: Номер итерации программы
+    :return: Кортеж (путь к файлу данных, путь к индексному файлу)
+    """
+    return (os.path.join(folder_name, f"{start_count} frames.pack"),
+            os.path.join(folder_name, f"{start_count} frames.idx"))
+
+
+class ArchiveSink:
+    """
+    Приемник кадров, дописывающий JPEG-байты всех кадров камеры за сессию в один файл "{start_count} frames.pack".
+
+    Рядом ведется индексный файл "{start_count} frames.idx" с записями фиксированного размера (смещение, длина, время),
+    по одной на каждый номер кадра. Номера пропущенных (отброшенных) кадров заполняются записями с нулевой длиной,
+    поэтому кадр N находится без поиска, а время в индексе не убывает. Повторное открытие дописывает архив.
+    """
+    ordered = True  # Кадры дописываются в файл строго последовательно
+    metrics = None  # Метрики камеры (CameraMetrics), задаются FrameWriter.register
+    index_frame = None  # Регистрация кадра в индексе сессии (FrameIndex.add для камеры), задается FrameWriter.register
+    FLUSH_INTERVAL = 100  # Через сколько кадров сбрасывать буферы файлов на диск
+
+    def __init__(self, folder_name: str, start_count: int, encoder: ThreadEncoder | ProcessEncoder | None = None) -> None:
+        """
+        :param folder_name: Путь к папке, куда сохраняется архив
+        :param start_count: Номер итерации программы
+        :param encoder: Кодировщик JPEG (По умолчанию ThreadEncoder)
+        """
+        self.encoder = encoder if encoder is not None else ThreadEncoder()
+        # Создаем папку для сохранения архива, если она не существует
+        os.makedirs(folder_name, exist_ok=True)
+        data_path, index_path = archive_paths(folder_name, start_count)
+        self.data_path = data_path
+        # Номер следующего кадра определяется по кол-ву целых записей в индексе, смещение - по концу последней записи
+        self.next_frame, self._offset = self._recover(data_path, index_path)
+        self._data_file = open(data_path, 'ab')
+        self._index_file = open(index_path, 'ab')
+        if self._index_file.tell() == 0:
+            self._index_file.write(ARCHIVE_INDEX_MAGIC)
+        self._unflushed = 0
+
+    @staticmethod
+    def _recover(data_path: str, index_path: str) -> tuple[int, int]:
+        """
+        Приводит файлы архива после аварийного завершения к согласованному состоянию: отрезает неполную запись в конце индекса,
+        записи, ссылающиеся на недописанные данные, и данные без записей в индексе.
+
+        :param data_path: Путь к файлу данных
+        :param index_path: Путь к индексному файлу
+        :return: Кортеж (кол-во записей в индексе, смещение следующего кадра в файле данных)
+        """
+        header = len(ARCHIVE_INDEX_MAGIC)
+        index_size = os.path.getsize(index_path) if os.path.exists(index_path) else 0
+        if index_size < header:
+            if index_size:
+                os.truncate(index_path, 0)  # Неполный заголовок: индекс создается заново
+            if os.path.exists(data_path):
+                os.truncate(data_path, 0)
+            return 0, 0
+        data_size = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+        records = (index_size - header) // ARCHIVE_INDEX_DTYPE.itemsize
+        offset = 0
+        while records:
+            last = np.fromfile(index_path, dtype=ARCHIVE_INDEX_DTYPE, count=1,
+                               offset=header + (records - 1) * ARCHIVE_INDEX_DTYPE.itemsize)[0]
+            offset = int(last['offset']) + int(last['length'])
+            if offset <= data_size:
+                break
+            records -= 1  # Запись ссылается на данные, которые не успели попасть на диск
+            offset = 0
+        valid_size = header + records * ARCHIVE_INDEX_DTYPE.itemsize
+        if index_size != valid_size or data_size != offset:
+            logger.warning(f'Архив {index_path} поврежден при аварийном завершении, восстановлено записей: {records}')
+            os.truncate(index_path, valid_size)
+            if os.path.exists(data_path):
+                os.truncate(data_path, offset)
+        return records, offset
+
+    def append(self, frame_count: int, data: bytes, timestamp: float) -> int:
+        """
+        Дописывает уже закодированный JPEG в архив.
+
+        :param frame_count: Номер кадра
+        :param data: Байты JPEG-файла
+        :param timestamp: Время захвата кадра (time.time())
+        :return: Кол-во записанных байт
+        """
+        if frame_count < self.next_frame:
+            logger.warning(f'Кадр {frame_count} уже есть в архиве, пропускаем')
+            return 0
+        # Заполняем номера пропущенных кадров пустыми записями с временем текущего кадра
+        records = np.zeros(frame_count - self.next_frame + 1, dtype=ARCHIVE_INDEX_DTYPE)
+        records['offset'] = self._offset
+        records['timestamp'] = timestamp
+        records['length'][-1] = len(data)
+        self._data_file.write(data)
+        self._index_file.write(records.tobytes())
+        if self.index_frame is not None:
+            self.index_frame(frame_count, timestamp, self.data_path, self._offset, len(data))
+        self._offset += len(data)
+        self.next_frame = frame_count + 1
+
+        self._unflushed += 1
+        if self._unflushed >= self.FLUSH_INTERVAL:
+            self.flush()
+        return len(data)
+
+    def write(self, frame_count: int, frame: np.ndarray, timestamp: float) -> int:
+        """
+        Кодирует кадр в JPEG и дописывает его в архив.
+
+        :param frame_count: Номер кадра
+        :param frame: Кадр для сохранения
+        :param timestamp: Время захвата кадра (time.time())
+        :return: Кол-во записанных байт
+        """
+        start = time.perf_counter()
+        data = self.encoder.encode(frame)
+        if self.metrics is not None:
+            self.metrics.encode_latency.observe(time.perf_counter() - start)
+        return self.append(frame_count, data, timestamp)
+
+    def flush(self) -> None:
+        """
+        Сбрасывает буферы файлов, чтобы записанные кадры стали видны читателям архива.
+        """
+        self._data_file.flush()  # Данные сбрасываем раньше индекса, чтобы индекс не ссылался на незаписанные байты
+        self._index_file.flush()
+        self._unflushed = 0
+
+    def close(self) -> None:
+        """
+        Сбрасывает буферы и закрывает файлы архива. Повторный вызов ничего не делает.
+        """
+        if self._data_file.closed:
+            return
+        self.flush()
+        self._data_file.close()
+        self._index_file.close()
+
+
+class FrameArchiveReader:
+    """
+    Читает кадры из архива ArchiveSink: кадр по номеру за O(1) и кадры за интервал времени двоичным поиском по индексу.
+    """
+
+    def __init__(self, folder_name: str, start_count: int) -> None:
+        """
+        :param folder_name: Папка камеры с архивом
+        :param start_count: Номер итерации программы
+        """
+        data_path, index_path = archive_paths(folder_name, start_count)
+        with open(index_path, 'rb') as f:
+            if f.read(len(ARCHIVE_INDEX_MAGIC)) != ARCHIVE_INDEX_MAGIC:
+                raise ValueError(f'Файл {index_path} не является индексом архива кадров')
+        records = (os.path.getsize(index_path) - len(ARCHIVE_INDEX_MAGIC)) // ARCHIVE_INDEX_DTYPE.itemsize
+        # Индекс отображается в память целиком, записи не читаются с диска до обращения к ним
+        self.index = (np.memmap(index_path, dtype=ARCHIVE_INDEX_DTYPE, mode='r', offset=len(ARCHIVE_INDEX_MAGIC), shape=(records,))
+                      if records else np.zeros(0, dtype=ARCHIVE_INDEX_DTYPE))
+        self._data_file = open(data_path, 'rb')
+        self._lock = threading.Lock()  # Чтение по смещению из разных потоков
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __enter__(self) -> 'FrameArchiveReader':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def read_frame(self, frame_number: int) -> bytes | None:
+        """
+        Возвращает JPEG-байты кадра по номеру.
+
+        :param frame_number: Номер кадра
+        :return: Байты JPEG или None, если кадр не был записан
+        """
+        if not 0 <= frame_number < len(self.index):
+            return None
+        record = self.index[frame_number]
+        if record['length'] == 0:
+            return None
+        with self._lock:
+            self._data_file.seek(int(record['offset']))
+            return self._data_file.read(int(record['length']))
+
+    def decode_frame(self, frame_number: int) -> np.ndarray | None:
+        """
+        Возвращает декодированный кадр по номеру.
+
+        :param frame_number: Номер кадра
+        :return: Кадр или None, если кадр не был записан
+        """
+        data = self.read_frame(frame_number)
+        if data is None:
+            return None
+        return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+    def frame_range(self, start_time: float, end_time: float) -> tuple[int, int]:
+        """
+        Находит номера кадров, захваченных в интервале [start_time, end_time].
+
+        :param start_time: Начало интервала (time.time())
+        :param end_time: Конец интервала (time.time())
+        :return: Кортеж (первый номер, номер после последнего)
+        """
+        timestamps = self.index['timestamp']
+        first = int(np.searchsorted(timestamps, start_time, side='left'))
+        last = int(np.searchsorted(timestamps, end_time, side='right'))
+        return first, last
+
+    def iter_time_range(self, start_time: float, end_time: float):
+        """
+        Перебирает кадры, захваченные в интервале [start_time, end_time], без просмотра остальных записей индекса.
+
+        :param start_time: Начало интервала (time.time())
+        :param end_time: Конец интервала (time.time())
+        :return: Генератор кортежей (номер кадра, время захвата, байты JPEG)
+        """
+        first, last = self.frame_range(start_time, end_time)
+        for frame_number in range(first, last):
+            data = self.read_frame(frame_number)
+            if data is not None:
+                yield frame_number, float(self.index[frame_number]['timestamp']), data
+
+    def close(self) -> None:
+        """
+        Закрывает файлы архива.
+        """
+        self._data_file.close()
+        self.index = None
+
+
+def folder_to_archive(folder_name: str, start_count: int, archive_folder: str | None = None) -> int:
+    """
+    Упаковывает JPG-файлы "{start_count} frame_{n}.jpg" из папки камеры в архив кадров без перекодирования.
+    В JPG-файлах нет времени захвата, поэтому в индекс записывается время изменения файла.
+
+    :param folder_name: Папка камеры с JPG-файлами
+    :param start_count: Номер итерации программы
+    :param archive_folder: Папка для архива (По умолчанию folder_name)
+    :return: Кол-во упакованных кадров
+    """
+    prefix = f"{start_count} frame_"
+    frames = []
+    with os.scandir(folder_name) as entries:
+        for entry in entries:
+            if entry.name.startswith(prefix) and entry.name.endswith('.jpg'):
+                try:
+                    frames.append((int(entry.name[len(prefix):-len('.jpg')]), entry.path, entry.stat().st_mtime))
+                except ValueError:
+                    continue  # Файл с похожим, но некорректным именем
+    frames.sort()
+
+    sink = ArchiveSink(archive_folder or folder_name, start_count)
+    try:
+        for frame_count, path, timestamp in frames:
+            with open(path, 'rb') as f:
+                sink.append(frame_count, f.read(), timestamp)
+    finally:
+        sink.close()
+    return len(frames)
+
+
+def archive_to_folder(archive_folder: str, start_count: int, folder_name: str) -> int:
+    """
+    Распаковывает архив кадров в JPG-файлы "{start_count} frame_{n}.jpg". Время изменения файлов устанавливается по времени захвата.
+
+    :param archive_folder: Папка камеры с архивом
+    :param start_count: Номер итерации программы
+    :param folder_name: Папка для JPG-файлов
+    :return: Кол-во распакованных кадров
+    """
+    os.makedirs(folder_name, exist_ok=True)
+    count = 0
+    with FrameArchiveReader(archive_folder, start_count) as reader:
+        for frame_number in range(len(reader)):
+            data = reader.read_frame(frame_number)
+            if data is None:
+                continue
+            filename = os.path.join(folder_name, f"{start_count} frame_{frame_number}.jpg")
+            with open(filename, 'wb') as f:
+                f.write(data)
+            timestamp = float(reader.index[frame_number]['timestamp'])
+            os.utime(filename, (timestamp, timestamp))
+            count += 1
+    return count
+
+
+class MotionGate:
+    """
+    Приемник-фильтр, пропускающий в запись только кадры с движением, а также кадры до и после него.
+
+    Движение определяется разностью соседних кадров, уменьшенных до ширины downscale_width и переведенных в оттенки серого;
+    сравнение выполняется векторно средствами NumPy. Доля изменившихся пикселей внутри маски сравнивается с порогом min_area.
+    Последние pre_seconds секунд без движения хранятся в памяти (кольцевой буфер) и записываются перед первым кадром
+    с движением, после окончания движения запись продолжается еще post_seconds секунд. Кадры без движения не кодируются
+    и не записываются, поэтому нагрузка на диск и процессор пропорциональна активности в кадре.
+    В пуле записи кадры кольцевого буфера учитываются в памяти очереди камеры и общем бюджете (queue), а очереди при
+    нехватке памяти вытесняют их (reclaim), так как кадры до движения менее важны, чем ожидающие записи.
+    """
+    ordered = True  # Состояние детектора и кольцевого буфера зависит от порядка кадров
+    queue = None  # Очередь камеры (FrameQueue), в памяти которой учитывается кольцевой буфер, задается FrameWriter.register
+
+    def __init__(self, sink, fps: int, threshold: int = 25, min_area: float = 0.005, downscale_width: int = 160,
+                 pre_seconds: float = 2, post_seconds: float = 3, mask_path: str = '') -> None:
+        """
+        :param sink: Приемник, в который записываются пропущенные кадры
+        :param fps: Кол-во кадров в секунду, по нему рассчитывается размер кольцевого буфера
+        :param threshold: Минимальное изменение яркости пикселя 0-255, считающееся движением (По умолчанию 25)
+        :param min_area: Минимальная доля изменившихся пикселей маски для срабатывания (По умолчанию 0.005)
+        :param downscale_width: Ширина уменьшенного кадра для детектора (По умолчанию 160)
+        :param pre_seconds: Сколько секунд до движения записывать (По умолчанию 2)
+        :param post_seconds: Сколько секунд после движения записывать (По умолчанию 3)
+        :param mask_path: Путь к черно-белому изображению маски: белые области проверяются на движение (По умолчанию весь кадр)
+        """
+        self.sink = sink
+        self.threshold = threshold
+        self.min_area = min_area
+        self.downscale_width = downscale_width
+        self.post_seconds = post_seconds
+        self.mask_path = mask_path
+        self._ring = collections.deque()  # Кадры до движения: (номер, кадр, время, размер в байтах)
+        self._ring_frames = max(0, int(pre_seconds * (fps if fps > 0 else 30)))  # Максимальное кол-во кадров буфера
+        self._previous = None  # Предыдущий уменьшенный кадр в оттенках серого (int16 для вычитания без переполнения)
+        self._mask = None  # Маска уменьшенного размера (bool)
+        self._mask_pixels = 0
+        self._last_motion = None  # Время последнего кадра с движением
+        self.frames_seen = 0  # Кол-во кадров, прошедших через детектор
+        self.frames_written = 0  # Кол-во кадров, переданных в запись
+        self.events = 0  # Кол-во событий движения
+
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        """
+        Уменьшает кадр и переводит его в оттенки серого. При первом кадре готовит маску под уменьшенный размер.
+        """
+        height, width = frame.shape[:2]
+        small_size = (self.downscale_width, max(1, height * self.downscale_width // width))
+        small = cv2.resize(frame, small_size, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        if self._mask is None or self._mask.shape != small.shape:
+            mask = cv2.imread(self.mask_path, cv2.IMREAD_GRAYSCALE) if self.mask_path else None
+            if mask is None:
+                if self.mask_path:
+                    logger.warning(f'Не удалось прочитать маску движения {self.mask_path}, проверяется весь кадр')
+                self._mask = np.ones(small.shape, dtype=bool)
             else:
-                real_fps = 0  # Если прошло ноль времени, FPS равен 0
+                self._mask = cv2.resize(mask, small_size, interpolation=cv2.INTER_NEAREST) > 0
+            self._mask_pixels = max(1, int(np.count_nonzero(self._mask)))
+            self._previous = None  # Размер кадра изменился, сравнивать не с чем
+        return small.astype(np.int16)
+
+    def detect(self, frame: np.ndarray) -> bool:
+        """
+        Проверяет, есть ли движение между кадром и предыдущим.
+
+        :param frame: Кадр
+        :return: True, если доля изменившихся пикселей маски не меньше min_area
+        """
+        current = self._prepare(frame)
+        previous, self._previous = self._previous, current
+        if previous is None:
+            return False
+        changed = (np.abs(current - previous) > self.threshold) & self._mask
+        return np.count_nonzero(changed) / self._mask_pixels >= self.min_area
+
+    @property
+    def metrics(self) -> 'CameraMetrics | None':
+        return self.sink.metrics
+
+    @metrics.setter
+    def metrics(self, value: 'CameraMetrics | None') -> None:
+        self.sink.metrics = value  # Кодирование выполняет вложенный приемник
+
+    @property
+    def index_frame(self):
+        return self.sink.index_frame
+
+    @index_frame.setter
+    def index_frame(self, value) -> None:
+        self.sink.index_frame = value  # В индекс попадают только кадры, записанные вложенным приемником
+
+    def write(self, frame_count: int, frame: np.ndarray, timestamp: float) -> int:
+        """
+        Пропускает кадр в запись, если в нем или недавно было движение, иначе сохраняет его в кольцевой буфер.
+
+        :param frame_count: Номер кадра
+        :param frame: Кадр
+        :param timestamp: Время захвата кадра (time.time())
+        :return: Кол-во записанных байт (0, если кадр не записан)
+        """
+        self.frames_seen += 1
+        written = 0
+        if self.detect(frame):
+            if self._last_motion is None:
+                # Начало события: сначала записываем кадры из кольцевого буфера
+                self.events += 1
+                while True:
+                    item = self._take_oldest()
+                    if item is None:
+                        break
+                    written += self._write(*item)
+            self._last_motion = timestamp
+            written += self._write(frame_count, frame, timestamp)
+        elif self._last_motion is not None and timestamp - self._last_motion <= self.post_seconds:
+            written += self._write(frame_count, frame, timestamp)  # Кадры после движения
+        else:
+            self._last_motion = None
+            self._hold(frame_count, frame, timestamp)
+        return written
+
+    def _hold(self, frame_count: int, frame: np.ndarray, timestamp: float) -> None:
+        """
+        Сохраняет кадр в кольцевой буфер, вытесняя самые старые кадры при переполнении буфера или памяти камеры.
+        Если кадр не помещается в память даже без буфера, он не сохраняется.
+        """
+        if self._ring_frames <= 0:
+            return
+        while len(self._ring) >= self._ring_frames:
+            self.reclaim()
+        size = getattr(frame, 'nbytes', 0)
+        if self.queue is not None:
+            while not self.queue.reserve(size):
+                if not self.reclaim():
+                    return
+        self._ring.append((frame_count, frame, timestamp, size))
+
+    def _take_oldest(self) -> tuple[int, np.ndarray, float] | None:
+        """
+        Забирает самый старый кадр кольцевого буфера и освобождает занятую им память.
+
+        :return: Кортеж (номер кадра, кадр, время захвата) или None, если буфер пуст
+        """
+        try:
+            # popleft атомарен, поэтому кадр может вытеснить и поток захвата другой камеры (reclaim), но только один раз
+            frame_count, frame, timestamp, size = self._ring.popleft()
+        except IndexError:
+            return None
+        if self.queue is not None:
+            self.queue.release(size)
+        return frame_count, frame, timestamp
+
+    def reclaim(self) -> bool:
+        """
+        Вытесняет самый старый кадр кольцевого буфера. Вызывается также очередями пула записи при нехватке памяти.
+
+        :return: True, если кадр вытеснен, False, если буфер пуст
+        """
+        return self._take_oldest() is not None
+
+    def _write(self, frame_count: int, frame: np.ndarray, timestamp: float) -> int:
+        written = self.sink.write(frame_count, frame, timestamp)
+        self.frames_written += 1
+        return written or 0
+
+    def commit_due(self) -> int:
+        """
+        Передает проверку сброса группы файлов приемнику, если он ее поддерживает (JpegFolderSink).
+
+        :return: Кол-во сброшенных файлов
+        """
+        commit_due = getattr(self.sink, 'commit_due', None)
+        return commit_due() if commit_due is not None else 0
+
+    def close(self) -> int | None:
+        """
+        Закрывает приемник и записывает в лог долю записанных кадров.
+
+        :return: Результат close() приемника (для SegmentSink - размер последнего сегмента)
+        """
+        while self.reclaim():
+            pass
+        written = self.sink.close()
+        logger.info(f'Детектор движения: событий {self.events}, записано {self.frames_written} из {self.frames_seen} кадров')
+        return written
+
+
+def create_sink(folder_name: str, start_count: int, fps: int, encoder: ThreadEncoder | ProcessEncoder | None = None,
+                recording: dict | None = None, motion: dict | None = None,
+                index: int | None = None) -> JpegFolderSink | SegmentSink | ArchiveSink | MotionGate:
+    """
+    Создает приемник кадров камеры в соответствии с режимом записи.
+
+    :param folder_name: Путь к папке, куда сохраняются кадры
+    :param start_count: Номер итерации программы
+    :param fps: Кол-во кадров в секунду для захвата кадров
+    :param encoder: Кодировщик JPEG для режима jpeg
+    :param recording: Настройки секции [Recording]: mode, codec, segment_minutes, segment_mb, layout, fsync, fsync_batch, fsync_interval
+                      (По умолчанию режим jpeg)
+    :param motion: Настройки секции [Motion]. Если enabled, приемник оборачивается в MotionGate (По умолчанию запись всех кадров)
+    :param index: Индекс камеры для подстановки {camera} в путь к маске движения
+    :return: Приемник кадров
+    """
+    recording = recording or {}
+    mode = recording.get('mode', 'jpeg')
+    if mode == 'segments':
+        sink = SegmentSink(folder_name, start_count, fps, recording.get('codec', 'MJPG'),
+                           recording.get('segment_minutes', 10), recording.get('segment_mb', 0))
+    elif mode == 'archive':
+        sink = ArchiveSink(folder_name, start_count, encoder)
+    else:
+        if mode != 'jpeg':
+            logger.warning(f'Неизвестный режим записи "{mode}", кадры сохраняются в JPG-файлы')
+        sink = JpegFolderSink(folder_name, start_count, encoder, recording.get('layout', 'flat'), recording.get('fsync', 'none'),
+                              recording.get('fsync_batch', 64), recording.get('fsync_interval', 1.0))
+
+    if motion and motion.get('enabled'):
+        # Маска может задаваться отдельно для каждой камеры: motion_{camera}.png -> motion_1.png
+        mask_path = motion.get('mask', '').format(camera=index + 1 if index is not None else '')
+        sink = MotionGate(sink, fps, motion.get('threshold', 25), motion.get('min_area', 0.005), motion.get('downscale_width', 160),
+                          motion.get('pre_seconds', 2), motion.get('post_seconds', 3), mask_path)
+    return sink
+
+
+class ShardedCounter:
+    """
+    Счетчик без блокировок: каждый поток увеличивает свою ячейку, значение - сумма ячеек.
+
+    Каждую ячейку изменяет только ее поток, поэтому увеличение на горячем пути не требует блокировки и не теряет значения
+    при одновременной записи несколькими потоками.
+    """
+
+    def __init__(self) -> None:
+        self._shards = {}  # Идентификатор потока -> [значение]
+
+    def inc(self, amount: int | float = 1) -> None:
+        shard = self._shards.get(threading.get_ident())
+        if shard is None:
+            shard = self._shards.setdefault(threading.get_ident(), [0])
+        shard[0] += amount
+
+    @property
+    def value(self) -> int | float:
+        return sum(shard[0] for shard in list(self._shards.values()))
+
+
+class Histogram:
+    """
+    Гистограмма длительностей без блокировок (ячейки по потокам, как в ShardedCounter).
+    """
+    BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)  # Верхние границы интервалов, секунды
+
+    def __init__(self, buckets: tuple = BUCKETS) -> None:
+        self.buckets = buckets
+        self._shards = {}  # Идентификатор потока -> [кол-во по интервалам..., кол-во выше последней границы, сумма]
+
+    def observe(self, value: float) -> None:
+        shard = self._shards.get(threading.get_ident())
+        if shard is None:
+            shard = self._shards.setdefault(threading.get_ident(), [0] * (len(self.buckets) + 1) + [0.0])
+        shard[bisect.bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self) -> tuple[list[int], float, int]:
+        """
+        Возвращает накопленные значения гистограммы.
+
+        :return: Кортеж (накопительные кол-ва для каждой границы buckets, сумма, общее кол-во)
+        """
+        counts = [0] * (len(self.buckets) + 1)
+        total = 0.0
+        for shard in list(self._shards.values()):
+            for position in range(len(counts)):
+                counts[position] += shard[position]
+            total += shard[-1]
+        cumulative = list(itertools.accumulate(counts))
+        return cumulative[:-1], total, cumulative[-1]
+
+
+class CameraMetrics:
+    """
+    Метрики конвейера одной камеры, обновляемые потоками захвата и записи.
+    """
+
+    def __init__(self) -> None:
+        self.captured = ShardedCounter()  # Кадры, полученные с камеры
+        self.bytes_written = ShardedCounter()  # Записанные байты
+        self.read_latency = Histogram()  # Длительность cap.read(), секунды
+        self.encode_latency = Histogram()  # Длительность кодирования кадра в JPEG, секунды
+        self.write_latency = Histogram()  # Длительность записи кадра приемником (с кодированием), секунды
+        self.capture = None  # Камера: в метрики попадают переподключения CameraSupervisor и кадры, пропущенные RateAdapter
+
+
+class PipelineMetrics:
+    """
+    Реестр метрик всех камер и их вывод в текстовом формате Prometheus.
+
+    Счетчики записанных и отброшенных кадров и глубина очередей не дублируются, а берутся из FrameWriter.stats() в момент запроса.
+    """
+    PREFIX = 'videoproject'
+
+    def __init__(self) -> None:
+        self.cameras = {}  # Индекс камеры -> CameraMetrics
+        self._cameras_lock = threading.Lock()  # Блокировка только для регистрации камер
+        self._last_scrape = None  # (время, {индекс: записано байт}) предыдущего запроса для расчета скорости записи
+
+    def camera(self, index: int) -> CameraMetrics:
+        """
+        Возвращает метрики камеры, создавая их при первом обращении.
+
+        :param index: Индекс камеры
+        :return: Метрики камеры
+        """
+        metrics = self.cameras.get(index)
+        if metrics is None:
+            with self._cameras_lock:
+                metrics = self.cameras.setdefault(index, CameraMetrics())
+        return metrics
+
+    def render(self, writer: 'FrameWriter | None' = None) -> str:
+        """
+        Формирует текст метрик в формате Prometheus.
+
+        :param writer: Пул записи, из которого берутся записанные и отброшенные кадры и глубина очередей
+        :return: Текст для ответа на запрос /metrics
+        """
+        writer_stats = writer.stats() if writer is not None else {}
+        cameras = dict(self.cameras)
+        now = time.monotonic()
+        bytes_written = {index: camera.bytes_written.value for index, camera in cameras.items()}
+        previous_time, previous_bytes = self._last_scrape or (None, {})
+        self._last_scrape = (now, bytes_written)
+
+        lines = []
+
+        def metric(name: str, kind: str, help_text: str, values: list[tuple[str, float]]) -> None:
+            # values - пары (суффикс и метки ряда, значение), например ('_bucket{camera="1",le="0.1"}', 5)
+            lines.append(f'# HELP {self.PREFIX}_{name} {help_text}')
+            lines.append(f'# TYPE {self.PREFIX}_{name} {kind}')
+            lines.extend(f'{self.PREFIX}_{name}{series} {value}' for series, value in values)
+
+        def label(index: int, extra: str = '') -> str:
+            return f'{{camera="{index + 1}"{extra}}}'
+
+        indices = sorted(set(cameras) | set(writer_stats))
+        metric('frames_captured_total', 'counter', 'Кадры, полученные с камеры',
+               [(label(i), cameras[i].captured.value) for i in indices if i in cameras])
+        for name, key, kind, help_text in (('frames_written_total', 'written', 'counter', 'Записанные кадры'),
+                                           ('frames_dropped_total', 'dropped', 'counter', 'Кадры, отброшенные из-за переполнения очереди записи'),
+                                           ('frames_degraded_total', 'degraded', 'counter', 'Кадры, уменьшенные из-за переполнения очереди записи'),
+                                           ('write_errors_total', 'errors', 'counter', 'Ошибки записи кадров'),
+                                           ('queue_depth', 'queue_depth', 'gauge', 'Кадры в очереди записи'),
+                                           ('queue_bytes', 'queue_bytes', 'gauge', 'Байты кадров в очереди записи'),
+                                           ('queue_high_water', 'high_water', 'gauge', 'Максимум кадров в очереди записи'),
+                                           ('queue_high_water_bytes', 'high_water_bytes', 'gauge', 'Максимум байт кадров в очереди записи'),
+                                           ('queue_blocked_seconds_total', 'blocked_seconds', 'counter',
+                                            'Ожидание места в очереди записи потоком захвата')):
+            metric(name, kind, help_text, [(label(i), writer_stats[i][key]) for i in indices if i in writer_stats])
+        if writer is not None:
+            budget = writer.budget.stats()
+            metric('queue_memory_bytes', 'gauge', 'Байты кадров во всех очередях записи', [('', budget['used'])])
+            metric('queue_memory_high_water_bytes', 'gauge', 'Максимум байт кадров во всех очередях записи', [('', budget['high_water'])])
+        metric('reconnects_total', 'counter', 'Переподключения камеры',
+               [(label(i), cameras[i].capture.reconnects) for i in indices
+                if i in cameras and isinstance(cameras[i].capture, CameraSupervisor)])
+        adapters = {i: find_rate_adapter(cameras[i].capture) for i in indices if i in cameras}
+        adapters = {i: adapter.stats() for i, adapter in adapters.items() if adapter is not None}
+        metric('frames_decode_skipped_total', 'counter', 'Кадры камеры, пропущенные без декодирования',
+               [(label(i), stats['skipped']) for i, stats in adapters.items()])
+        metric('decode_cpu_saved_seconds_total', 'counter', 'Процессорное время, сэкономленное пропуском декодирования',
+               [(label(i), stats['decode_cpu_saved']) for i, stats in adapters.items()])
+        metric('bytes_written_total', 'counter', 'Записанные байты', [(label(i), bytes_written[i]) for i in indices if i in cameras])
+        if previous_time is not None and now > previous_time:
+            metric('bytes_written_per_second', 'gauge', 'Скорость записи с предыдущего запроса, байт/с',
+                   [(label(i), (bytes_written[i] - previous_bytes.get(i, 0)) / (now - previous_time)) for i in indices if i in cameras])
+
+        for name, attribute, help_text in (('read_seconds', 'read_latency', 'Длительность чтения кадра с камеры'),
+                                           ('encode_seconds', 'encode_latency', 'Длительность кодирования кадра в JPEG'),
+                                           ('write_seconds', 'write_latency', 'Длительность записи кадра приемником')):
+            values = []
+            for i in indices:
+                if i not in cameras:
+                    continue
+                histogram = getattr(cameras[i], attribute)
+                cumulative, total, count = histogram.snapshot()
+                values += [('_bucket' + label(i, f',le="{bound}"'), value) for bound, value in zip(histogram.buckets, cumulative)]
+                values += [('_bucket' + label(i, ',le="+Inf"'), count), ('_sum' + label(i), total), ('_count' + label(i), count)]
+            metric(name, 'histogram', help_text, values)
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """
+    Локальный HTTP-сервер, отдающий метрики PipelineMetrics по адресу /metrics в формате Prometheus.
+
+    Метрики формируются только в момент запроса, поэтому сервер не нагружает потоки захвата и записи.
+    """
+
+    def __init__(self, metrics: PipelineMetrics, writer: 'FrameWriter | None' = None, host: str = '127.0.0.1', port: int = 9108) -> None:
+        """
+        :param metrics: Реестр метрик
+        :param writer: Пул записи, счетчики которого включаются в метрики
+        :param host: Адрес для подключения (По умолчанию только локальный '127.0.0.1')
+        :param port: Порт (По умолчанию 9108, 0 - любой свободный)
+        """
+        self.metrics = metrics
+        self.writer = writer
+        server = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = server.metrics.render(server.writer).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                pass  # Запросы не записываются в лог программы
+
+        self.httpd = http.server.ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]  # Фактический порт, если был задан 0
+        self._thread = None
+
+    def start(self) -> 'MetricsServer':
+        """
+        Запускает сервер в фоновом потоке.
+
+        :return: Сам объект
+        """
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="Metrics", daemon=True)
+        self._thread.start()
+        logger.info(f'Метрики доступны по адресу http://{self.httpd.server_address[0]}:{self.port}/metrics')
+        return self
+
+    def close(self) -> None:
+        """
+        Останавливает сервер.
+        """
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class Tracer:
+    """
+    Трассировка этапов обработки кадра с экспортом в формат Chrome trace (chrome://tracing, ui.perfetto.dev).
+
+    Записывается каждый sample_every-й кадр камеры: длительность чтения с камеры, записи, отображения и ожидания темпа, чтобы было видно,
+    какой этап задерживает камеру. Событие - словарь в ограниченной очереди collections.deque, добавление в которую потокобезопасно,
+    поэтому потоки камер не блокируют друг друга. При выключенной трассировке tracer равен None и на горячем пути выполняется только
+    проверка на None.
+    """
+
+    def __init__(self, sample_rate: float = 0.01, max_events: int = 100000) -> None:
+        """
+        :param sample_rate: Доля записываемых кадров от 0 до 1 (По умолчанию 0.01 - каждый сотый кадр)
+        :param max_events: Максимальное кол-во хранимых событий, старые события вытесняются (По умолчанию 100000)
+        """
+        self.sample_every = max(1, round(1 / sample_rate)) if sample_rate > 0 else 0  # 0 - кадры не записываются
+        self._events = collections.deque(maxlen=max(1, max_events))  # События в формате Chrome trace
+        self._origin = time.perf_counter()  # Начало отсчета времени трассировки
+        self._pid = os.getpid()
+
+    def sampled(self, iteration: int) -> bool:
+        """
+        Проверяет, записывается ли итерация цикла захвата.
+
+        :param iteration: Номер итерации цикла захвата камеры
+        :return: True, если этапы итерации нужно записать
+        """
+        return self.sample_every > 0 and iteration % self.sample_every == 0
+
+    def span(self, name: str, index: int, start: float, end: float | None = None, **args) -> None:
+        """
+        Записывает этап обработки камеры.
+
+        :param name: Название этапа
+        :param index: Индекс камеры, этапы каждой камеры отображаются на отдельной строке
+        :param start: Время начала этапа по time.perf_counter()
+        :param end: Время окончания этапа по time.perf_counter() (По умолчанию текущее время)
+        :param args: Дополнительные сведения об этапе, например номер кадра
+        """
+        end = time.perf_counter() if end is None else end
+        self._events.append({'name': name, 'cat': 'capture', 'ph': 'X', 'pid': self._pid, 'tid': index + 1,
+                             'ts': (start - self._origin) * 1e6, 'dur': (end - start) * 1e6, 'args': args})
+
+    def events(self) -> list[dict]:
+        """
+        Возвращает копию записанных событий.
+        """
+        return list(self._events)
+
+    def export(self, path: str) -> int:
+        """
+        Сохраняет события в JSON-файл формата Chrome trace.
+
+        :param path: Путь к файлу
+        :return: Кол-во сохраненных событий
+        """
+        events = self.events()
+        # Названия строк: "Camera N" для каждой камеры, встречающейся в событиях
+        names = [{'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': tid, 'args': {'name': f'Camera {tid}'}}
+                 for tid in sorted({event['tid'] for event in events})]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': names + events, 'displayTimeUnit': 'ms'}, f)
+        return len(events)
+
+
+# Имена файлов сессии записи в папке камеры: JPG-кадры, видеосегменты и файл сопоставления, архив кадров
+SESSION_FILE_PATTERN = re.compile(r'^(\d+) (?:frame_(\d+)\.jpg|segment_\d+\.\w+|segments\.csv|frames\.(?:pack|idx))$')
+SESSION_FOLDER_PATTERN = re.compile(r'^\d{6,}$')  # Папки сессий раскладки sharded (session_folder)
+
+
+class StorageManager:
+    """
+    Ограничение места, занимаемого записями: квоты на папку камеры и на все папки в ГБ, срок хранения в днях и минимум свободного места
+    на диске. При превышении удаляются самые старые сессии (все файлы одного запуска программы "{start_count} ..."), текущая сессия
+    камеры не удаляется. Сессия раскладки sharded удаляется вместе с папкой сессии.
+
+    Занятое место учитывается по мере записи: пул записи сообщает о каждом записанном кадре (record), а индекс сессий хранится в файле
+    storage.json в папке камеры. Папка просматривается (os.scandir) только один раз, если индекса еще нет. Проверка квот и удаление
+    выполняются фоновым потоком, потоки записи только обновляют счетчики. Если кадры пишут процессы камер, record() не вызывается,
+    и при scan_active размер текущих сессий пересчитывается по файлам перед каждой проверкой.
+    """
+    INDEX_NAME = 'storage.json'  # Файл индекса сессий в папке камеры
+
+    def __init__(self, camera_gb: float = 0.0, total_gb: float = 0.0, days: float = 0.0, min_free_gb: float = 0.0,
+                 interval: float = 60.0, scan_active: bool = False) -> None:
+        """
+        :param camera_gb: Квота на папку одной камеры в ГБ, 0 - без ограничения (По умолчанию 0)
+        :param total_gb: Квота на все папки в ГБ, 0 - без ограничения (По умолчанию 0)
+        :param days: Срок хранения сессий в днях, 0 - без ограничения (По умолчанию 0)
+        :param min_free_gb: Минимум свободного места на диске в ГБ, 0 - без ограничения (По умолчанию 0)
+        :param interval: Период проверки квот фоновым потоком в секундах (По умолчанию 60)
+        :param scan_active: Пересчитывать текущие сессии по файлам перед проверкой, если запись ведется в других процессах
+                            (По умолчанию False)
+        """
+        self.camera_bytes = int(camera_gb * 1024 ** 3)
+        self.total_bytes = int(total_gb * 1024 ** 3)
+        self.max_age = days * 86400
+        self.min_free_bytes = int(min_free_gb * 1024 ** 3)
+        self.interval = interval
+        self.scan_active = scan_active
+        self._folders = {}  # Папка -> {номер сессии: {'bytes', 'first_frame', 'last_frame', 'first_time', 'last_time'}}
+        self._active = {}  # Индекс камеры -> (папка, номер сессии) текущей записи
+        self._dirty = set()  # Папки, индекс которых изменился с последнего сохранения
+        self._lock = threading.Lock()  # Блокировка индекса, ввод-вывод под ней не выполняется
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.evicted = 0  # Кол-во удаленных сессий
+        self.freed = 0  # Кол-во освобожденных байт
+
+    def _load_folder(self, folder_name: str) -> dict:
+        """
+        Загружает индекс сессий папки из storage.json или, если его нет, один раз строит его по файлам папки.
+        """
+        path = os.path.join(folder_name, self.INDEX_NAME)
+        try:
+            with open(path, encoding='utf-8') as f:
+                return {int(session): info for session, info in json.load(f)['sessions'].items()}
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f'Индекс {path} поврежден и будет построен заново: {e}')
+        return self._scan_folder(folder_name)
+
+    def _scan_folder(self, folder_name: str) -> dict:
+        """
+        Строит индекс сессий папки по ее файлам (os.scandir).
+        """
+        sessions = {}
+        if os.path.isdir(folder_name):
+            with os.scandir(folder_name) as entries:
+                for entry in entries:
+                    if SESSION_FOLDER_PATTERN.match(entry.name) and entry.is_dir():
+                        sessions[int(entry.name)] = self._scan_session_folder(entry.path)
+                        continue
+                    match = SESSION_FILE_PATTERN.match(entry.name)
+                    if match is None or not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                    info = sessions.setdefault(int(match.group(1)), {'bytes': 0, 'first_frame': None, 'last_frame': None,
+                                                                     'first_time': stat.st_mtime, 'last_time': stat.st_mtime})
+                    info['bytes'] += stat.st_size
+                    info['first_time'] = min(info['first_time'], stat.st_mtime)
+                    info['last_time'] = max(info['last_time'], stat.st_mtime)
+                    if match.group(2) is not None:
+                        frame = int(match.group(2))
+                        info['first_frame'] = frame if info['first_frame'] is None else min(info['first_frame'], frame)
+                        info['last_frame'] = frame if info['last_frame'] is None else max(info['last_frame'], frame)
+        return sessions
+
+    @staticmethod
+    def _scan_session_folder(path: str) -> dict:
+        """
+        Строит запись индекса для папки сессии раскладки sharded по ее файлам.
+        """
+        info = {'bytes': 0, 'first_frame': None, 'last_frame': None, 'first_time': None, 'last_time': None, 'sharded': True}
+        for folder, _, names in os.walk(path):
+            for name in names:
+                stat = os.stat(os.path.join(folder, name))
+                info['bytes'] += stat.st_size
+                info['first_time'] = stat.st_mtime if info['first_time'] is None else min(info['first_time'], stat.st_mtime)
+                info['last_time'] = stat.st_mtime if info['last_time'] is None else max(info['last_time'], stat.st_mtime)
+        if info['first_time'] is None:
+            info['first_time'] = info['last_time'] = os.stat(path).st_mtime  # Пустая папка сессии
+        return info
+
+    def open_session(self, index: int, folder_name: str, start_count: int, sharded: bool = False) -> None:
+        """
+        Начинает учет записи камеры в сессию start_count папки folder_name.
+
+        :param index: Индекс камеры
+        :param folder_name: Папка камеры
+        :param start_count: Номер итерации программы
+        :param sharded: Сессия записывается в раскладке sharded (По умолчанию False)
+        """
+        folder_name = os.path.abspath(folder_name)
+        sessions = self._load_folder(folder_name) if folder_name not in self._folders else None
+        now = time.time()
+        with self._lock:
+            if sessions is not None:
+                self._folders.setdefault(folder_name, sessions)
+            self._folders[folder_name].setdefault(start_count, {'bytes': 0, 'first_frame': None, 'last_frame': None,
+                                                                'first_time': now, 'last_time': now, 'sharded': sharded})
+            self._active[index] = (folder_name, start_count)
+            self._dirty.add(folder_name)
+
+    def close_session(self, index: int) -> None:
+        """
+        Завершает учет записи камеры, после этого ее сессия может удаляться.
+
+        :param index: Индекс камеры
+        """
+        with self._lock:
+            self._active.pop(index, None)
+
+    def record(self, index: int, size: int, frame_count: int | None = None, timestamp: float | None = None) -> None:
+        """
+        Учитывает записанные байты текущей сессии камеры. Вызывается пулом записи после каждого кадра.
+
+        :param index: Индекс камеры
+        :param size: Кол-во записанных байт
+        :param frame_count: Номер записанного кадра
+        :param timestamp: Время захвата кадра (time.time())
+        """
+        with self._lock:
+            active = self._active.get(index)
+            if active is None:
+                return
+            folder_name, session = active
+            info = self._folders[folder_name][session]
+            info['bytes'] += size
+            if frame_count is not None:
+                info['first_frame'] = frame_count if info['first_frame'] is None else min(info['first_frame'], frame_count)
+                info['last_frame'] = frame_count if info['last_frame'] is None else max(info['last_frame'], frame_count)
+            if timestamp is not None:
+                info['last_time'] = max(info['last_time'], timestamp)
+            self._dirty.add(folder_name)
+
+    def refresh(self) -> None:
+        """
+        Пересчитывает по файлам на диске размер, номера кадров и время текущих сессий камер. Используется, когда кадры пишут
+        процессы камер и record() не вызывается.
+        """
+        with self._lock:
+            active = set(self._active.values())
+        for folder_name in {folder_name for folder_name, _ in active}:
+            scanned = self._scan_folder(folder_name)
+            with self._lock:
+                for session, info in self._folders.get(folder_name, {}).items():
+                    if (folder_name, session) in active and session in scanned:
+                        found = scanned[session]
+                        info.update(bytes=found['bytes'], first_frame=found['first_frame'], last_frame=found['last_frame'],
+                                    last_time=max(info['last_time'], found['last_time']))
+                self._dirty.add(folder_name)
+
+    def usage(self) -> dict:
+        """
+        Возвращает занятое место по индексу, без обращения к диску.
+
+        :return: Словарь папка -> кол-во байт
+        """
+        with self._lock:
+            return {folder_name: sum(info['bytes'] for info in sessions.values()) for folder_name, sessions in self._folders.items()}
+
+    def _candidates(self) -> list[tuple[float, str, int, int]]:
+        """
+        Возвращает сессии, которые можно удалить (кроме текущих сессий камер), от самой старой к самой новой.
+        """
+        active = set(self._active.values())
+        return sorted((info['last_time'], folder_name, session, info['bytes'])
+                      for folder_name, sessions in self._folders.items() for session, info in sessions.items()
+                      if (folder_name, session) not in active)
+
+    def _select(self) -> list[tuple[str, int]]:
+        """
+        Выбирает сессии для удаления по сроку хранения, квотам и свободному месту на диске.
+        """
+        with self._lock:
+            candidates = self._candidates()
+            usage = {folder_name: sum(info['bytes'] for info in sessions.values()) for folder_name, sessions in self._folders.items()}
+        total = sum(usage.values())
+        devices = {}  # Папка -> диск папки (st_dev)
+        free = {}  # Диск -> свободное место
+        if self.min_free_bytes > 0:
+            for folder_name in usage:
+                try:
+                    devices[folder_name] = os.stat(folder_name).st_dev
+                    free[devices[folder_name]] = shutil.disk_usage(folder_name).free
+                except OSError:
+                    pass
+        now = time.time()
+        selected = []
+        for last_time, folder_name, session, size in candidates:
+            expired = self.max_age > 0 and now - last_time > self.max_age
+            over_camera = self.camera_bytes > 0 and usage[folder_name] > self.camera_bytes
+            over_total = self.total_bytes > 0 and total > self.total_bytes
+            # Свободное место проверяется только для диска папки сессии, сессии на других дисках не удаляются
+            device = devices.get(folder_name)
+            low_free = free.get(device, math.inf) < self.min_free_bytes
+            if not (expired or over_camera or over_total or low_free):
+                continue
+            selected.append((folder_name, session))
+            usage[folder_name] -= size
+            total -= size
+            if device in free:
+                free[device] += size  # Освобожденные байты учитываются, не дожидаясь нового замера
+        return selected
+
+    def _delete_session(self, folder_name: str, session: int, info: dict) -> None:
+        """
+        Удаляет файлы сессии. Имена JPG-кадров строятся по диапазону номеров кадров из индекса, без просмотра папки.
+        """
+        if info.get('sharded'):
+            shutil.rmtree(session_folder(folder_name, session), ignore_errors=True)
+            return
+        paths = list(archive_paths(folder_name, session))
+        sidecar = os.path.join(folder_name, f"{session} segments.csv")
+        paths.append(sidecar)
+        # Сегменты нумеруются подряд с 0, удаляем их до первого отсутствующего номера
+        for extension in set(SEGMENT_EXTENSIONS.values()):
+            for number in itertools.count():
+                segment = os.path.join(folder_name, f"{session} segment_{number:04d}.{extension}")
+                if not os.path.exists(segment):
+                    break
+                paths.append(segment)
+        if info['first_frame'] is not None:
+            paths.extend(os.path.join(folder_name, f"{session} frame_{frame}.jpg")
+                         for frame in range(info['first_frame'], info['last_frame'] + 1))
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Кадр был отброшен, пропущен детектором движения или уже удален
+            except OSError as e:
+                logger.error(f'Не удалось удалить {path}: {e}')
+
+    def enforce(self) -> list[tuple[str, int]]:
+        """
+        Проверяет квоты и удаляет самые старые сессии, пока квоты не будут соблюдены.
+
+        :return: Список удаленных сессий (папка, номер сессии)
+        """
+        evicted = []
+        for folder_name, session in self._select():
+            with self._lock:
+                if (folder_name, session) in self._active.values():
+                    continue  # Камера начала запись в эту сессию после выбора
+                info = self._folders[folder_name].pop(session, None)
+                self._dirty.add(folder_name)
+            if info is None:
+                continue
+            self._delete_session(folder_name, session, info)
+            self.evicted += 1
+            self.freed += info['bytes']
+            evicted.append((folder_name, session))
+            logger.info(f"Удалена сессия {session} в {folder_name}: освобождено {info['bytes'] / 1024 ** 2:.1f} МБ")
+        if self.camera_bytes > 0:
+            with self._lock:
+                # Осталась только текущая сессия камеры, а квота все еще превышена
+                over = [folder_name for folder_name, sessions in self._folders.items()
+                        if sum(info['bytes'] for info in sessions.values()) > self.camera_bytes]
+            for folder_name in over:
+                logger.warning(f'Текущая сессия в {folder_name} превышает квоту на камеру, удалять больше нечего')
+        return evicted
+
+    def save(self) -> None:
+        """
+        Сохраняет изменившиеся индексы сессий в storage.json папок камер.
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            snapshots = {folder_name: {str(session): dict(info) for session, info in self._folders[folder_name].items()}
+                         for folder_name in dirty if folder_name in self._folders}
+        for folder_name, sessions in snapshots.items():
+            path = os.path.join(folder_name, self.INDEX_NAME)
+            try:
+                os.makedirs(folder_name, exist_ok=True)
+                with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                    json.dump({'sessions': sessions}, f)
+                os.replace(path + '.tmp', path)  # Индекс заменяется целиком, прерванная запись не портит его
+            except OSError as e:
+                logger.error(f'Не удалось сохранить индекс {path}: {e}')
+
+    def _run(self) -> None:
+        """
+        Цикл фонового потока: проверка квот и сохранение индексов каждые interval секунд.
+        """
+        while not self._stop_event.wait(self.interval):
+            try:
+                if self.scan_active:
+                    self.refresh()
+                self.enforce()
+                self.save()
+            except Exception as e:
+                logger.error(f'Непредвиденная ошибка в StorageManager: {e}')
+
+    def start(self) -> 'StorageManager':
+        """
+        Запускает фоновый поток проверки квот.
+
+        :return: self
+        """
+        self._thread = threading.Thread(target=self._run, name='StorageManager', daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        """
+        Останавливает фоновый поток и сохраняет индексы.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.save()
+
+
+def frame_index_path(folder_name: str, start_count: int) -> str:
+    """
+    Возвращает путь к базе индекса кадров сессии.
+
+    :param folder_name: Папка индексов
+    :param start_count: Номер итерации программы
+    :return: Путь к файлу "{start_count} frames.sqlite"
+    """
+    return os.path.join(folder_name, f"{start_count} frames.sqlite")
+
+
+class FrameIndex:
+    """
+    Индекс кадров сессии в базе SQLite: камера, номер кадра, время захвата, файл, смещение и размер каждого записанного кадра.
+
+    Приемники сообщают о каждом записанном кадре (add), записи копятся в памяти и добавляются в базу одной транзакцией по batch_size
+    записей, поэтому запись в индекс не замедляет пул записи. Индекс по (camera, timestamp) позволяет находить кадры камеры за интервал
+    времени за миллисекунды даже для многодневных сессий, без разбора имен и stat файлов. База открывается в режиме WAL, поэтому
+    ее можно читать из другого процесса во время записи.
+    """
+
+    def __init__(self, path: str, batch_size: int = 500) -> None:
+        """
+        :param path: Путь к файлу базы (frame_index_path)
+        :param batch_size: Кол-во записей, добавляемых одной транзакцией (По умолчанию 500)
+        """
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)  # Соединение используется потоками пула под блокировкой
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')  # В режиме WAL база не повреждается при сбое, теряются только последние записи
+        self._db.execute('CREATE TABLE IF NOT EXISTS frames (camera INTEGER NOT NULL, frame INTEGER NOT NULL, timestamp REAL NOT NULL, '
+                         'path TEXT NOT NULL, offset INTEGER NOT NULL, size INTEGER NOT NULL)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS frames_camera_time ON frames (camera, timestamp)')
+        self._db.commit()
+        self._pending = []  # Записи, еще не добавленные в базу
+        self._lock = threading.Lock()  # Блокировка списка записей и соединения с базой
+
+    def add(self, camera: int, frame: int, timestamp: float, path: str, offset: int, size: int) -> None:
+        """
+        Регистрирует записанный кадр.
+
+        :param camera: Индекс камеры
+        :param frame: Номер кадра
+        :param timestamp: Время захвата кадра (time.time())
+        :param path: Файл, в котором сохранен кадр
+        :param offset: Смещение кадра в файле архива или порядковый номер кадра в видеосегменте (0 для отдельных JPG-файлов)
+        :param size: Размер кадра в байтах (0, если неизвестен)
+        """
+        with self._lock:
+            self._pending.append((camera, frame, timestamp, path, offset, size))
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def _flush(self) -> None:
+        """
+        Добавляет накопленные записи в базу одной транзакцией. Вызывается под блокировкой.
+        """
+        if not self._pending:
+            return
+        with self._db:
+            self._db.executemany('INSERT INTO frames VALUES (?, ?, ?, ?, ?, ?)', self._pending)
+        self._pending = []
+
+    def flush(self) -> None:
+        """
+        Добавляет накопленные записи в базу.
+        """
+        with self._lock:
+            self._flush()
+
+    def query(self, camera: int, start: float, end: float) -> list[tuple[int, float, str, int, int]]:
+        """
+        Возвращает кадры камеры за интервал времени.
+
+        :param camera: Индекс камеры
+        :param start: Начало интервала (time.time())
+        :param end: Конец интервала включительно (time.time())
+        :return: Список (номер кадра, время захвата, файл, смещение, размер), упорядоченный по времени
+        """
+        with self._lock:
+            self._flush()  # Учитываем кадры, еще не добавленные в базу
+            return self._db.execute('SELECT frame, timestamp, path, offset, size FROM frames WHERE camera = ? AND timestamp BETWEEN ? AND ? '
+                                    'ORDER BY timestamp, frame', (camera, start, end)).fetchall()
+
+    def cameras(self) -> dict[int, tuple[int, float, float]]:
+        """
+        Возвращает сводку по камерам сессии.
+
+        :return: Словарь индекс камеры -> (кол-во кадров, время первого кадра, время последнего кадра)
+        """
+        with self._lock:
+            self._flush()
+            rows = self._db.execute('SELECT camera, COUNT(*), MIN(timestamp), MAX(timestamp) FROM frames GROUP BY camera').fetchall()
+        return {camera: (count, first, last) for camera, count, first, last in rows}
+
+    def close(self) -> None:
+        """
+        Добавляет оставшиеся записи и закрывает базу.
+        """
+        with self._lock:
+            self._flush()
+            self._db.close()
+
+
+QUEUE_POLICIES = ('drop_newest', 'drop_oldest', 'block', 'degrade')  # Политики при переполнении очереди кадров
+
+
+class MemoryBudget:
+    """
+    Общий бюджет памяти очередей кадров всех камер пула записи.
+
+    Очереди учитывают в нем размер кадров (frame.nbytes) и используют его блокировку, поэтому кадр одной камеры может ждать
+    освобождения места, занятого другими камерами. В бюджете учитываются и кадры кольцевых буферов записи по движению.
+    """
+
+    def __init__(self, limit: int = 0) -> None:
+        """
+        :param limit: Максимальный размер кадров во всех очередях в байтах. При limit <= 0 без ограничения (По умолчанию 0)
+        """
+        self.limit = limit
+        self.used = 0  # Байты кадров во всех очередях
+        self.high_water = 0  # Максимум used за время работы
+        self.condition = threading.Condition()  # Общая блокировка очередей, оповещает об освобождении места
+        self.reclaimers = []  # Вытеснение кадров кольцевых буферов камер (MotionGate.reclaim) при нехватке общего бюджета
+
+    def fits(self, size: int) -> bool:
+        return self.limit <= 0 or self.used + size <= self.limit
+
+    def stats(self) -> dict:
+        """
+        :return: Словарь {'used', 'high_water', 'limit'} в байтах
+        """
+        with self.condition:
+            return {'used': self.used, 'high_water': self.high_water, 'limit': self.limit}
+
+
+class FrameQueue:
+    """
+    Ограниченная очередь кадров камеры между циклом захвата и потоками записи.
+
+    Очередь ограничена кол-вом кадров (maxsize), размером кадров камеры в байтах (max_bytes) и общим бюджетом памяти (budget).
+    Если кадр не помещается, поведение задается политикой:
+        ⦁ drop_newest - новый кадр отбрасывается, поток захвата не блокируется;
+        ⦁ drop_oldest - из очереди удаляются самые старые кадры камеры, в очередь попадает новый;
+        ⦁ block - поток захвата ждет освобождения места не дольше block_timeout секунд, затем кадр отбрасывается;
+        ⦁ degrade - кадр уменьшается вдвое по каждой стороне (до DEGRADE_STEPS раз), пока не поместится, иначе отбрасывается.
+    Для подбора размеров очередей собираются максимумы заполнения (кадры и байты), кол-во отброшенных и уменьшенных кадров
+    и время ожидания потока захвата. Интерфейс совместим с queue.Queue: get_nowait(), task_done(), join(), qsize().
+    """
+    DEGRADE_STEPS = 2  # Сколько раз кадр может быть уменьшен вдвое
+    DEGRADE_MIN_SIDE = 32  # Кадр с меньшей стороной меньше этой не уменьшается
+
+    def __init__(self, maxsize: int = 32, max_bytes: int = 0, policy: str = 'drop_newest', budget: MemoryBudget | None = None,
+                 block_timeout: float = 1.0) -> None:
+        """
+        :param maxsize: Максимальное кол-во кадров в очереди (По умолчанию 32)
+        :param max_bytes: Максимальный размер кадров в очереди в байтах. При max_bytes <= 0 без ограничения (По умолчанию 0)
+        :param policy: Политика при переполнении: drop_newest, drop_oldest, block или degrade (По умолчанию drop_newest)
+        :param budget: Общий бюджет памяти очередей (По умолчанию без общего ограничения)
+        :param block_timeout: Максимальное ожидание места в политике block в секундах (По умолчанию 1.0)
+        """
+        if policy not in QUEUE_POLICIES:
+            logger.warning(f'Неизвестная политика очереди "{policy}", используется drop_newest')
+            policy = 'drop_newest'
+        self.maxsize = max(1, maxsize)
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.budget = budget if budget is not None else MemoryBudget()
+        self.block_timeout = block_timeout
+        self._condition = self.budget.condition
+        self._items = collections.deque()  # Элементы (кадр, размер кадра в байтах)
+        self._unfinished = 0  # Кадры, взятые из очереди, но еще не записанные (для join)
+        self.bytes = 0  # Байты кадров в очереди
+        self.high_water = 0  # Максимальное кол-во кадров в очереди
+        self.high_water_bytes = 0  # Максимальный размер кадров в очереди
+        self.dropped = 0  # Отброшенные кадры: новые и вытесненные старые
+        self.degraded = 0  # Кадры, уменьшенные для экономии памяти
+        self.blocked = 0.0  # Суммарное ожидание потока захвата в политике block, секунды
+        self.reclaim = None  # Вытеснение кадра кольцевого буфера приемника камеры (MotionGate.reclaim), задается FrameWriter.register
+
+    def _fits(self, size: int) -> bool:
+        return (len(self._items) < self.maxsize and (self.max_bytes <= 0 or self.bytes + size <= self.max_bytes)
+                and self.budget.fits(size))
+
+    def _reclaim(self, size: int) -> bool:
+        """
+        Освобождает память для кадра очереди, вытесняя кадры кольцевых буферов записи по движению: сначала своей камеры,
+        затем, если не хватает общего бюджета, других камер.
+
+        :return: True, если кадр теперь помещается
+        """
+        if len(self._items) >= self.maxsize:
+            return False
+        if self.reclaim is not None:
+            while not self._fits(size) and self.reclaim():
+                pass
+        for reclaim in list(self.budget.reclaimers):
+            while not self.budget.fits(size) and reclaim():
+                pass
+        return self._fits(size)
+
+    def reserve(self, size: int) -> bool:
+        """
+        Учитывает в памяти камеры и общем бюджете данные вне очереди (кольцевой буфер MotionGate).
+
+        :param size: Размер в байтах
+        :return: True, если место занято, False, если оно превысило бы ограничения памяти
+        """
+        with self._condition:
+            if (self.max_bytes > 0 and self.bytes + size > self.max_bytes) or not self.budget.fits(size):
+                return False
+            self.bytes += size
+            self.budget.used += size
+            self.high_water_bytes = max(self.high_water_bytes, self.bytes)
+            self.budget.high_water = max(self.budget.high_water, self.budget.used)
+            return True
+
+    def release(self, size: int) -> None:
+        """
+        Освобождает место, занятое reserve().
+
+        :param size: Размер в байтах
+        """
+        with self._condition:
+            self.bytes -= size
+            self.budget.used -= size
+            self._condition.notify_all()
+
+    def _append(self, item: tuple, size: int) -> bool:
+        self._items.append((item, size))
+        self._unfinished += 1
+        self.bytes += size
+        self.budget.used += size
+        self.high_water = max(self.high_water, len(self._items))
+        self.high_water_bytes = max(self.high_water_bytes, self.bytes)
+        self.budget.high_water = max(self.budget.high_water, self.budget.used)
+        return True
+
+    def _pop(self) -> tuple:
+        item, size = self._items.popleft()
+        self.bytes -= size
+        self.budget.used -= size
+        self._condition.notify_all()  # Место освободилось: будим ожидающие потоки захвата
+        return item
+
+    def put(self, frame_count: int, frame: np.ndarray, timestamp: float) -> bool:
+        """
+        Ставит кадр в очередь по политике переполнения. Вызывается потоком захвата камеры.
+
+        :param frame_count: Номер кадра
+        :param frame: Кадр
+        :param timestamp: Время захвата кадра (time.time())
+        :return: True, если кадр поставлен в очередь, False, если он отброшен
+        """
+        size = getattr(frame, 'nbytes', 0)
+        with self._condition:
+            if self._fits(size) or self._reclaim(size):
+                return self._append((frame_count, frame, timestamp), size)
+            if self.policy == 'drop_oldest':
+                while self._items and not self._fits(size):
+                    self._pop()
+                    self._unfinished -= 1  # Вытесненный кадр не будет записан
+                    self.dropped += 1
+                if self._fits(size):
+                    return self._append((frame_count, frame, timestamp), size)
+            elif self.policy == 'block':
+                start = time.monotonic()
+                self._condition.wait_for(lambda: self._fits(size), self.block_timeout)
+                self.blocked += time.monotonic() - start
+                if self._fits(size):
+                    return self._append((frame_count, frame, timestamp), size)
+            if self.policy != 'degrade' or len(self._items) >= self.maxsize:
+                self.dropped += 1
+                return False
+        # Уменьшаем кадр вне блокировки, чтобы не задерживать остальные камеры
+        for _ in range(self.DEGRADE_STEPS):
+            if not isinstance(frame, np.ndarray) or min(frame.shape[:2]) < self.DEGRADE_MIN_SIDE:
+                break
+            frame = cv2.resize(frame, (frame.shape[1] // 2, frame.shape[0] // 2), interpolation=cv2.INTER_AREA)
+            with self._condition:
+                if self._fits(frame.nbytes):
+                    self.degraded += 1
+                    return self._append((frame_count, frame, timestamp), frame.nbytes)
+        with self._condition:
+            self.dropped += 1
+        return False
+
+    def get_nowait(self) -> tuple[int, np.ndarray, float]:
+        """
+        Возвращает самый старый кадр очереди.
+
+        :return: Кортеж (номер кадра, кадр, время захвата)
+        :raises queue.Empty: Если очередь пуста
+        """
+        with self._condition:
+            if not self._items:
+                raise queue.Empty
+            return self._pop()
+
+    def task_done(self) -> None:
+        with self._condition:
+            self._unfinished -= 1
+            if self._unfinished <= 0:
+                self._condition.notify_all()
+
+    def join(self) -> None:
+        """
+        Ждет, пока все поставленные в очередь кадры будут записаны или вытеснены.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._unfinished <= 0)
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> dict:
+        """
+        :return: Словарь {'queue_depth', 'queue_bytes', 'high_water', 'high_water_bytes', 'dropped', 'degraded', 'blocked_seconds'}
+        """
+        with self._condition:
+            return {'queue_depth': len(self._items), 'queue_bytes': self.bytes, 'high_water': self.high_water,
+                    'high_water_bytes': self.high_water_bytes, 'dropped': self.dropped, 'degraded': self.degraded,
+                    'blocked_seconds': self.blocked}
+
+
+COMMIT_CHECK_INTERVAL = 0.2  # Период проверки групп файлов, ожидающих сброса на диск, в потоках пула записи (секунды)
+
+
+class FrameWriter:
+    """
+    Пул потоков для кодирования и записи кадров на диск, отделенный от цикла захвата.
+
+    Для каждой камеры создается ограниченная очередь (FrameQueue). Поток захвата только передает кадр в очередь (submit),
+    а кодирование и запись выполняют потоки пула. Очереди ограничены кол-вом кадров, памятью камеры и общим бюджетом памяти,
+    при переполнении действует политика очереди (по умолчанию кадр отбрасывается и учитывается в счетчике dropped), поэтому
+    медленный диск не останавливает захват и не расходует память без ограничения.
+    """
+
+    def __init__(self, num_threads: int = 2, queue_size: int = 32, encoder: ThreadEncoder | ProcessEncoder | None = None,
+                 recording: dict | None = None, motion: dict | None = None, metrics: PipelineMetrics | None = None,
+                 storage: StorageManager | None = None, frame_index: FrameIndex | None = None, queues: dict | None = None) -> None:
+        """
+        :param num_threads: Кол-во потоков кодирования и записи (По умолчанию 2)
+        :param queue_size: Максимальное кол-во кадров в очереди одной камеры (По умолчанию 32)
+        :param encoder: Кодировщик JPEG для приемников кадров (По умолчанию ThreadEncoder)
+        :param recording: Настройки режима записи для create_sink (По умолчанию режим jpeg)
+        :param motion: Настройки записи по движению для create_sink (По умолчанию запись всех кадров)
+        :param metrics: Реестр метрик для /metrics (По умолчанию метрики не собираются)
+        :param storage: Учет занятого места для квот хранения (По умолчанию без квот)
+        :param frame_index: Индекс кадров сессии для поиска по времени (По умолчанию без индекса)
+        :param queues: Настройки очередей: camera_mb, total_mb (0 - без ограничения), policy, block_timeout
+                       (По умолчанию без ограничения памяти с политикой drop_newest)
+        """
+        self.queue_size = max(1, queue_size)
+        self.queues = queues or {}
+        self.budget = MemoryBudget(int(self.queues.get('total_mb', 0) * 1024 * 1024))  # Общий бюджет памяти очередей камер
+        self.encoder = encoder if encoder is not None else ThreadEncoder()
+        self.recording = recording or {}
+        self.motion = motion or {}
+        if self.queues.get('policy') == 'degrade' and (self.recording.get('mode', 'jpeg') == 'segments' or self.motion.get('enabled')):
+            # Сегменты начинаются заново при смене размера кадра, а детектор движения сбрасывает фон, поэтому уменьшенные кадры
+            # под нагрузкой дробили бы запись и отключали детектор
+            logger.warning('Политика очереди degrade не поддерживается в режиме segments и при записи по движению, '
+                           'используется drop_newest')
+            self.queues = dict(self.queues, policy='drop_newest')
+        self.metrics = metrics
+        self.storage = storage
+        self.frame_index = frame_index
+        self._cameras = {}  # Состояние камер: индекс -> словарь с очередью, приемником и счетчиками
+        self._cameras_lock = threading.Lock()  # Блокировка для регистрации камер
+        self._tasks = queue.SimpleQueue()  # Общая очередь заданий: индексы камер, у которых появился кадр
+        self._next_commit = time.monotonic() + COMMIT_CHECK_INTERVAL  # Время следующей проверки групп fsync
+        self._threads = []  # Потоки пула
+        for i in range(max(1, num_threads)):
+            thread = threading.Thread(target=self._worker, name=f"FrameWriter-{i}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def create_sink(self, folder_name: str, start_count: int, fps: int,
+                    index: int | None = None) -> JpegFolderSink | SegmentSink | ArchiveSink | MotionGate:
+        """
+        Создает приемник кадров камеры с кодировщиком и режимом записи пула.
+
+        :param folder_name: Путь к папке, куда сохраняются кадры
+        :param start_count: Номер итерации программы
+        :param fps: Кол-во кадров в секунду для захвата кадров
+        :param index: Индекс камеры
+        :return: Приемник кадров
+        """
+        if self.storage is not None and index is not None:
+            # Записанные байты учитываются в квотах хранения
+            sharded = self.recording.get('mode', 'jpeg') == 'jpeg' and self.recording.get('layout', 'flat') == 'sharded'
+            self.storage.open_session(index, folder_name, start_count, sharded)
+        return create_sink(folder_name, start_count, fps, self.encoder, self.recording, self.motion, index)
+
+    def register(self, index: int, sink) -> None:
+        """
+        Регистрирует камеру и приемник, в который будут записываться ее кадры.
+
+        :param index: Индекс камеры
+        :param sink: Приемник кадров с методами write(frame_count, frame, timestamp) и close()
+        """
+        if self.metrics is not None:
+            sink.metrics = self.metrics.camera(index)  # Приемник измеряет длительность кодирования
+        if self.frame_index is not None:
+            sink.index_frame = functools.partial(self.frame_index.add, index)  # Приемник регистрирует каждый записанный кадр
+        # Ограниченная очередь кадров камеры с бюджетом памяти и политикой переполнения
+        frames = FrameQueue(self.queue_size, int(self.queues.get('camera_mb', 0) * 1024 * 1024),
+                            self.queues.get('policy', 'drop_newest'), self.budget, self.queues.get('block_timeout', 1.0))
+        if isinstance(sink, MotionGate):
+            # Кольцевой буфер кадров до движения учитывается в памяти камеры и вытесняется очередями при нехватке памяти
+            sink.queue = frames
+            frames.reclaim = sink.reclaim
+            with self.budget.condition:
+                self.budget.reclaimers.append(sink.reclaim)
+        with self._cameras_lock:
+            self._cameras[index] = {
+                'queue': frames,
+                'sink': sink,  # Приемник кадров
+                'sink_lock': threading.Lock(),  # Блокировка для приемников, требующих порядка записи
+                'stats_lock': threading.Lock(),  # Блокировка счетчиков, изменяемых потоками пула
+                'written': 0,  # Кол-во записанных кадров
+                'errors': 0,  # Кол-во ошибок записи
+                'metrics': self.metrics.camera(index) if self.metrics is not None else None,  # Метрики камеры
+                'index': index,  # Индекс камеры для учета занятого места
+                'closed': False,  # Приемник закрыт close_camera
+            }
+
+    def submit(self, index: int, frame_count: int, frame: np.ndarray, timestamp: float) -> bool:
+        """
+        Передает кадр в очередь записи. Ждет места в очереди только в политике block.
+
+        :param index: Индекс камеры
+        :param frame_count: Номер кадра
+        :param frame: Кадр для записи
+        :param timestamp: Время захвата кадра (time.time())
+        :return: True, если кадр поставлен в очередь, False, если он отброшен
+        """
+        camera = self._cameras[index]
+        if not camera['queue'].put(frame_count, frame, timestamp):
+            return False  # Кадр отброшен и учтен очередью
+        self._tasks.put(index)  # Сообщаем пулу, что у камеры появился кадр
+        return True
+
+    def _worker(self) -> None:
+        """
+        Цикл потока пула: берет кадры из очередей камер и записывает их в приемники.
+        """
+        while True:
+            self._commit_due()
+            try:
+                index = self._tasks.get(timeout=COMMIT_CHECK_INTERVAL)
+            except queue.Empty:
+                continue  # Новых кадров нет, но группу последних файлов нужно сбросить по таймеру
+            if index is None:  # Сигнал завершения потока
+                break
+            camera = self._cameras[index]
+            sink = camera['sink']
+            try:
+                if sink.ordered:
+                    # Приемники с последовательной записью обслуживаются одним потоком за раз, чтобы сохранить порядок кадров
+                    with camera['sink_lock']:
+                        frame_count, frame, timestamp = camera['queue'].get_nowait()
+                        self._write(camera, frame_count, frame, timestamp)
+                else:
+                    frame_count, frame, timestamp = camera['queue'].get_nowait()
+                    self._write(camera, frame_count, frame, timestamp)
+                camera['queue'].task_done()
+            except queue.Empty:
+                pass
+            except Exception as e:
+                logger.error(f'Непредвиденная ошибка в FrameWriter: {e}')
+
+    def _commit_due(self) -> None:
+        """
+        Раз в COMMIT_CHECK_INTERVAL секунд сбрасывает на диск группы файлов, ожидающие дольше fsync_interval (политика group).
+        Без этого последние кадры остановившейся или редко пишущей камеры ждали бы сброса до следующего кадра или закрытия.
+        """
+        now = time.monotonic()
+        with self._cameras_lock:
+            if now < self._next_commit:
+                return
+            self._next_commit = now + COMMIT_CHECK_INTERVAL  # Проверку выполняет один поток пула
+            sinks = [camera['sink'] for camera in self._cameras.values() if not camera['closed']]
+        for sink in sinks:
+            commit_due = getattr(sink, 'commit_due', None)
+            if commit_due is None:
+                continue
+            try:
+                commit_due()
+            except Exception as e:
+                logger.error(f'Ошибка сброса файлов на диск: {e}')
+
+    def _write(self, camera: dict, frame_count: int, frame: np.ndarray, timestamp: float) -> None:
+        """
+        Записывает кадр в приемник камеры и обновляет счетчики.
+        """
+        try:
+            start = time.perf_counter()
+            written = camera['sink'].write(frame_count, frame, timestamp)
+            if camera['metrics'] is not None:
+                camera['metrics'].write_latency.observe(time.perf_counter() - start)
+                camera['metrics'].bytes_written.inc(written or 0)
+            if self.storage is not None:
+                self.storage.record(camera['index'], written or 0, frame_count, timestamp)
+            with camera['stats_lock']:
+                camera['written'] += 1
+        except Exception as e:
+            with camera['stats_lock']:
+                camera['errors'] += 1
+            logger.error(f'Ошибка записи кадра {frame_count}: {e}')
+
+    def close_camera(self, index: int) -> None:
+        """
+        Дожидается записи всех кадров камеры из очереди и закрывает ее приемник. Приемник закрывается один раз:
+        повторный вызов (например, из close() после capture_and_save) ничего не делает.
+
+        :param index: Индекс камеры
+        """
+        with self._cameras_lock:
+            camera = self._cameras.get(index)
+            if camera is None or camera['closed']:
+                return
+            camera['closed'] = True
+        camera['queue'].join()  # Ждем, пока потоки пула запишут все кадры из очереди
+        try:
+            with camera['sink_lock']:
+                written = camera['sink'].close()  # SegmentSink возвращает размер последнего сегмента
+            with self.budget.condition:
+                if isinstance(camera['sink'], MotionGate) and camera['sink'].reclaim in self.budget.reclaimers:
+                    self.budget.reclaimers.remove(camera['sink'].reclaim)
+            if self.storage is not None:
+                self.storage.record(index, written or 0)
+                self.storage.close_session(index)
+        except Exception as e:
+            logger.error(f'Ошибка закрытия приемника камеры {index + 1}: {e}')
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики по каждой камере.
+
+        :return: Словарь индекс камеры -> {'queue_depth', 'queue_bytes', 'high_water', 'high_water_bytes', 'dropped', 'degraded',
+                 'blocked_seconds', 'written', 'errors'}
+        """
+        with self._cameras_lock:
+            cameras = dict(self._cameras)
+        return {
+            index: dict(camera['queue'].stats(), written=camera['written'], errors=camera['errors'])
+            for index, camera in cameras.items()
+        }
+
+    def close(self) -> None:
+        """
+        Дописывает оставшиеся кадры, закрывает приемники всех камер и останавливает потоки пула.
+        """
+        with self._cameras_lock:
+            indices = list(self._cameras)
+        for index in indices:
+            self.close_camera(index)
+        for _ in self._threads:
+            self._tasks.put(None)  # Отправляем сигнал завершения каждому потоку
+        for thread in self._threads:
+            thread.join()
+        self.encoder.close()  # Останавливаем кодировщик после записи последних кадров
+        for index, camera_stats in self.stats().items():
+            logger.info(f"Камера {index + 1}: записано {camera_stats['written']}, отброшено {camera_stats['dropped']}, "
+                        f"уменьшено {camera_stats['degraded']}, ошибок записи {camera_stats['errors']}, максимум очереди "
+                        f"{camera_stats['high_water']} кадров ({camera_stats['high_water_bytes'] / 1024 ** 2:.1f} МБ)")
+        budget = self.budget.stats()
+        logger.info(f"Память очередей записи: максимум {budget['high_water'] / 1024 ** 2:.1f} МБ")
+
+
+class FramePacer:
+    """
+    Планировщик темпа захвата камеры по монотонным дедлайнам.
+
+    Дедлайн i-го кадра равен start + i / fps, поэтому ошибка сна не накапливается. Если кадр не уложился в период, поведение
+    задается политикой:
+        ⦁ drop - пропущенные слоты отбрасываются, следующий кадр ждет ближайший слот исходной сетки (фаза сохраняется);
+        ⦁ catchup - пропущенные слоты догоняются кадрами без паузы, но не более max_burst подряд, затем сетка сдвигается;
+        ⦁ latest - сетка начинается заново от текущего момента, следующий кадр берется через один период.
+    Для контроля реального темпа собираются достигнутый FPS и гистограмма отклонений интервала между кадрами от периода (джиттер).
+    """
+    POLICIES = ('drop', 'catchup', 'latest')
+    JITTER_BINS_MS = (1, 2, 5, 10, 20, 50)  # Верхние границы интервалов гистограммы джиттера, мс
+
+    def __init__(self, fps: float, policy: str = 'drop', max_burst: int = 3) -> None:
+        """
+        :param fps: Требуемое кол-во кадров в секунду. При fps <= 0 пауза между кадрами не выполняется
+        :param policy: Политика при опоздании: drop, catchup или latest (По умолчанию drop)
+        :param max_burst: Максимальное кол-во кадров подряд без паузы в политике catchup (По умолчанию 3)
+        """
+        if policy not in self.POLICIES:
+            logger.warning(f'Неизвестная политика темпа "{policy}", используется drop')
+            policy = 'drop'
+        self.period = 1 / fps if fps > 0 else 0.0
+        self.policy = policy
+        self.max_burst = max_burst
+        self.deadline = None  # Время следующего кадра по time.monotonic()
+        self._burst = 0  # Кол-во кадров подряд без паузы
+        self._first_tick = None
+        self._last_tick = None
+        self.ticks = 0  # Кол-во выданных кадров
+        self.missed = 0  # Кол-во пропущенных слотов
+        self.jitter_sum = 0.0
+        self.jitter_max = 0.0
+        self.jitter_hist = [0] * (len(self.JITTER_BINS_MS) + 1)
+
+    def wait(self) -> int:
+        """
+        Ждет дедлайна следующего кадра и отмечает момент его выдачи.
+
+        :return: Кол-во слотов, пропущенных из-за опоздания
+        """
+        now = time.monotonic()
+        if self.deadline is None:
+            self.deadline = now  # Первый кадр выдается сразу
+        missed = 0
+        if self.period > 0:
+            lag = now - self.deadline
+            if lag >= self.period:
+                # Опоздали больше чем на период
+                if self.policy == 'drop':
+                    missed = int(lag // self.period)
+                    self.deadline += missed * self.period
+                elif self.policy == 'latest':
+                    missed = int(lag // self.period)
+                    self.deadline = now
+                elif self._burst >= self.max_burst:
+                    missed = int(lag // self.period)  # Догнать не удалось, сдвигаем сетку
+                    self.deadline = now
+            if self.deadline > now:
+                time.sleep(self.deadline - now)
+                self._burst = 0
+            elif self.deadline < now:
+                self._burst += 1  # Кадр выдается с опозданием, без паузы
+            else:
+                self._burst = 0
+            self.deadline += self.period
+        self.missed += missed
+        self._record(time.monotonic())
+        return missed
+
+    def _record(self, tick: float) -> None:
+        """
+        Учитывает интервал между кадрами в статистике джиттера.
+        """
+        if self._last_tick is not None and self.period > 0:
+            jitter_ms = abs(tick - self._last_tick - self.period) * 1000
+            self.jitter_sum += jitter_ms
+            self.jitter_max = max(self.jitter_max, jitter_ms)
+            self.jitter_hist[bisect.bisect_left(self.JITTER_BINS_MS, jitter_ms)] += 1
+        if self._first_tick is None:
+            self._first_tick = tick
+        self._last_tick = tick
+        self.ticks += 1
+
+    def stats(self) -> dict:
+        """
+        Возвращает статистику темпа захвата.
+
+        :return: Словарь: ticks, achieved_fps, missed, jitter_avg_ms, jitter_max_ms, jitter_hist (интервал -> кол-во кадров)
+        """
+        intervals = self.ticks - 1
+        duration = self._last_tick - self._first_tick if intervals > 0 else 0.0
+        labels = [f'<{bound}ms' for bound in self.JITTER_BINS_MS] + [f'>={self.JITTER_BINS_MS[-1]}ms']
+        return {'ticks': self.ticks,
+                'achieved_fps': intervals / duration if duration > 0 else 0.0,
+                'missed': self.missed,
+                'jitter_avg_ms': self.jitter_sum / intervals if intervals > 0 and self.period > 0 else 0.0,
+                'jitter_max_ms': self.jitter_max,
+                'jitter_hist': dict(zip(labels, self.jitter_hist))}
+
+
+class RateAdapter:
+    """
+    Приводит частоту кадров камеры к требуемому FPS без декодирования лишних кадров.
+
+    Камера присылает кадры со своей частотой (IP-камеры - 25-30 кадров в секунду), а записывается fps кадров в секунду. Вместо
+    cap.read() с декодированием каждого кадра и последующей паузы адаптер вызывает cap.grab() для каждого кадра, вычитывая поток
+    и не давая кадрам копиться в буфере бэкенда, и cap.retrieve() (декодирование) только для кадров, попадающих в сетку fps.
+    Процессорное время декодирования замеряется (time.thread_time()), по нему оценивается сэкономленное время для пропущенных
+    кадров. Поддерживает интерфейс cv2.VideoCapture: read(), grab(), retrieve(), isOpened(), release().
+    """
+
+    def __init__(self, cap: cv2.VideoCapture, index: int, fps: float) -> None:
+        """
+        :param cap: Открытая камера
+        :param index: Индекс камеры
+        :param fps: Требуемое кол-во кадров в секунду. При fps <= 0 декодируется каждый кадр
+        """
+        self.cap = cap
+        self.index = index
+        self.period = 1 / fps if fps > 0 else 0.0
+        self._next = None  # Время следующего сохраняемого кадра по time.monotonic()
+        self.grabbed = 0  # Кол-во кадров, полученных от камеры
+        self.decoded = 0  # Кол-во декодированных кадров
+        self.decode_cpu = 0.0  # Процессорное время декодирования, секунды
+
+    def _due(self) -> bool:
+        """
+        Проверяет, попадает ли полученный кадр в сетку fps, и сдвигает сетку.
+        """
+        if self.period <= 0:
+            return True
+        now = time.monotonic()
+        if self._next is None:
+            self._next = now  # Первый кадр сохраняется сразу
+        if now < self._next:
+            return False
+        # Сетка сохраняет фазу, а после долгой паузы камеры начинается заново, чтобы не сохранять кадры пачкой
+        self._next = self._next + self.period if now - self._next < self.period else now + self.period
+        return True
+
+    def grab(self) -> bool:
+        if not self.cap.grab():
+            return False
+        self.grabbed += 1
+        return True
+
+    def retrieve(self) -> tuple[bool, np.ndarray | None]:
+        cpu_start = time.thread_time()
+        ret, frame = self.cap.retrieve()
+        self.decode_cpu += time.thread_time() - cpu_start
+        if ret:
+            self.decoded += 1
+        return ret, frame
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        """
+        Пропускает кадры камеры без декодирования до следующего слота сетки fps и декодирует кадр этого слота.
+
+        :return: Кортеж (ret, кадр), как cv2.VideoCapture.read(). ret равен False, если камера не вернула кадр
+        """
+        while True:
+            if not self.grab():
+                return False, None
+            if self._due():
+                return self.retrieve()
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики кадров и сэкономленного времени декодирования.
+
+        :return: Словарь {'grabbed', 'decoded', 'skipped', 'decode_cpu', 'decode_cpu_saved'} (время в секундах процессора)
+        """
+        skipped = max(self.grabbed - self.decoded, 0)
+        average = self.decode_cpu / self.decoded if self.decoded else 0.0
+        return {
+            'grabbed': self.grabbed,
+            'decoded': self.decoded,
+            'skipped': skipped,
+            'decode_cpu': self.decode_cpu,
+            'decode_cpu_saved': skipped * average,
+        }
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def get(self, prop: int) -> float:
+        return self.cap.get(prop)
+
+    def release(self) -> None:
+        """
+        Освобождает камеру и записывает в лог статистику пропуска декодирования.
+        """
+        self.cap.release()
+        stats = self.stats()
+        logger.info(f"Камера {self.index + 1}: получено {stats['grabbed']}, декодировано {stats['decoded']}, "
+                    f"пропущено без декодирования {stats['skipped']}, сэкономлено {stats['decode_cpu_saved']:.1f} с "
+                    f"процессорного времени декодирования")
+
+
+def find_rate_adapter(cap) -> RateAdapter | None:
+    """
+    Находит RateAdapter среди оберток камеры (CameraSupervisor -> LatestFrameGrabber -> RateAdapter).
+
+    :param cap: Камера или ее обертка
+    :return: RateAdapter или None, если декодируется каждый кадр
+    """
+    while cap is not None and not isinstance(cap, RateAdapter):
+        if isinstance(cap, CameraSupervisor):
+            cap = cap._grabber
+        elif isinstance(cap, LatestFrameGrabber):
+            cap = cap.cap
+        else:
+            return None
+    return cap
+
+
+class LatestFrameGrabber:
+    """
+    Непрерывно читает поток камеры в отдельном потоке и хранит только последний кадр (слот последнего кадра).
+
+    Буфер декодера не накапливает старые кадры, даже если бэкенд игнорирует CAP_PROP_BUFFERSIZE, поэтому потребители
+    получают актуальный кадр со своей частотой. Каждому кадру присваивается номер и время захвата, по которым
+    измеряется задержка от захвата до использования кадра. Поддерживает интерфейс cv2.VideoCapture: read(), isOpened(), release().
+    Если задан fps, поток чтения декодирует только кадры, попадающие в сетку fps (RateAdapter), остальные пропускает через grab().
+    """
+
+    def __init__(self, cap: cv2.VideoCapture, index: int, read_timeout: float = 1.0, fps: float = 0) -> None:
+        """
+        :param cap: Открытая камера
+        :param index: Индекс камеры
+        :param read_timeout: Сколько секунд read() ждет новый кадр (По умолчанию 1.0)
+        :param fps: Частота декодируемых кадров. При fps <= 0 декодируется каждый кадр (По умолчанию 0)
+        """
+        self.cap = RateAdapter(cap, index, fps) if fps > 0 else cap
+        self.index = index
+        self.read_timeout = read_timeout
+        self._condition = threading.Condition()  # Оповещает потребителей о новом кадре
+        self._stop = threading.Event()
+        self._thread = None
+        self._seq = 0  # Номер последнего захваченного кадра (0 - кадров еще не было)
+        self._ret = False
+        self._frame = None
+        self._timestamp = 0.0
+        self._last_read_seq = 0  # Номер кадра, возвращенного последним вызовом read()
+        self.last_timestamp = 0.0  # Время захвата кадра, возвращенного последним вызовом read()
+        self.consumed = 0  # Кол-во кадров, выданных потребителю
+        self.skipped = 0  # Кол-во кадров, перезаписанных в слоте до того, как их забрал потребитель
+        self.latency_total = 0.0  # Суммарная задержка от захвата до выдачи кадра, секунды
+        self.latency_max = 0.0  # Максимальная задержка от захвата до выдачи кадра, секунды
+
+    def start(self) -> 'LatestFrameGrabber':
+        """
+        Запускает поток чтения камеры.
+
+        :return: Сам объект, чтобы использовать его вместо камеры
+        """
+        self._thread = threading.Thread(target=self._run, name=f"Grabber-{self.index + 1}", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        """
+        Цикл потока чтения: забирает кадры из камеры без пауз и кладет последний в слот.
+        """
+        try:
+            while not self._stop.is_set():
+                ret, frame = self.cap.read()
+                timestamp = time.time()
+                with self._condition:
+                    self._seq += 1
+                    self._ret, self._frame, self._timestamp = ret, frame, timestamp
+                    self._condition.notify_all()
+                if not ret:
+                    time.sleep(0.01)  # Камера не отдает кадры, не занимаем процессор пустым циклом
+        except Exception as e:
+            logger.error(f'Непредвиденная ошибка в LatestFrameGrabber камеры {self.index + 1}: {e}')
+        finally:
+            # Камеру освобождает только поток чтения: release() из другого потока во время cap.read() может аварийно
+            # завершить процесс в бэкенде FFMPEG
+            self.cap.release()
+
+    def latest(self, after_seq: int = 0, timeout: float | None = None) -> tuple[int, float, bool, np.ndarray | None]:
+        """
+        Возвращает последний кадр, ожидая появления кадра новее after_seq.
+
+        :param after_seq: Номер уже полученного кадра (По умолчанию 0)
+        :param timeout: Максимальное время ожидания в секундах (По умолчанию read_timeout)
+        :return: Кортеж (номер кадра, время захвата, ret, кадр). Номер не меняется, если новый кадр не появился за timeout
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq > after_seq or self._stop.is_set(),
+                                     self.read_timeout if timeout is None else timeout)
+            return self._seq, self._timestamp, self._ret, self._frame
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        """
+        Возвращает последний кадр, который еще не выдавался, как cv2.VideoCapture.read().
+
+        :return: Кортеж (ret, кадр). ret равен False, если нового кадра не было в течение read_timeout
+        """
+        seq, timestamp, ret, frame = self.latest(self._last_read_seq)
+        if seq == self._last_read_seq:
+            return False, None  # Камера не прислала новый кадр
+        self.skipped += seq - self._last_read_seq - 1
+        self._last_read_seq = seq
+        self.last_timestamp = timestamp
+        if ret:
+            latency = time.time() - timestamp
+            self.consumed += 1
+            self.latency_total += latency
+            self.latency_max = max(self.latency_max, latency)
+        return ret, frame
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики захвата и задержки.
+
+        :return: Словарь {'grabbed', 'consumed', 'skipped', 'latency_avg', 'latency_max'} (задержки в секундах)
+        """
+        return {
+            'grabbed': self._seq,
+            'consumed': self.consumed,
+            'skipped': self.skipped,
+            'latency_avg': self.latency_total / self.consumed if self.consumed else 0.0,
+            'latency_max': self.latency_max,
+        }
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def release(self) -> None:
+        """
+        Останавливает поток чтения, который освобождает камеру при выходе. Если поток завис в cap.read(), камера
+        оставляется ему и освобождается, когда чтение завершится.
+        """
+        self._stop.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is None:
+            self.cap.release()  # Поток чтения не запускался
+        else:
+            self._thread.join(timeout=self.read_timeout + 1)
+            if self._thread.is_alive():
+                logger.warning(f'Камера {self.index + 1}: чтение кадра зависло, камера будет освобождена после его завершения')
+        stats = self.stats()
+        logger.info(f"Камера {self.index + 1}: захвачено {stats['grabbed']}, использовано {stats['consumed']}, "
+                    f"пропущено {stats['skipped']}, задержка средняя {stats['latency_avg'] * 1000:.1f} мс, "
+                    f"максимальная {stats['latency_max'] * 1000:.1f} мс")
+
+
+def capture_and_save(cap: cv2.VideoCapture(), folder_name: str, fps: int, index: int, start_count: int, stop_event: threading.Event(),
+                     writer: FrameWriter | None = None, display: PreviewCompositor | NullDisplay | None = None, pacing: str = 'drop',
+                     tracer: Tracer | None = None) -> None:
+    """
+    Захватывает и сохраняет кадры с камеры в JPG-файлы, отображая видеопоток с подсчетом и отображением реального FPS, пока не получит сигнал остановки.
+
+    :param cap: Камера, с которой захватывается изображение
+    :param folder_name: Путь к папке, куда сохраняются кадры
+    :param fps: Кол-во кадров в секунду для захвата кадров
+    :param index: Индекс камеры, с которой захватывается изображение
+    :param start_count: Номер итерации программы
+    :param stop_event: Ивент-флаг для отслеживания работы программы
+    :param writer: Пул записи кадров. Если не задан, кадры сохраняются прямо в цикле захвата
+    :param display: Общее окно предпросмотра. Если не задано, кадры показываются в отдельном окне камеры
+    :param pacing: Политика FramePacer при опоздании кадра: drop, catchup или latest (По умолчанию drop)
+    :param tracer: Трассировка этапов обработки кадра (По умолчанию без трассировки)
+    """
+    try:
+        if writer is not None:
+            # Регистрируем камеру в пуле записи, папка создается приемником
+            writer.register(index, writer.create_sink(folder_name, start_count, fps, index))
+        else:
+            # Создаем папку для сохранения кадров, если она не существует
+            os.makedirs(folder_name, exist_ok=True)
+
+        frame_count = 0  # Счетчик кадров
+        start_time = time.perf_counter()  # Запоминаем время начала захвата
+        # Планировщик темпа захвата по дедлайнам. RateAdapter сам выдерживает темп, вычитывая кадры камеры, поэтому пауза не нужна:
+        # во время паузы кадры копились бы в буфере бэкенда
+        pacer = FramePacer(0 if isinstance(cap, RateAdapter) else fps, pacing)
+        # Метрики камеры для /metrics: только счетчики без блокировок, без записи в лог
+        metrics = writer.metrics.camera(index) if writer is not None and writer.metrics is not None else None
+        if metrics is not None:
+            metrics.capture = cap
+        iteration = 0  # Номер итерации цикла, по нему выбираются итерации для трассировки
+
+        # Запускаем цикл, пока не получен сигнал остановки
+        while not stop_event.is_set():
+            traced = tracer is not None and tracer.sampled(iteration)  # Записывать ли этапы этой итерации
+            iteration += 1
+            read_start = time.perf_counter() if metrics is not None or traced else 0.0
+            ret, frame = cap.read()  # Захватываем кадр с камеры
+            if metrics is not None:
+                metrics.read_latency.observe(time.perf_counter() - read_start)
+                if ret:
+                    metrics.captured.inc()
+            if traced:
+                tracer.span('read', index, read_start, frame=frame_count, ok=bool(ret))
+            if isinstance(cap, (LatestFrameGrabber, CameraSupervisor)):
+                if not ret:
+                    continue  # Новый кадр не пришел за время ожидания, повторяем чтение
+                timestamp = cap.last_timestamp  # Время захвата кадра потоком чтения
+            else:
+                if not ret:
+                    pacer.wait()  # Камера не вернула кадр, пропускаем слот, не сохраняя пустой кадр
+                    continue
+                timestamp = time.time()
+
+            stage_start = time.perf_counter() if traced else 0.0
+            if writer is not None:
+                if ret:
+                    # Передаем кадр в пул записи, не дожидаясь кодирования и записи на диск
+                    writer.submit(index, frame_count, frame, timestamp)
+                    if display is None:
+                        frame = frame.copy()  # Надпись FPS рисуем на копии, чтобы не испортить кадр в очереди
+            else:
+                # Формируем имя файла для сохранения кадра
+                filename = os.path.join(folder_name, f"{start_count} frame_{frame_count}.jpg")
+                cv2.imwrite(filename, frame)  # Сохраняем кадр в файл
+            if traced:
+                # С пулом записи этап - только передача кадра в очередь, без пула - кодирование и запись cv2.imwrite
+                tracer.span('submit' if writer is not None else 'imwrite', index, stage_start, frame=frame_count)
+            frame_count += 1  # Увеличиваем счетчик кадров
+
+            # Вычисляем время, прошедшее с начала захвата
+            elapsed_time = time.perf_counter() - start_time
+            if elapsed_time > 0:
+                # Вычисляем реальный FPS
+                real_fps = frame_count // elapsed_time
+            else:
+                real_fps = 0  # Если прошло ноль времени, FPS равен 0
+
+            stage_start = time.perf_counter() if traced else 0.0
+            if display is not None:
+                # Передаем кадр в общее окно, отрисовка выполняется потоком отображения
+                display.update(index, frame, real_fps)
+            else:
+                # Отображаем реальный FPS на кадре
+                cv2.putText(frame, str(int(real_fps)), (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+                cv2.imshow(f"Camera {index + 1}", frame)  # Показываем кадр в окне
+                position_window(f"Camera {index + 1}", index)  # Позиционируем окно на экране
+                cv2.waitKey(1)  # Ждем одну миллисекунду для обработки событий окна
+            if traced:
+                tracer.span('display', index, stage_start, frame=frame_count - 1)
+                stage_start = time.perf_counter()
+
+            # Ждем дедлайна следующего кадра, чтобы соблюсти нужный FPS
+            missed = pacer.wait()
+            if traced:
+                tracer.span('pacing', index, stage_start, frame=frame_count - 1, missed=missed)
+                tracer.span('frame', index, read_start, frame=frame_count - 1)  # Вся итерация от чтения до следующего кадра
+
+        cap.release()  # Освобождаем ресурсы камеры
+        stats = pacer.stats()
+        logger.info(f"Камера {index + 1}: достигнутый FPS {stats['achieved_fps']:.1f} из {fps}, пропущено слотов {stats['missed']}, "
+                    f"джиттер средний {stats['jitter_avg_ms']:.1f} мс, максимальный {stats['jitter_max_ms']:.1f} мс, "
+                    f"гистограмма {stats['jitter_hist']}")
+        if writer is not None:
+            writer.close_camera(index)  # Дожидаемся записи оставшихся кадров камеры
+    except Exception as e:
+        # Логируем непредвиденные ошибки, возникшие в процессе выполнения функции
+        logger.error(f'Непредвиденная ошибка в capture_and_save: {e}')
+
+
+SYNTHETIC_PREFIX = 'synthetic://'  # Источник кадров без камеры: "synthetic://?fps=30" или "synthetic://video.mp4?fps=15"
+
+
+class SyntheticCapture:
+    """
+    Имитация камеры для бенчмарков и проверки без оборудования. Поддерживает интерфейс cv2.VideoCapture: read(), grab(), retrieve(),
+    isOpened(), release(), set(), get().
+
+    Кадры выдаются с заданной частотой, как у настоящей камеры: grab() ждет время следующего кадра. Если задан video_path, кадры
+    берутся из видеофайла по кругу, иначе генерируется сдвигающееся градиентное изображение (каждый кадр - новый массив, кадры
+    различаются, поэтому кодирование и детектор движения работают как с реальной сценой).
+    """
+
+    def __init__(self, width: int = 640, height: int = 480, fps: float = 30, video_path: str | None = None) -> None:
+        """
+        :param width: Ширина кадра (По умолчанию 640)
+        :param height: Высота кадра (По умолчанию 480)
+        :param fps: Частота кадров, 0 - без ожидания (По умолчанию 30)
+        :param video_path: Путь к видеофайлу для воспроизведения (По умолчанию генерируемое изображение)
+        """
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.video_path = video_path
+        self._video = cv2.VideoCapture(video_path) if video_path else None
+        self._opened = self._video.isOpened() if self._video is not None else True
+        self._base = None  # Генерируемое изображение текущего размера
+        self._frame = None  # Кадр, захваченный последним вызовом grab()
+        self._next = None  # Время следующего кадра по time.monotonic()
+        self.frames = 0  # Кол-во выданных кадров
+
+    @classmethod
+    def from_url(cls, url: str, width: int = 640, height: int = 480) -> 'SyntheticCapture':
+        """
+        Создает источник по адресу вида "synthetic://[путь к видеофайлу][?fps=N]".
+
+        :param url: Адрес источника
+        :param width: Ширина кадра
+        :param height: Высота кадра
+        :return: Источник кадров
+        """
+        path, _, query = url[len(SYNTHETIC_PREFIX):].partition('?')
+        options = dict(option.partition('=')[::2] for option in query.split('&') if option)
+        return cls(width, height, float(options.get('fps', 30)), path or None)
+
+    def _generate(self) -> np.ndarray:
+        if self._base is None or self._base.shape[:2] != (self.height, self.width):
+            # Градиент по горизонтали и вертикали, чтобы кадр сжимался в JPEG как обычное изображение, а не как однотонное
+            x = np.linspace(0, 255, self.width, dtype=np.float32)
+            y = np.linspace(0, 255, self.height, dtype=np.float32)[:, None]
+            self._base = np.dstack([(x + y) / 2, np.broadcast_to(x, (self.height, self.width)),
+                                    np.broadcast_to(y, (self.height, self.width))]).astype(np.uint8)
+        return np.roll(self._base, (self.frames * 8) % self.width, axis=1)  # Сдвиг имитирует движение в кадре
+
+    def grab(self) -> bool:
+        if not self._opened:
+            return False
+        if self.fps > 0:
+            now = time.monotonic()
+            if self._next is None:
+                self._next = now
+            if self._next > now:
+                time.sleep(self._next - now)
+            self._next = max(self._next, now - 1 / self.fps) + 1 / self.fps  # Камера не выдает накопившиеся кадры пачкой
+        if self._video is not None:
+            ret, frame = self._video.read()
+            if not ret:
+                self._video.set(cv2.CAP_PROP_POS_FRAMES, 0)  # Воспроизводим файл по кругу
+                ret, frame = self._video.read()
+                if not ret:
+                    return False
+            if frame.shape[:2] != (self.height, self.width):
+                frame = cv2.resize(frame, (self.width, self.height))
+        else:
+            frame = self._generate()
+        self._frame = frame
+        self.frames += 1
+        return True
+
+    def retrieve(self) -> tuple[bool, np.ndarray | None]:
+        return self._frame is not None, self._frame
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def set(self, prop: int, value: float) -> bool:
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self.width = int(value)
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self.height = int(value)
+        elif prop == cv2.CAP_PROP_FPS:
+            self.fps = float(value)
+        return True
+
+    def get(self, prop: int) -> float:
+        return {cv2.CAP_PROP_FRAME_WIDTH: self.width, cv2.CAP_PROP_FRAME_HEIGHT: self.height, cv2.CAP_PROP_FPS: self.fps}.get(prop, 0.0)
+
+    def release(self) -> None:
+        self._opened = False
+        if self._video is not None:
+            self._video.release()
+
+
+def open_camera(ip: str | int, width: int, height: int) -> cv2.VideoCapture:
+    """
+    Открывает камеру с бэкендом, подходящим для операционной системы, и настраивает параметры захвата.
+
+    :param ip: IP камеры, индекс USB-камеры или адрес имитации камеры "synthetic://..." (SyntheticCapture)
+    :param width: Ширина кадра для захвата
+    :param height: Высота кадра для захвата
+    :return: Открытая камера
+    """
+    # Настраиваем видеозахват в зависимости от операционной системы
+    if isinstance(ip, str) and ip.startswith(SYNTHETIC_PREFIX):
+        cap = SyntheticCapture.from_url(ip, width, height)  # Имитация камеры для бенчмарков
+    elif platform.system() == 'Windows':
+        cap = cv2.VideoCapture(ip, cv2.CAP_DSHOW)  # Используем DSHOW для Windows
+    else:
+        cap = cv2.VideoCapture(ip)  # Используем общий видеозахват для других ОС
+
+    # Настраиваем параметры захвата
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Устанавливаем размер буфера
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)  # Устанавливаем ширину кадра
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)  # Устанавливаем высоту кадра
+    return cap
+
+
+def probe_camera(ip: str | int, width: int, height: int, index: int, timeout: float = 10) -> tuple[dict, cv2.VideoCapture | None]:
+    """
+    Открывает камеру и ждет первый кадр не дольше timeout секунд.
+
+    Открытие выполняется в отдельном потоке, поэтому зависший cv2.VideoCapture или grab() не задерживает программу дольше timeout.
+    Если камера ответила уже после таймаута, она освобождается в потоке проверки.
+
+    :param ip: IP камеры или индекс USB-камеры
+    :param width: Ширина кадра для захвата
+    :param height: Высота кадра для захвата
+    :param index: Индекс камеры
+    :param timeout: Максимальное время открытия камеры и получения первого кадра в секундах (По умолчанию 10)
+    :return: Кортеж (отчет о готовности, открытая камера или None). Отчет - словарь {'index', 'source', 'ready', 'open_latency',
+        'first_frame_latency', 'width', 'height', 'fps', 'error'} (задержки в секундах)
+    """
+    report = {'index': index, 'source': ip, 'ready': False, 'open_latency': None, 'first_frame_latency': None,
+              'width': 0, 'height': 0, 'fps': 0.0, 'error': ''}
+    result = {'cap': None, 'abandoned': False}
+    result_lock = threading.Lock()  # Защищает решение о том, кто освобождает камеру: вызывающий поток или поток проверки
+
+    def probe() -> None:
+        cap = None
+        start = time.monotonic()
+        try:
+            cap = open_camera(ip, width, height)
+            report['open_latency'] = time.monotonic() - start
+            if cap.grab():
+                report['first_frame_latency'] = time.monotonic() - start
+                # Параметры, которые камера установила на самом деле
+                report['width'] = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                report['height'] = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+                report['fps'] = float(cap.get(cv2.CAP_PROP_FPS))
+                report['ready'] = True
+            else:
+                report['error'] = 'камера не прислала кадр'
+        except Exception as e:
+            report['error'] = str(e)
+            logger.error(f"Исключение при настройке соединения для камеры {index + 1}: {e}")
+        with result_lock:
+            if cap is not None and (result['abandoned'] or not report['ready']):
+                cap.release()  # Камера не нужна: не прислала кадр или ответила после таймаута
+            else:
+                result['cap'] = cap
+
+    thread = threading.Thread(target=probe, name=f"Probe-{index + 1}", daemon=True)
+    thread.start()
+    thread.join(timeout)
+    with result_lock:
+        summary = dict(report)  # Копия отчета: поток проверки может дописать исходный отчет после таймаута
+        if thread.is_alive():
+            result['abandoned'] = True
+            summary.update(ready=False, error=f'нет ответа за {timeout} с')
+        cap = result['cap']
+    if summary['ready']:
+        logger.debug(f"Камера {index + 1}: открыта за {summary['open_latency']:.2f} с, первый кадр через "
+                     f"{summary['first_frame_latency']:.2f} с, {summary['width']}x{summary['height']}, {summary['fps']:.0f} FPS")
+    else:
+        logger.warning(f"Камера {index + 1} не готова: {summary['error']}")
+    return summary, cap
+
+
+def probe_cameras(sources: list, width: int | list[int], height: int | list[int], indices: list[int],
+                  timeout: float = 10) -> list[tuple[dict, cv2.VideoCapture | None]]:
+    """
+    Проверяет все камеры одновременно, поэтому общее время проверки не превышает timeout независимо от кол-ва недоступных камер.
+
+    :param sources: IP камер или индексы USB-камер
+    :param width: Ширина кадра для захвата, общая или список для каждой камеры
+    :param height: Высота кадра для захвата, общая или список для каждой камеры
+    :param indices: Индексы камер
+    :param timeout: Максимальное время проверки одной камеры в секундах (По умолчанию 10)
+    :return: Список кортежей (отчет о готовности, открытая камера или None) в порядке sources
+    """
+    results = [({'index': index, 'source': source, 'ready': False, 'error': 'проверка не выполнена'}, None)
+               for source, index in zip(sources, indices)]
+
+    widths = width if isinstance(width, list) else [width] * len(sources)
+    heights = height if isinstance(height, list) else [height] * len(sources)
+
+    def run(position: int, source: str | int, index: int) -> None:
+        results[position] = probe_camera(source, widths[position], heights[position], index, timeout)
+
+    probes = [threading.Thread(target=run, args=(position, source, index), name=f"Probe-run-{index + 1}")
+              for position, (source, index) in enumerate(zip(sources, indices))]
+    for probe in probes:
+        probe.start()
+    for probe in probes:
+        probe.join()
+
+    ready = sum(report['ready'] for report, _ in results)
+    logger.info(f'Проверка камер: готово {ready} из {len(results)}')
+    return results
+
+
+class CameraSupervisor:
+    """
+    Следит за камерой во время записи и восстанавливает соединение без участия пользователя.
+
+    Кадры читаются через LatestFrameGrabber, поэтому зависший cap.read() не блокирует поток захвата. Если за read_timeout
+    секунд не пришло ни одного кадра (камера отключилась или зависла), камера закрывается и открывается заново с экспоненциальной
+    задержкой между попытками (backoff_initial, 2 * backoff_initial, ... до backoff_max). Каждая камера восстанавливается в своем
+    потоке и не влияет на остальные. Поддерживает интерфейс cv2.VideoCapture: read(), isOpened(), release().
+    """
+
+    def __init__(self, ip: str | int, width: int, height: int, index: int, read_timeout: float = 10,
+                 backoff_initial: float = 1.0, backoff_max: float = 30.0, stop_event: threading.Event = stop_event,
+                 fps: float = 0) -> None:
+        """
+        :param ip: IP камеры или индекс USB-камеры
+        :param width: Ширина кадра для захвата
+        :param height: Высота кадра для захвата
+        :param index: Индекс камеры
+        :param read_timeout: Сколько секунд без кадров считается потерей камеры (По умолчанию 10)
+        :param backoff_initial: Задержка перед первой повторной попыткой подключения в секундах (По умолчанию 1.0)
+        :param backoff_max: Максимальная задержка между попытками подключения в секундах (По умолчанию 30.0)
+        :param stop_event: Ивент-флаг для отслеживания работы программы, прерывает ожидание между попытками
+        :param fps: Частота декодируемых кадров, передаваемая в LatestFrameGrabber (По умолчанию 0 - декодируется каждый кадр)
+        """
+        self.ip = ip
+        self.width = width
+        self.height = height
+        self.index = index
+        self.read_timeout = read_timeout
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.stop_event = stop_event
+        self.fps = fps
+        self._grabber = None  # Текущее соединение с камерой
+        self._last_frame = 0.0  # Время последнего полученного кадра по time.monotonic()
+        self._outage_start = None  # Начало текущего отключения
+        self.last_timestamp = 0.0  # Время захвата кадра, возвращенного последним вызовом read()
+        self.reconnects = 0  # Кол-во успешных переподключений
+        self.outages = 0  # Кол-во отключений камеры
+        self.outage_total = 0.0  # Суммарная длительность отключений, секунды
+        self.outage_max = 0.0  # Максимальная длительность отключения, секунды
+
+    def start(self, cap: cv2.VideoCapture) -> 'CameraSupervisor':
+        """
+        Начинает наблюдение за уже открытой камерой.
+
+        :param cap: Открытая камера
+        :return: Сам объект, чтобы использовать его вместо камеры
+        """
+        self._attach(cap)
+        return self
+
+    def _attach(self, cap: cv2.VideoCapture) -> None:
+        # Ждем кадр не дольше таймаута наблюдения, чтобы вовремя заметить зависание
+        self._grabber = LatestFrameGrabber(cap, self.index, min(1.0, self.read_timeout), self.fps).start()
+        self._last_frame = time.monotonic()
+
+    def _detach(self) -> None:
+        """
+        Закрывает зависшую камеру и начинает отсчет отключения.
+        """
+        logger.warning(f'Камера {self.index + 1} не присылает кадры {self.read_timeout} с, переподключение')
+        grabber, self._grabber = self._grabber, None
+        grabber.release()
+        self._outage_start = time.monotonic()
+        self.outages += 1
+
+    def _reconnect(self) -> bool:
+        """
+        Открывает камеру заново, увеличивая задержку между неудачными попытками.
+
+        :return: True, если камера подключена, False, если получен сигнал остановки
+        """
+        delay = self.backoff_initial
+        while not self.stop_event.is_set():
+            # Открытие и первый кадр ждем не дольше read_timeout: зависшая камера не блокирует поток захвата и сигнал остановки
+            report, cap = probe_camera(self.ip, self.width, self.height, self.index, self.read_timeout)
+            if report['ready'] and cap is not None:
+                self._attach(cap)
+                self.reconnects += 1
+                outage = time.monotonic() - self._outage_start
+                self._outage_start = None
+                self.outage_total += outage
+                self.outage_max = max(self.outage_max, outage)
+                logger.info(f'Камера {self.index + 1} переподключена, отключение длилось {outage:.1f} с')
+                return True
+            logger.warning(f'Не удалось переподключиться к камере {self.index + 1}, повтор через {delay:.1f} с')
+            self.stop_event.wait(delay)  # Ожидание прерывается сигналом остановки
+            delay = min(delay * 2, self.backoff_max)
+        return False
+
+    def read(self) -> tuple[bool, np.ndarray | None]:
+        """
+        Возвращает новый кадр камеры, при необходимости переподключаясь к ней.
+
+        :return: Кортеж (ret, кадр). ret равен False, если новый кадр не получен или получен сигнал остановки
+        """
+        if self._grabber is None and not self._reconnect():
+            return False, None
+        ret, frame = self._grabber.read()
+        if ret:
+            self._last_frame = time.monotonic()
+            self.last_timestamp = self._grabber.last_timestamp
+        elif time.monotonic() - self._last_frame >= self.read_timeout:
+            self._detach()  # Переподключение выполнит следующий вызов read()
+        return ret, frame
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики отключений камеры.
 
-            # Отображаем реальный FPS на кадре
-            cv2.putText(frame, str(int(real_fps)), (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-            cv2.imshow(f"Camera {index + 1}", frame)  # Показываем кадр в окне
-            position_window(f"Camera {index + 1}", index)  # Позиционируем окно на экране
-            cv2.waitKey(1)  # Ждем одну миллисекунду для обработки событий окна
+        :return: Словарь {'reconnects', 'outages', 'outage_total', 'outage_max', 'connected'} (длительности в секундах)
+        """
+        return {
+            'reconnects': self.reconnects,
+            'outages': self.outages,
+            'outage_total': self.outage_total,
+            'outage_max': self.outage_max,
+            'connected': self._grabber is not None,
+        }
 
-            # Рассчитываем время ожидания до следующего кадра, чтобы соблюсти нужный FPS
-            time.sleep(max(0, 1 / fps - (time.perf_counter() - start_time - frame_count / fps) if fps > 0 else 0))
+    def isOpened(self) -> bool:
+        return self._grabber is not None and self._grabber.isOpened()
 
-        cap.release()  # Освобождаем ресурсы камеры
-    except Exception as e:
-        # Логируем непредвиденные ошибки, возникшие в процессе выполнения функции
-        logger.error(f'Непредвиденная ошибка в capture_and_save: {e}')
+    def release(self) -> None:
+        """
+        Освобождает камеру и записывает в лог статистику отключений.
+        """
+        if self._grabber is not None:
+            self._grabber.release()
+            self._grabber = None
+        stats = self.stats()
+        logger.info(f"Камера {self.index + 1}: отключений {stats['outages']}, переподключений {stats['reconnects']}, "
+                    f"суммарное время без связи {stats['outage_total']:.1f} с, максимальное {stats['outage_max']:.1f} с")
 
 
 def connection(ip: str | int, fps: int, folder_name: str, width: int, height: int, index: int, start_count: int, timeout: int = 10,
-               lock: threading.Lock() = lock, errors_queue: queue.Queue() = errors_queue, stop_event: threading.Event() = stop_event) -> None:
+               lock: threading.Lock() = lock, errors_queue: queue.Queue() = errors_queue, stop_event: threading.Event() = stop_event,
+               writer: FrameWriter | None = None, grabber: bool = False, display: PreviewCompositor | NullDisplay | None = None,
+               pacing: str = 'drop', supervisor: dict | None = None, tracer: Tracer | None = None, decode_skip: bool = False) -> None:
     """
     Пытается подключиться к камере, обрабатывает успех/неудачу.
 
@@ -207,25 +3470,26 @@ def connection(ip: str | int, fps: int, folder_name: str, width: int, height: in
     :param height: Высота кадра для захвата
     :param index: Индекс камеры, с которой захватывается изображение
     :param start_count: Номер итерации программы
-    :param timeout: Время ожидания кадра с камеры
+    :param timeout: Время ожидания кадра с камеры, после которого CameraSupervisor переподключает камеру
+    :param writer: Пул записи кадров, передаваемый в capture_and_save
+    :param grabber: Читать камеру в отдельном потоке через LatestFrameGrabber (По умолчанию False)
+    :param display: Общее окно предпросмотра, передаваемое в capture_and_save
+    :param pacing: Политика темпа захвата, передаваемая в capture_and_save
+    :param supervisor: Настройки секции [Supervisor]: enabled, backoff_initial, backoff_max (По умолчанию без переподключения)
+    :param tracer: Трассировка подключения и этапов обработки кадра (По умолчанию без трассировки)
+    :param decode_skip: Декодировать только кадры, попадающие в сетку fps, через RateAdapter (По умолчанию False)
     """
     try:
         frames_received = False  # Флаг для отслеживания, были ли получены кадры
         cap = None  # Переменная для видеозахвата
 
         try:
-            # Настраиваем видеозахват в зависимости от операционной системы
-            if platform.system() == 'Windows':
-                cap = cv2.VideoCapture(ip, cv2.CAP_DSHOW)  # Используем DSHOW для Windows
-            else:
-                cap = cv2.VideoCapture(ip)  # Используем общий видеозахват для других ОС
-
-            # Настраиваем параметры захвата
-            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Устанавливаем размер буфера
-            cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)  # Устанавливаем ширину кадра
-            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)  # Устанавливаем высоту кадра
-            if cap.grab():  # Пытаемся захватить кадр
-                frames_received = True  # Успешный захват, обновляем флаг
+            # Открываем камеру и ждем первый кадр не дольше timeout секунд
+            connect_start = time.perf_counter()
+            report, cap = probe_camera(ip, width, height, index, timeout)
+            frames_received = report['ready']
+            if tracer is not None:
+                tracer.span('connect', index, connect_start, ready=frames_received)
 
             if not frames_received:  # Если кадры не были получены
                 with lock:
@@ -233,8 +3497,19 @@ def connection(ip: str | int, fps: int, folder_name: str, width: int, height: in
             else:
                 success_message = f"Успешное подключение к камере {index + 1}"  # Сообщение об успешном подключении
                 logger.info(success_message)  # Логируем сообщение
-                capture_and_save(cap, folder_name, fps, index, start_count, stop_event)  # Запускаем захват и сохранение
-                # кадров
+                if supervisor and supervisor.get('enabled'):
+                    # Наблюдаем за камерой и переподключаемся к ней при потере связи, чтение идет через LatestFrameGrabber
+                    cap = CameraSupervisor(ip, width, height, index, timeout, supervisor.get('backoff_initial', 1.0),
+                                           supervisor.get('backoff_max', 30.0), stop_event, fps if decode_skip else 0).start(cap)
+                elif grabber:
+                    # Непрерывно вычитываем поток камеры, чтобы сохранять актуальные, а не накопленные в буфере кадры
+                    cap = LatestFrameGrabber(cap, index, fps=fps if decode_skip else 0).start()
+                elif decode_skip:
+                    # Лишние кадры камеры пропускаются через grab() без декодирования, темп задает сам адаптер
+                    cap = RateAdapter(cap, index, fps)
+                # Запускаем захват и сохранение кадров
+                capture_and_save(cap, folder_name, fps, index, start_count, stop_event, writer=writer, display=display,
+                                 pacing=pacing, tracer=tracer)
 
         except Exception as e:
             # Логируем ошибку, возникшую при настройке соединения
@@ -253,6 +3528,508 @@ def connection(ip: str | int, fps: int, folder_name: str, width: int, height: in
         logger.error(f'Непредвиденная ошибка в connection: {e}')
 
 
+class SynchronizedCapture:
+    """
+    Синхронный захват с нескольких камер: на каждом такте все камеры выполняют grab() одновременно, затем retrieve().
+
+    Для каждой камеры работает свой поток, поэтому grab() всех камер начинаются сразу после общего барьера, а не
+    по очереди, и время такта не растет с кол-вом камер. Такты отсчитываются по общим часам (time.monotonic) с
+    заданным FPS. Кадры одного такта сохраняются под одним номером кадра, а разброс времени grab() между камерами
+    (skew) записывается в CSV-файл для каждого такта.
+    """
+
+    def __init__(self, caps: list, indices: list[int], fps: int, stop_event: threading.Event, writer: FrameWriter | None = None,
+                 skew_log_path: str | None = None, barrier_timeout: float = 10, display: PreviewCompositor | NullDisplay | None = None) -> None:
+        """
+        :param caps: Открытые камеры
+        :param indices: Индексы камер
+        :param fps: Кол-во тактов (групп кадров) в секунду, 0 - без ограничения
+        :param stop_event: Ивент-флаг для отслеживания работы программы
+        :param writer: Пул записи кадров с зарегистрированными камерами
+        :param skew_log_path: Путь к CSV-файлу с разбросом времени захвата по тактам (По умолчанию не записывается)
+        :param barrier_timeout: Сколько секунд ждать камеру на барьере, прежде чем прервать захват (По умолчанию 10)
+        :param display: Общее окно предпросмотра (По умолчанию без отображения)
+        """
+        self.caps = caps
+        self.indices = indices
+        self.fps = fps
+        self.stop_event = stop_event
+        self.writer = writer
+        self.skew_log_path = skew_log_path
+        self.display = display
+        # Барьер для потоков камер и координатора: все участники проходят его на каждом этапе такта
+        self._barrier = threading.Barrier(len(caps) + 1, timeout=barrier_timeout)
+        self._grab_times = [0.0] * len(caps)  # Время grab() каждой камеры на текущем такте (time.perf_counter)
+        self._grab_ok = [False] * len(caps)  # Результат grab() каждой камеры на текущем такте
+        self._timestamp = 0.0  # Общее время такта (time.time())
+        self._running = True
+        self.groups = 0  # Кол-во выполненных тактов
+        self.overruns = 0  # Кол-во пропущенных тактов из-за того, что предыдущий не уложился в период
+        self.skew_max = 0.0  # Максимальный разброс времени grab() за сессию, секунды
+        self.skew_total = 0.0  # Суммарный разброс для расчета среднего, секунды
+
+    def _camera_loop(self, position: int) -> None:
+        """
+        Цикл потока камеры: grab() после стартового барьера, retrieve() и сохранение после барьера захвата.
+        """
+        cap = self.caps[position]
+        index = self.indices[position]
+        try:
+            while True:
+                self._barrier.wait()  # Ждем начала такта
+                if not self._running:
+                    break
+                self._grab_ok[position] = cap.grab()
+                self._grab_times[position] = time.perf_counter()
+                self._barrier.wait()  # Сообщаем координатору, что grab() выполнен
+                if self._grab_ok[position]:
+                    ret, frame = cap.retrieve()
+                    if ret:
+                        if self.writer is not None and self.writer.metrics is not None:
+                            self.writer.metrics.camera(index).captured.inc()
+                        if self.writer is not None:
+                            self.writer.submit(index, self.groups, frame, self._timestamp)
+                        if self.display is not None:
+                            self.display.update(index, frame)
+                self._barrier.wait()  # Такт завершен
+        except threading.BrokenBarrierError:
+            pass
+        except Exception as e:
+            logger.error(f'Непредвиденная ошибка в SynchronizedCapture камеры {index + 1}: {e}')
+            self._barrier.abort()  # Прерываем такт, чтобы остальные потоки не ждали эту камеру
+
+    def run(self) -> None:
+        """
+        Цикл координатора: задает такты по общим часам, собирает время grab() и записывает разброс.
+        """
+        camera_threads = [threading.Thread(target=self._camera_loop, args=(position,), name=f"Sync-{index + 1}", daemon=True)
+                          for position, index in enumerate(self.indices)]
+        for thread in camera_threads:
+            thread.start()
+
+        skew_file = None
+        try:
+            if self.skew_log_path:
+                write_header = not os.path.exists(self.skew_log_path)
+                skew_file = open(self.skew_log_path, 'a', newline='')
+                skew_log = csv.writer(skew_file)
+                if write_header:
+                    skew_log.writerow(['frame', 'timestamp', 'skew_ms'] + [f'camera_{index + 1}_ok' for index in self.indices])
+
+            period = 1 / self.fps if self.fps > 0 else 0
+            next_tick = time.monotonic()
+            while not self.stop_event.is_set():
+                # Ждем наступления такта по общим часам
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                self._timestamp = time.time()
+                self._barrier.wait()  # Старт такта: все камеры выполняют grab()
+                self._barrier.wait()  # Все камеры выполнили grab()
+                grabbed = [t for t, ok in zip(self._grab_times, self._grab_ok) if ok]
+                skew = max(grabbed) - min(grabbed) if len(grabbed) > 1 else 0.0
+                self.skew_max = max(self.skew_max, skew)
+                self.skew_total += skew
+                if skew_file is not None:
+                    skew_log.writerow([self.groups, f'{self._timestamp:.6f}', f'{skew * 1000:.3f}'] + [int(ok) for ok in self._grab_ok])
+                self._barrier.wait()  # Все камеры сохранили кадры такта
+                self.groups += 1
+
+                # Планируем следующий такт; если текущий не уложился в период, пропускаем просроченные такты
+                next_tick += period
+                now = time.monotonic()
+                if period and next_tick < now:
+                    missed = int((now - next_tick) / period) + 1
+                    self.overruns += missed
+                    next_tick += missed * period
+        except threading.BrokenBarrierError:
+            logger.error('Синхронный захват прерван: одна из камер не ответила вовремя')
+        except Exception as e:
+            logger.error(f'Непредвиденная ошибка в SynchronizedCapture: {e}')
+        finally:
+            # Отпускаем потоки камер, ожидающие стартовый барьер
+            self._running = False
+            try:
+                self._barrier.wait(timeout=1)
+            except threading.BrokenBarrierError:
+                pass
+            self._barrier.abort()
+            for thread in camera_threads:
+                thread.join(timeout=1)
+            if skew_file is not None:
+                skew_file.close()
+            logger.info(f'Синхронный захват: тактов {self.groups}, пропущено {self.overruns}, '
+                        f'разброс средний {self.stats()["skew_avg"] * 1000:.2f} мс, максимальный {self.skew_max * 1000:.2f} мс')
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики синхронного захвата.
+
+        :return: Словарь {'groups', 'overruns', 'skew_avg', 'skew_max'} (разброс в секундах)
+        """
+        return {
+            'groups': self.groups,
+            'overruns': self.overruns,
+            'skew_avg': self.skew_total / self.groups if self.groups else 0.0,
+            'skew_max': self.skew_max,
+        }
+
+
+def synchronized_connection(sources: list, fps: int, folders: list[str], width: int, height: int, indices: list[int], start_count: int,
+                            lock: threading.Lock = lock, errors_queue: queue.Queue = errors_queue, stop_event: threading.Event = stop_event,
+                            writer: FrameWriter | None = None, display: PreviewCompositor | NullDisplay | None = None,
+                            timeout: float = 10) -> None:
+    """
+    Подключается ко всем камерам и запускает синхронный захват с тех, что подключились.
+
+    :param sources: IP камер или индексы USB-камер
+    :param fps: Кол-во групп кадров в секунду
+    :param folders: Пути к папкам, куда сохраняются кадры каждой камеры
+    :param width: Ширина кадра для захвата
+    :param height: Высота кадра для захвата
+    :param indices: Индексы камер
+    :param start_count: Номер итерации программы
+    :param writer: Пул записи кадров
+    :param display: Общее окно предпросмотра
+    :param timeout: Максимальное время подключения к одной камере в секундах (По умолчанию 10)
+    """
+    caps, connected_indices = [], []
+    try:
+        # Проверяем все камеры одновременно, а не по очереди
+        for (report, cap), folder_name, index in zip(probe_cameras(sources, width, height, indices, timeout), folders, indices):
+            if report['ready']:
+                logger.info(f"Успешное подключение к камере {index + 1}")
+                caps.append(cap)
+                connected_indices.append(index)
+                if writer is not None:
+                    writer.register(index, writer.create_sink(folder_name, start_count, fps, index))
+            else:
+                # Камера не подключилась: сообщаем об ошибке
+                with lock:
+                    errors_queue.put(index)
+
+        if caps:
+            SynchronizedCapture(caps, connected_indices, fps, stop_event, writer, f"{start_count} sync.csv", display=display).run()
+    except Exception as e:
+        logger.error(f'Непредвиденная ошибка в synchronized_connection: {e}')
+    finally:
+        for cap in caps:
+            cap.release()
+        if writer is not None:
+            for index in connected_indices:
+                writer.close_camera(index)
+
+
+class FrameRing:
+    """
+    Кольцевой буфер кадров предпросмотра в разделяемой памяти для обмена между процессом камеры и главным процессом.
+
+    Процесс камеры записывает кадр в следующую ячейку и после этого публикует ее порядковый номер, главный процесс читает последнюю
+    опубликованную ячейку без копирования (массив поверх разделяемой памяти). Ячейка перезаписывается только через slots публикаций,
+    поэтому кадр, переданный окну предпросмотра, успевает отрисоваться. Если процесс камеры перезапускается, буфер сохраняется.
+    """
+    # Заголовок: запись 0 - общее состояние (номер последней публикации, признак ошибки камеры), записи 1..slots - ячейки
+    HEADER_DTYPE = np.dtype([('sequence', '<i8'), ('timestamp', '<f8'), ('fps', '<f8'), ('failed', '<i8')])
+
+    def __init__(self, width: int, height: int, slots: int = 4, name: str | None = None) -> None:
+        """
+        :param width: Ширина кадров буфера
+        :param height: Высота кадров буфера
+        :param slots: Кол-во ячеек (По умолчанию 4)
+        :param name: Имя существующего блока разделяемой памяти. Если не задано, создается новый блок
+        """
+        self.width = width
+        self.height = height
+        self.slots = slots
+        header_size = self.HEADER_DTYPE.itemsize * (slots + 1)
+        self._owner = name is None  # Создатель блока удаляет его при закрытии
+        self.memory = shared_memory.SharedMemory(name=name, create=self._owner, size=header_size + slots * height * width * 3)
+        if not self._owner:
+            try:
+                # Блок принадлежит главному процессу: не даем resource_tracker удалить его при завершении процесса камеры
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(self.memory._name, 'shared_memory')
+            except Exception:
+                pass
+        self.name = self.memory.name
+        self.header = np.ndarray((slots + 1,), dtype=self.HEADER_DTYPE, buffer=self.memory.buf)
+        self.frames = np.ndarray((slots, height, width, 3), dtype=np.uint8, buffer=self.memory.buf, offset=header_size)
+        if self._owner:
+            self.header[:] = 0
+
+    def publish(self, frame: np.ndarray, fps: float | None = None) -> int:
+        """
+        Записывает кадр в следующую ячейку, приводя его к размеру буфера. Вызывается одним процессом камеры.
+
+        :param frame: Кадр
+        :param fps: Реальный FPS камеры
+        :return: Порядковый номер публикации
+        """
+        sequence = int(self.header['sequence'][0]) + 1
+        slot = sequence % self.slots
+        self.header['sequence'][slot + 1] = 0  # Ячейка перезаписывается
+        target = self.frames[slot]
+        if frame.shape == target.shape:
+            target[...] = frame
+        else:
+            cv2.resize(frame, (self.width, self.height), dst=target, interpolation=cv2.INTER_AREA)
+        self.header['timestamp'][slot + 1] = time.time()
+        self.header['fps'][slot + 1] = fps if fps is not None else -1
+        self.header['sequence'][slot + 1] = sequence
+        self.header['failed'][0] = 0
+        self.header['sequence'][0] = sequence  # Публикуем ячейку после записи кадра
+        return sequence
+
+    def mark_failed(self) -> None:
+        """
+        Сообщает главному процессу об ошибке камеры.
+        """
+        self.header['failed'][0] = 1
+
+    @property
+    def failed(self) -> bool:
+        return bool(self.header['failed'][0])
+
+    def latest(self, after: int = 0) -> tuple[int, np.ndarray, float, float | None] | None:
+        """
+        Возвращает последний опубликованный кадр без копирования.
+
+        :param after: Номер уже полученной публикации
+        :return: (номер публикации, кадр, время публикации, FPS) или None, если нового кадра нет
+        """
+        sequence = int(self.header['sequence'][0])
+        if sequence <= after:
+            return None
+        slot = sequence % self.slots
+        if self.header['sequence'][slot + 1] != sequence:
+            return None  # Ячейка уже перезаписывается следующим кадром
+        fps = float(self.header['fps'][slot + 1])
+        return sequence, self.frames[slot], float(self.header['timestamp'][slot + 1]), fps if fps >= 0 else None
+
+    def close(self) -> None:
+        """
+        Отключается от разделяемой памяти, создатель буфера удаляет блок.
+        """
+        self.header = self.frames = None  # Освобождаем ссылки на буфер разделяемой памяти
+        self.memory.close()
+        if self._owner:
+            self.memory.unlink()
+
+
+class RingDisplay:
+    """
+    Окно предпросмотра процесса камеры: публикует кадры в FrameRing не чаще preview_fps раз в секунду, отрисовывает их главный процесс.
+    """
+
+    def __init__(self, ring: FrameRing, preview_fps: float = 10) -> None:
+        """
+        :param ring: Буфер кадров предпросмотра
+        :param preview_fps: Частота публикации кадров (По умолчанию 10)
+        """
+        self.ring = ring
+        self.period = 1 / preview_fps if preview_fps > 0 else 0
+        self._next = 0.0  # Время следующей публикации по time.monotonic()
+
+    def update(self, index: int, frame: np.ndarray, real_fps: float | None = None) -> None:
+        now = time.monotonic()
+        if now < self._next:
+            return  # Кадр не попадет в окно, не копируем его
+        self._next = now + self.period
+        self.ring.publish(frame, real_fps)
+
+    def mark_failed(self, index: int) -> None:
+        self.ring.mark_failed()
+
+
+_process_log = None  # Очередь записей лога процессов камер и поток, записывающий их в файл лога главного процесса
+_process_log_lock = threading.Lock()
+
+
+def process_log_queue(context) -> multiprocessing.Queue:
+    """
+    Возвращает очередь, через которую процессы камер передают записи лога главному процессу, и запускает ее обработку.
+
+    :param context: Контекст multiprocessing
+    :return: Очередь записей лога
+    """
+    global _process_log
+    with _process_log_lock:
+        if _process_log is None:
+            log_queue = context.Queue()
+            listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+            listener.start()
+            atexit.register(listener.stop)
+            _process_log = log_queue
+        return _process_log
+
+
+def camera_process(camera: dict, start_count: int, settings: dict, stop_event, errors, log_queue) -> None:
+    """
+    Точка входа процесса камеры: подключается к камере и записывает ее кадры собственным пулом записи, кадры предпросмотра
+    публикуются в FrameRing главного процесса.
+
+    :param camera: Камера в формате getting_camera_settings
+    :param start_count: Номер итерации программы
+    :param settings: Настройки writer, encoder, recording, motion, capture, supervisor, preview_fps и ring (имя, ширина, высота,
+                     кол-во ячеек буфера или None без предпросмотра), stats_queue - multiprocessing.Queue, в которую при
+                     завершении передается статистика пула записи камеры (для бенчмарка)
+    :param stop_event: multiprocessing.Event остановки
+    :param errors: multiprocessing.Queue для индексов камер с ошибкой подключения
+    :param log_queue: multiprocessing.Queue для записей лога
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl+C в терминале обрабатывает главный процесс, он же останавливает камеры
+    # Записи лога передаются главному процессу, файл лога пишет только он
+    process_handler = logging.handlers.QueueHandler(log_queue)
+    process_handler.addFilter(rate_limit_filter)
+    rate_limit_filter.handler = process_handler
+    logger.addHandler(process_handler)
+
+    ring = FrameRing(*settings['ring'][1:], name=settings['ring'][0]) if settings.get('ring') else None
+    encoder = create_encoder('thread', quality=settings.get('encoder', {}).get('quality', 95))  # Процесс камеры уже занимает свое ядро
+    writer_settings = settings.get('writer', {})
+    writer = FrameWriter(writer_settings.get('threads', 2), writer_settings.get('queue_size', 32), encoder, settings.get('recording'),
+                         settings.get('motion'), queues=writer_settings)
+    capture = settings.get('capture', {})
+    supervisor = settings.get('supervisor', {})
+    try:
+        connection(camera['source'], camera['fps'], camera['folder'], camera['width'], camera['height'], camera['index'], start_count,
+                   timeout=supervisor.get('timeout', 10), lock=threading.Lock(), errors_queue=errors, stop_event=stop_event,
+                   writer=writer, grabber=capture.get('grabber', False),
+                   display=RingDisplay(ring, settings.get('preview_fps', 10)) if ring is not None else NullDisplay(),
+                   pacing=capture.get('pacing', 'drop'), supervisor=supervisor, decode_skip=capture.get('decode_skip', False))
+    finally:
+        writer.close()
+        if settings.get('stats_queue') is not None:
+            # Статистика пула записи процесса для бенчмарка
+            settings['stats_queue'].put(writer.stats().get(camera['index'], {'written': 0, 'dropped': 0, 'errors': 0}))
+        if ring is not None:
+            ring.close()
+        rate_limit_filter.flush()  # Подавленные повторы процесса камеры передаются в лог главного процесса
+
+
+class CameraProcess:
+    """
+    Запуск камеры в отдельном процессе: захват, кодирование и запись камеры не конкурируют за GIL с другими камерами, а сбой
+    бэкенда OpenCV завершает только процесс этой камеры.
+
+    Поток главного процесса запускает процесс камеры (camera_process), передает ошибки подключения в errors_queue, отрисовывает
+    кадры из FrameRing в окне предпросмотра и перезапускает процесс при аварийном завершении с растущей задержкой. Процессы
+    создаются методом spawn, поэтому потоки главного процесса не копируются в процесс камеры.
+    """
+
+    def __init__(self, camera: dict, start_count: int, settings: dict, display: PreviewCompositor | NullDisplay | None = None,
+                 stop_event: threading.Event = stop_event, errors_queue: queue.Queue = errors_queue, restart_initial: float = 1.0,
+                 restart_max: float = 30.0, shutdown_timeout: float = 10.0, target=camera_process) -> None:
+        """
+        :param camera: Камера в формате getting_camera_settings
+        :param start_count: Номер итерации программы
+        :param settings: Настройки секций [Writer], [Encoder], [Recording], [Motion], [Capture], [Supervisor] для camera_process
+                         (ключи writer, encoder, recording, motion, capture, supervisor)
+        :param display: Окно предпросмотра. Если не задано или NullDisplay, кадры предпросмотра не передаются
+        :param stop_event: Ивент-флаг для отслеживания работы программы
+        :param errors_queue: Очередь индексов камер с ошибкой подключения
+        :param restart_initial: Задержка первого перезапуска в секундах (По умолчанию 1.0)
+        :param restart_max: Максимальная задержка перезапуска в секундах (По умолчанию 30.0)
+        :param shutdown_timeout: Время ожидания завершения процесса, после которого он завершается принудительно (По умолчанию 10.0)
+        :param target: Точка входа процесса (По умолчанию camera_process)
+        """
+        self.camera = camera
+        self.index = camera['index']
+        self.start_count = start_count
+        self.settings = settings
+        self.display = display if isinstance(display, PreviewCompositor) else None
+        self.stop_event = stop_event
+        self.errors_queue = errors_queue
+        self.restart_initial = restart_initial
+        self.restart_max = restart_max
+        self.shutdown_timeout = shutdown_timeout
+        self.target = target
+        self.restarts = 0  # Кол-во перезапусков после аварийного завершения
+        self.exitcode = None  # Код завершения последнего процесса
+
+    def run(self) -> None:
+        """
+        Запускает процесс камеры и перезапускает его при аварийном завершении, пока не получен сигнал остановки.
+        """
+        context = multiprocessing.get_context('spawn')
+        ring = None
+        if self.display is not None:
+            # Буфер размером с плитку окна: уменьшение кадра выполняет процесс камеры
+            ring = FrameRing(self.display.tile_width, self.display.tile_height)
+        settings = dict(self.settings, ring=(ring.name, ring.width, ring.height, ring.slots) if ring is not None else None,
+                        preview_fps=self.display.preview_fps if self.display is not None else 0)
+        process_stop_event = context.Event()
+        errors = context.Queue()
+        log_queue = process_log_queue(context)
+        delay = self.restart_initial
+        process = None
+        try:
+            while not self.stop_event.is_set():
+                process = context.Process(target=self.target, args=(self.camera, self.start_count, settings, process_stop_event, errors,
+                                                                    log_queue), name=f'Camera-{self.index + 1}', daemon=True)
+                started = time.monotonic()
+                process.start()
+                self._watch(process, ring, errors)
+                if self.stop_event.is_set():
+                    break
+                self.exitcode = process.exitcode
+                if process.exitcode == 0:
+                    break  # Камера завершила работу штатно (ошибка подключения уже передана в errors_queue)
+                if time.monotonic() - started > self.restart_max:
+                    delay = self.restart_initial  # Процесс долго работал без сбоев, начинаем задержки заново
+                self.restarts += 1
+                logger.error(f'Процесс камеры {self.index + 1} аварийно завершился с кодом {process.exitcode}, '
+                             f'перезапуск через {delay:.1f} с')
+                self.stop_event.wait(delay)
+                delay = min(delay * 2, self.restart_max)
+        except Exception as e:
+            logger.error(f'Непредвиденная ошибка в CameraProcess: {e}')
+        finally:
+            process_stop_event.set()
+            if process is not None and process.pid is not None:
+                process.join(self.shutdown_timeout)
+                if process.is_alive():
+                    logger.warning(f'Процесс камеры {self.index + 1} не завершился за {self.shutdown_timeout} с и будет остановлен')
+                    process.terminate()
+                    process.join()
+                self.exitcode = process.exitcode
+            self._forward_errors(errors)
+            if ring is not None:
+                ring.close()
+
+    def _forward_errors(self, errors) -> None:
+        """
+        Передает в errors_queue ошибки подключения, поступившие от процесса камеры.
+        """
+        while True:
+            try:
+                index = errors.get_nowait()
+            except (queue.Empty, OSError, ValueError):
+                return
+            with lock:
+                self.errors_queue.put(index)
+
+    def _watch(self, process, ring: FrameRing | None, errors) -> None:
+        """
+        Пока процесс камеры работает, передает ошибки подключения и кадры предпросмотра.
+        """
+        period = 1 / self.display.preview_fps if ring is not None and self.display.preview_fps > 0 else 0.1
+        sequence = 0  # Номер последнего переданного кадра предпросмотра
+        failed = False
+        while process.is_alive() and not self.stop_event.is_set():
+            process.join(period)
+            self._forward_errors(errors)
+            if ring is None:
+                continue
+            latest = ring.latest(sequence)
+            if latest is not None:
+                sequence, frame, _, fps = latest
+                self.display.update(self.index, frame, fps)  # Кадр передается без копирования, ячейка не перезапишется до отрисовки
+            if ring.failed and not failed:
+                self.display.mark_failed(self.index)
+            failed = ring.failed
+
+
 def ask_multiple_choice_question(question: str, choices: List[str], top: tk, vars: list, selected_choices: List[str] = []) -> List[str] | None:
     """
     Создает окно с вопросом и выбором нескольких вариантов ответа.
@@ -305,9 +4082,10 @@ def ask_multiple_choice_question(question: str, choices: List[str], top: tk, var
         # Логируем ошибку, если произошла непредвиденная ошибка
         logger.error(f'Непредвиденная ошибка в ask_multiple_choice_question: {e}')
 
-def getting_settings() -> tuple[int, int, int, int, str, list[str], list[str]] | None:
+def getting_settings(interactive: bool = True) -> tuple[int, int, int, int, str, list[str], list[str]] | None:
     """
     Загружает настройки из файла settings.ini или запрашивает их у пользователя.
+    :param interactive: Разрешить диалоги с пользователем. Без них настройки берутся только из файла (По умолчанию True)
     :return: Кортеж с настройками
     """
     try:
@@ -348,7 +4126,7 @@ def getting_settings() -> tuple[int, int, int, int, str, list[str], list[str]] |
                 config.get('IPCamera3', 'folder')
 
                 # Спрашиваем пользователя, хочет ли он изменить текущие настройки
-                change_settings = messagebox.askyesno(
+                change_settings = interactive and messagebox.askyesno(
                     "Настройки",
                     "Изменить текущие настройки?\n" +
                     "\n".join([f"{key}: {value}"
@@ -362,6 +4140,11 @@ def getting_settings() -> tuple[int, int, int, int, str, list[str], list[str]] |
         else:
             # Если файл конфигурации не существует, устанавливаем флаг на установку настроек
             set_the_settings = True
+
+        # Без диалогов запросить недостающие настройки негде
+        if set_the_settings and not interactive:
+            logger.error(f'Файл {config_file} отсутствует или неполон, а запросить настройки без графического интерфейса нельзя')
+            return None
         # Проверяем, установлен ли флаг для настройки конфигурации
         if set_the_settings:
             # Устанавливаем значения в секции 'General'
@@ -486,6 +4269,91 @@ def getting_settings() -> tuple[int, int, int, int, str, list[str], list[str]] |
         logger.error(f'Непредвиденная ошибка в getting_settings: {e}')
         return None
 
+def getting_section_settings(section: str, defaults: dict, config_file: str = 'settings.ini') -> dict:
+    """
+    Загружает дополнительные настройки из секции файла settings.ini без диалогов с пользователем.
+
+    Значения приводятся к типам значений по умолчанию. Отсутствующие и некорректные опции заменяются значениями по умолчанию.
+
+    :param section: Название секции в файле конфигурации
+    :param defaults: Словарь опций и их значений по умолчанию
+    :param config_file: Путь к файлу конфигурации (По умолчанию 'settings.ini')
+    :return: Словарь с настройками секции
+    """
+    settings = dict(defaults)  # Начинаем со значений по умолчанию
+    try:
+        config = configparser.ConfigParser()
+        config.read(config_file)  # Отсутствующий файл не является ошибкой
+        if not config.has_section(section):
+            return settings
+
+        for option, default in defaults.items():
+            if not config.has_option(section, option):
+                continue
+            try:
+                # Приводим значение к типу значения по умолчанию (bool проверяем раньше int, т.к. bool - подкласс int)
+                if isinstance(default, bool):
+                    settings[option] = config.getboolean(section, option)
+                elif isinstance(default, int):
+                    settings[option] = config.getint(section, option)
+                elif isinstance(default, float):
+                    settings[option] = config.getfloat(section, option)
+                else:
+                    settings[option] = config.get(section, option)
+            except ValueError:
+                logger.warning(f'Некорректное значение {option} в секции [{section}], используется {default}')
+    except Exception as e:
+        # Логируем ошибку, если произошла непредвиденная ошибка
+        logger.error(f'Непредвиденная ошибка в getting_section_settings: {e}')
+    return settings
+
+
+def getting_camera_settings(interactive: bool = True, config_file: str = 'settings.ini') -> list[dict] | None:
+    """
+    Загружает список камер из файла settings.ini.
+
+    Камеры задаются секциями [Camera1], [Camera2], ... в любом кол-ве. В каждой секции указываются source (IP-адрес или индекс
+    USB-камеры) и folder, а также при необходимости собственные fps, width и height (по умолчанию берутся из секции [General]).
+    Если секций [CameraN] нет, используются прежние секции [IPCamera1]-[IPCamera3] и [USB] (getting_settings).
+
+    :param interactive: Разрешить диалоги с пользователем для прежних секций (По умолчанию True)
+    :param config_file: Путь к файлу конфигурации (По умолчанию 'settings.ini')
+    :return: Список словарей {'index', 'source', 'folder', 'fps', 'width', 'height'} в порядке номеров камер или None
+    """
+    try:
+        config = configparser.ConfigParser()
+        config.read(config_file)  # Отсутствующий файл не является ошибкой
+        sections = sorted((section for section in config.sections() if re.fullmatch(r'Camera\d+', section)),
+                          key=lambda section: int(section[len('Camera'):]))
+
+        if not sections:
+            # Прежний формат: три IP-камеры и USB-камера с индексом 3
+            settings = getting_settings(interactive=interactive)
+            if settings is None:
+                return None
+            user_fps, user_width, user_height, user_usb_index, usb_folder, ip_camera_addresses, ip_camera_folders = settings
+            sources = list(zip(range(len(ip_camera_addresses)), ip_camera_addresses, ip_camera_folders)) + [(3, user_usb_index, usb_folder)]
+            return [{'index': index, 'source': source, 'folder': folder, 'fps': user_fps, 'width': user_width, 'height': user_height}
+                    for index, source, folder in sources]
+
+        general = getting_section_settings('General', {'fps': 30, 'width': 640, 'height': 480}, config_file)
+        cameras = []
+        for section in sections:
+            camera = getting_section_settings(section, dict(general, source='', folder=''), config_file)
+            if not camera['source'] or not camera['folder']:
+                logger.error(f'В секции [{section}] не указаны source или folder, камера пропущена')
+                continue
+            if camera['source'].isdigit():
+                camera['source'] = int(camera['source'])  # Число - индекс USB-камеры
+            camera['index'] = int(section[len('Camera'):]) - 1  # Номер камеры в логах и окне совпадает с номером секции
+            cameras.append(camera)
+        return cameras
+    except Exception as e:
+        # Логируем ошибку, если произошла непредвиденная ошибка
+        logger.error(f'Непредвиденная ошибка в getting_camera_settings: {e}')
+        return None
+
+
 def start_counter() -> int | None:
     """
     Считывает счетчик из файла start_count.txt
@@ -514,67 +4382,851 @@ def start_counter() -> int | None:
         logger.error(f'Непредвиденная ошибка в start_counter: {e}')
 
 
-def main() -> None:
+class CaptureOrchestrator:
     """
-    Главная функция
+    Событийный координатор записи на asyncio: запускает камеры, обрабатывает ошибки подключения и завершает работу.
+
+    Блокирующие вызовы OpenCV (connection, synchronized_connection, окно предпросмотра, закрытие пула записи) выполняются в отдельных
+    фоновых потоках, а их завершение доступно в цикле asyncio как Future. Ошибки камер приходят событиями, без опроса очереди.
+    Завершение ограничено по времени shutdown_timeout: зависший поток камеры не задерживает выход из программы. Потоки создаются
+    с daemon=True, а не через concurrent.futures, так как исполнитель concurrent.futures ждет свои потоки при выходе из интерпретатора.
+
+    Пример встраивания:
+        orchestrator = CaptureOrchestrator(cameras, start_count, writer)
+        task = asyncio.create_task(orchestrator.run())
+        ...
+        orchestrator.stop()  # Из любого потока
+        await task
     """
-    try:
-        # Инициализируем счетчик, считывая его значение из файла
-        start_count = start_counter()
 
-        # Получаем настройки пользователя: FPS, размеры, индекс USB и папки для IP-камер
-        user_fps, user_width, user_height, user_usb_index, usb_folder, ip_camera_addresses, ip_camera_folders = getting_settings()
+    def __init__(self, cameras: list[dict], start_count: int, writer: FrameWriter | None = None,
+                 display: PreviewCompositor | NullDisplay | None = None, capture: dict | None = None, supervisor: dict | None = None,
+                 interactive: bool = True, shutdown_timeout: float = 10.0, stop_event: threading.Event = stop_event,
+                 tracer: Tracer | None = None, process_settings: dict | None = None) -> None:
+        """
+        :param cameras: Список камер в формате getting_camera_settings
+        :param start_count: Номер итерации программы
+        :param writer: Пул записи кадров, закрывается при завершении
+        :param display: Окно предпросмотра. PreviewCompositor запускается в отдельном потоке
+        :param capture: Настройки секции [Capture]: grabber, synchronized, processes, decode_skip, pacing
+        :param supervisor: Настройки секции [Supervisor], передаваемые в connection
+        :param interactive: Спрашивать пользователя при ошибке камеры (По умолчанию True)
+        :param shutdown_timeout: Максимальное время завершения в секундах (По умолчанию 10.0)
+        :param stop_event: Ивент-флаг для отслеживания работы программы
+        :param tracer: Трассировка этапов обработки кадра, передаваемая в connection (По умолчанию без трассировки)
+        :param process_settings: Настройки writer, encoder, recording, motion для процессов камер ([Capture] processes)
+        """
+        self.cameras = cameras
+        self.start_count = start_count
+        self.writer = writer
+        self.display = display
+        self.capture = capture or {}
+        self.supervisor = supervisor or {}
+        self.interactive = interactive
+        self.shutdown_timeout = shutdown_timeout
+        self.stop_event = stop_event
+        self.tracer = tracer
+        self.process_settings = process_settings or {}
+        self.loop = None  # Цикл asyncio, в котором выполняется run()
+        self.errors = None  # asyncio.Queue индексов камер с ошибкой подключения
+        self.jobs = {}  # Имя потока -> Future его завершения
+        self.camera_jobs = {}  # Индекс камеры -> Future завершения ее потока
+        self.failed = []  # Индексы камер с ошибкой подключения
 
-        # Создаем и запускаем потоки для каждого IP-адреса камеры
-        for ip_data in range(len(ip_camera_addresses)):
-            try:
-                # Создаем поток для соединения с IP-камерой
-                ip_thread = threading.Thread(target=connection, args=(ip_camera_addresses[ip_data], user_fps, ip_camera_folders[ip_data], user_width, user_height, ip_data, start_count))
-                threads.append(ip_thread)  # Добавляем поток в список потоков
-                ip_thread.start()  # Запускаем поток
+    def _run_in_thread(self, name: str, target, *args, **kwargs) -> asyncio.Future:
+        """
+        Выполняет блокирующую функцию в фоновом потоке.
+
+        :param name: Имя потока
+        :param target: Функция
+        :return: Future, завершающийся вместе с функцией
+        """
+        loop = self.loop
+        future = loop.create_future()
 
+        def finish() -> None:
+            if not future.done():
+                future.set_result(None)
+
+        def runner() -> None:
+            try:
+                target(*args, **kwargs)
             except Exception as e:
-                # Логируем ошибку, если произошла ошибка при создании потока
-                logger.error(str(e))
+                logger.error(f'Непредвиденная ошибка в потоке {name}: {e}')
+            try:
+                loop.call_soon_threadsafe(finish)
+            except RuntimeError:
+                pass  # Цикл уже закрыт: завершение по таймауту прошло без этого потока
+
+        threading.Thread(target=runner, name=name, daemon=True).start()
+        self.jobs[name] = future
+        return future
+
+    def put(self, index: int) -> None:
+        """
+        Сообщает об ошибке подключения камеры из любого потока. Совместим с errors_queue.put() для connection.
+
+        :param index: Индекс камеры
+        """
+        self.loop.call_soon_threadsafe(self.errors.put_nowait, index)
+
+    def stop(self) -> None:
+        """
+        Запрашивает завершение из любого потока.
+        """
+        self.stop_event.set()
+
+    def start(self) -> None:
+        """
+        Запускает окно предпросмотра и потоки камер.
+        """
+        if isinstance(self.display, PreviewCompositor):
+            self._run_in_thread('Display', self.display.run, self.stop_event)
+        settings = {'lock': lock, 'errors_queue': self, 'stop_event': self.stop_event, 'writer': self.writer, 'display': self.display}
+        if self.capture.get('synchronized'):
+            # Синхронный режим: один координатор захватывает все камеры общими тактами с FPS и размерами кадра секции [General]
+            general = getting_section_settings('General', {'fps': 30, 'width': 640, 'height': 480})
+            job = self._run_in_thread('Sync', synchronized_connection, [camera['source'] for camera in self.cameras], general['fps'],
+                                      [camera['folder'] for camera in self.cameras], general['width'], general['height'],
+                                      [camera['index'] for camera in self.cameras], self.start_count,
+                                      timeout=self.supervisor.get('timeout', 10), **settings)
+            self.camera_jobs = {camera['index']: job for camera in self.cameras}
+            return
+        if self.capture.get('processes'):
+            # Каждая камера в своем процессе с собственным пулом записи, поток главного процесса следит за ним
+            settings = dict(self.process_settings, capture=self.capture, supervisor=self.supervisor)
+            for camera in self.cameras:
+                worker = CameraProcess(camera, self.start_count, settings, self.display, self.stop_event, self,
+                                       self.supervisor.get('backoff_initial', 1.0), self.supervisor.get('backoff_max', 30.0),
+                                       self.shutdown_timeout)
+                self.camera_jobs[camera['index']] = self._run_in_thread(f"Camera-{camera['index'] + 1}", worker.run)
+            return
+        for camera in self.cameras:
+            # Пул записи и окно предпросмотра общие, поэтому на камеру приходится только поток захвата и поток чтения
+            self.camera_jobs[camera['index']] = self._run_in_thread(
+                f"Camera-{camera['index'] + 1}", connection, camera['source'], camera['fps'], camera['folder'], camera['width'],
+                camera['height'], camera['index'], self.start_count, grabber=self.capture.get('grabber', False),
+                pacing=self.capture.get('pacing', 'drop'), timeout=self.supervisor.get('timeout', 10), supervisor=self.supervisor,
+                tracer=self.tracer, decode_skip=self.capture.get('decode_skip', False), **settings)
+
+    async def wait_camera(self, index: int) -> None:
+        """
+        Ожидает завершения потока камеры.
+
+        :param index: Индекс камеры
+        """
+        await self.camera_jobs[index]
 
-        # Создаем и запускаем поток для USB-устройства
+    async def next_error(self) -> int:
+        """
+        Ожидает следующую ошибку подключения камеры.
+
+        :return: Индекс камеры
+        """
+        return await self.errors.get()
+
+    def _handle_error(self, index: int) -> None:
+        """
+        Обрабатывает ошибку камеры прежним обработчиком error_handling. Выполняется в потоке цикла asyncio (главном потоке),
+        поэтому диалоги Tkinter вызываются из того же потока, что и раньше.
+        """
+        self.failed.append(index)
+        pending = queue.Queue()
+        pending.put(index)
+        error_handling(pending, self.stop_event, self.display, interactive=self.interactive)
+
+    async def run(self) -> bool:
+        """
+        Запускает камеры и обрабатывает ошибки до сигнала остановки, затем завершает работу.
+
+        :return: True, если все потоки завершились за shutdown_timeout
+        """
+        self.loop = asyncio.get_running_loop()
+        self.errors = asyncio.Queue()
+        stopped = self._run_in_thread('Stop-watch', self.stop_event.wait)  # Сигнал остановки из любого потока
         try:
-            usb_index = 3  # Индекс USB-устройства
-            usb_thread = threading.Thread(target=connection, args=(user_usb_index, user_fps, usb_folder, user_width, user_height, usb_index, start_count))
-            threads.append(usb_thread)  # Добавляем поток в список потоков
-            usb_thread.start()  # Запускаем поток для USB
+            self.start()
+            while not self.stop_event.is_set():
+                error = asyncio.ensure_future(self.next_error())
+                done, _ = await asyncio.wait({error, stopped}, return_when=asyncio.FIRST_COMPLETED)
+                if error in done:
+                    self._handle_error(error.result())
+                else:
+                    error.cancel()
+        finally:
+            completed = await self.shutdown()
+        return completed
 
-        except Exception as e:
-            # Логируем ошибку, если произошла ошибка при создании потока для USB
-            logger.error(str(e))
+    async def shutdown(self) -> bool:
+        """
+        Останавливает камеры, дописывает кадры и закрывает пул записи не дольше shutdown_timeout секунд.
+
+        :return: True, если все потоки завершились вовремя
+        """
+        self.stop_event.set()
+        deadline = time.monotonic() + self.shutdown_timeout
+        running = {name: job for name, job in self.jobs.items() if not job.done()}
+        stuck = set()
+        if running:
+            _, pending = await asyncio.wait(running.values(), timeout=self.shutdown_timeout)
+            stuck = {name for name, job in running.items() if job in pending}
 
-        # Основной цикл для обработки ошибок и завершения программы
+        def close() -> None:
+            # Окна ошибок завершаются по stop_event, после чего дописываем кадры из очередей
+            for thread in threads:
+                thread.join(max(0.0, deadline - time.monotonic()))
+            if self.writer is not None:
+                self.writer.close()
+
+        closing = self._run_in_thread('Shutdown', close)
         try:
-            while True:
-                time.sleep(0.1)  # Небольшая задержка для снижения нагрузки на процессор
-                error_handling(errors_queue, stop_event)  # Обработка ошибок из очереди
+            await asyncio.wait_for(asyncio.shield(closing), max(0.0, deadline - time.monotonic()))
+        except asyncio.TimeoutError:
+            stuck.add('Shutdown')
+        if stuck:
+            logger.warning(f'Не завершились за {self.shutdown_timeout} с: {", ".join(sorted(stuck))}')
+        return not stuck
+
+
+def request_stop(signum: int, frame) -> None:
+    """
+    Обработчик сигналов SIGINT/SIGTERM в режиме без графического интерфейса: запрашивает остановку программы.
+
+    :param signum: Номер сигнала
+    :param frame: Текущий кадр стека (не используется)
+    """
+    logger.info(f'Получен сигнал {signal.Signals(signum).name}, программа завершается')
+    stop_event.set()
+
+
+def check_cameras() -> bool:
+    """
+    Проверяет все камеры из settings.ini одновременно и выводит отчет о готовности, не начиная запись.
+
+    :return: True, если все камеры готовы
+    """
+    cameras = getting_camera_settings(interactive=False)
+    if not cameras:
+        print('Файл настроек settings.ini отсутствует или заполнен не полностью')
+        return False
+    timeout = getting_section_settings('Supervisor', {'timeout': 10.0})['timeout']
+    # Каждая камера проверяется со своим разрешением, все проверки идут одновременно
+    results = probe_cameras([camera['source'] for camera in cameras], [camera['width'] for camera in cameras],
+                            [camera['height'] for camera in cameras], [camera['index'] for camera in cameras], timeout)
+    for report, cap in results:
+        if cap is not None:
+            cap.release()
+        if report['ready']:
+            print(f"Камера {report['index'] + 1} ({report['source']}): готова, открытие {report['open_latency']:.2f} с, "
+                  f"первый кадр {report['first_frame_latency']:.2f} с, {report['width']}x{report['height']}, {report['fps']:.0f} FPS")
+        else:
+            print(f"Камера {report['index'] + 1} ({report['source']}): не готова, {report['error']}")
+    return all(report['ready'] for report, _ in results)
+
+
+def collect_frames(folder_name: str, start_count: int, start: float | None = None, end: float | None = None,
+                   first_frame: int | None = None, last_frame: int | None = None, frame_index: FrameIndex | None = None,
+                   camera: int | None = None) -> list[tuple[int, float, str, int, int]]:
+    """
+    Находит сохраненные кадры сессии камеры за интервал времени и/или диапазон номеров кадров.
+
+    Кадры ищутся в индексе сессии (FrameIndex), если он задан, иначе в архиве кадров сессии, иначе среди JPG-файлов раскладки flat
+    или sharded. Для JPG-файлов без индекса временем захвата считается время изменения файла.
+
+    :param folder_name: Папка камеры
+    :param start_count: Номер итерации программы (сессия)
+    :param start: Начало интервала времени (time.time()) (По умолчанию с начала сессии)
+    :param end: Конец интервала времени включительно (По умолчанию до конца сессии)
+    :param first_frame: Первый номер кадра (По умолчанию с первого кадра)
+    :param last_frame: Последний номер кадра включительно (По умолчанию до последнего кадра)
+    :param frame_index: Индекс кадров сессии (По умолчанию без индекса)
+    :param camera: Индекс камеры в индексе кадров
+    :return: Список (номер кадра, время захвата, файл, смещение, размер), упорядоченный по номеру кадра
+    """
+    start = -math.inf if start is None else start
+    end = math.inf if end is None else end
+    first_frame = 0 if first_frame is None else first_frame
+    last_frame = sys.maxsize if last_frame is None else last_frame
+    data_path, index_path = archive_paths(folder_name, start_count)
+    frames = []
+    if frame_index is not None and camera is not None:
+        # Кадры видеосегментов (размер 0) уже собраны в видео и не экспортируются
+        frames = [frame for frame in frame_index.query(camera, start, end) if first_frame <= frame[0] <= last_frame and frame[4] > 0]
+    elif os.path.exists(index_path):
+        with FrameArchiveReader(folder_name, start_count) as reader:
+            first, last = reader.frame_range(start, end)
+            first, last = max(first, first_frame), min(last, last_frame + 1)
+            for offset, record in enumerate(reader.index[first:last] if first < last else []):
+                if record['length'] > 0:
+                    frames.append((first + offset, float(record['timestamp']), data_path, int(record['offset']), int(record['length'])))
+    else:
+        # JPG-файлы: в папке камеры "{start_count} frame_{n}.jpg" или в папке сессии ".../frame_{n:09d}.jpg"
+        folders = [(folder_name, re.compile(rf'^{start_count} frame_(\d+)\.jpg$'))]
+        folders += [(path, re.compile(r'^frame_(\d+)\.jpg$')) for path, _, _ in os.walk(session_folder(folder_name, start_count))]
+        for folder, pattern in folders:
+            if not os.path.isdir(folder):
+                continue
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    match = pattern.match(entry.name)
+                    if match is None or not first_frame <= int(match.group(1)) <= last_frame:
+                        continue
+                    stat = entry.stat()
+                    if start <= stat.st_mtime <= end:
+                        frames.append((int(match.group(1)), stat.st_mtime, entry.path, 0, stat.st_size))
+    frames.sort()
+    return frames
+
+
+def recorded_fps(timestamps: list[float]) -> float:
+    """
+    Определяет FPS записи по времени захвата кадров: по медианному интервалу между кадрами, поэтому перерывы в записи
+    (отключение камеры, запись по движению) не замедляют видео.
+
+    :param timestamps: Время захвата кадров по порядку
+    :return: FPS (1.0, если кадров меньше двух или время не различается)
+    """
+    intervals = np.diff(np.asarray(timestamps, dtype=np.float64))
+    intervals = intervals[intervals > 0]
+    if len(intervals) == 0:
+        return 1.0
+    return float(1 / np.median(intervals))
+
+
+def _decode_stored_frame(path: str, offset: int, size: int) -> np.ndarray | None:
+    """
+    Читает и декодирует JPEG-кадр из файла или из файла данных архива по смещению.
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read(size) if size > 0 else f.read()
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
+def export_clip(frames: list[tuple[int, float, str, int, int]], output: str, fps: float = 0.0, codec: str = 'MJPG',
+                workers: int = 0) -> dict:
+    """
+    Собирает видео из сохраненных кадров (collect_frames).
 
-                # Проверка нажатия клавиш Ctrl+C для завершения программы
-                if keyboard.is_pressed('ctrl') and keyboard.is_pressed('c'):
-                    logger.info('Программа завершена нажатием клавиш.')  # Логируем сообщение о завершении
-                    stop_event.set()  # Устанавливаем событие для завершения
+    Кадры декодируются пулом потоков (cv2.imdecode освобождает GIL), а буфер переупорядочивания выдает их в cv2.VideoWriter строго
+    по порядку. Одновременно в памяти находится не больше 4 кадров на поток пула, поэтому длинный диапазон не загружается в память
+    целиком. Кадры другого размера приводятся к размеру первого кадра, нечитаемые кадры пропускаются.
+
+    :param frames: Кадры по порядку: (номер кадра, время захвата, файл, смещение, размер)
+    :param output: Путь к видеофайлу
+    :param fps: FPS видео, 0 - по времени захвата кадров (recorded_fps) (По умолчанию 0)
+    :param codec: Кодек cv2.VideoWriter (По умолчанию MJPG)
+    :param workers: Кол-во потоков декодирования, 0 - по кол-ву ядер (По умолчанию 0)
+    :return: Словарь {'frames', 'skipped', 'fps', 'max_buffered'}
+    """
+    if fps <= 0:
+        fps = recorded_fps([timestamp for _, timestamp, *_ in frames])
+    workers = workers if workers > 0 else os.cpu_count() or 1
+    tasks = queue.Queue()  # Кадры для декодирования: (порядковый номер, кадр)
+    results = queue.Queue()  # Декодированные кадры в порядке готовности: (порядковый номер, изображение или None)
+    slots = threading.Semaphore(workers * 4)  # Ограничение кадров в работе и в буфере переупорядочивания
+    export_stop_event = threading.Event()
+
+    def produce() -> None:
+        for position, frame in enumerate(frames):
+            while not slots.acquire(timeout=0.1):
+                if export_stop_event.is_set():
                     break
+            if export_stop_event.is_set():
+                break
+            tasks.put((position, frame))
+        for _ in range(workers):
+            tasks.put(None)  # Сигнал завершения каждому потоку декодирования
+
+    def decode() -> None:
+        while (task := tasks.get()) is not None:
+            position, (frame_number, _, path, offset, size) = task
+            try:
+                image = _decode_stored_frame(path, offset, size)
+            except Exception as e:
+                logger.error(f'Не удалось прочитать кадр {frame_number}: {e}')
+                image = None
+            results.put((position, image))
+
+    export_threads = [threading.Thread(target=produce, name='Export-Reader', daemon=True)]
+    export_threads += [threading.Thread(target=decode, name=f'Export-{i}', daemon=True) for i in range(workers)]
+    for thread in export_threads:
+        thread.start()
+
+    video = None
+    size = None
+    written = skipped = max_buffered = 0
+    buffered = {}  # Буфер переупорядочивания: порядковый номер -> декодированный кадр
+    try:
+        for position in range(len(frames)):
+            while position not in buffered:
+                done, image = results.get()
+                buffered[done] = image
+                max_buffered = max(max_buffered, len(buffered))
+            image = buffered.pop(position)
+            slots.release()
+            if image is None:
+                skipped += 1
+                continue
+            if video is None:
+                size = (image.shape[1], image.shape[0])
+                video = cv2.VideoWriter(output, cv2.VideoWriter_fourcc(*codec), fps, size)
+                if not video.isOpened():
+                    raise OSError(f'Не удалось создать видеофайл {output}')
+            if (image.shape[1], image.shape[0]) != size:
+                image = cv2.resize(image, size)
+            video.write(image)
+            written += 1
+    finally:
+        export_stop_event.set()
+        if video is not None:
+            video.release()
+        for thread in export_threads:
+            thread.join()
+    return {'frames': written, 'skipped': skipped, 'fps': fps, 'max_buffered': max_buffered}
+
+
+def parse_time(value: str) -> float:
+    """
+    Преобразует время из командной строки в time.time(): число секунд или дата и время "ГГГГ-ММ-ДД ЧЧ:ММ:СС" (местное время).
+
+    :param value: Строка со временем
+    :return: Время в секундах
+    """
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.datetime.fromisoformat(value).timestamp()
+
 
-                # Проверка события на остановку программы
-                if stop_event.is_set():
-                    logger.info('Программа завершена')  # Логируем сообщение о завершении
+def export_recordings(cameras: list[int], session: int, output: str = '.', start: float | None = None, end: float | None = None,
+                      first_frame: int | None = None, last_frame: int | None = None, fps: float = 0.0, workers: int = 0,
+                      config_file: str = 'settings.ini') -> bool:
+    """
+    Собирает видео для каждой выбранной камеры из кадров сессии. Папки камер берутся из settings.ini, индекс кадров сессии
+    используется, если он включен в секции [Index] и существует.
+
+    :param cameras: Номера камер (с 1)
+    :param session: Номер итерации программы (сессия)
+    :param output: Папка для видеофайлов "{session} camera_{N}.avi" (По умолчанию текущая папка)
+    :param start: Начало интервала времени (По умолчанию с начала сессии)
+    :param end: Конец интервала времени (По умолчанию до конца сессии)
+    :param first_frame: Первый номер кадра (По умолчанию с первого кадра)
+    :param last_frame: Последний номер кадра (По умолчанию до последнего кадра)
+    :param fps: FPS видео, 0 - по времени захвата кадров (По умолчанию 0)
+    :param workers: Кол-во потоков декодирования, 0 - по кол-ву ядер (По умолчанию 0)
+    :param config_file: Путь к файлу конфигурации (По умолчанию 'settings.ini')
+    :return: True, если видео собрано для всех камер
+    """
+    folders = {camera['index'] + 1: camera['folder'] for camera in getting_camera_settings(False, config_file) or []}
+    index_settings = getting_section_settings('Index', {'enabled': False, 'folder': 'index'}, config_file)
+    index_path = frame_index_path(index_settings['folder'], session)
+    frame_index = FrameIndex(index_path) if index_settings['enabled'] and os.path.exists(index_path) else None
+    os.makedirs(output, exist_ok=True)
+    success = True
+    try:
+        for number in cameras:
+            if number not in folders:
+                print(f'Камера {number} не найдена в settings.ini')
+                success = False
+                continue
+            frames = collect_frames(folders[number], session, start, end, first_frame, last_frame, frame_index, number - 1)
+            if not frames:
+                print(f'Камера {number}: кадры сессии {session} в заданном диапазоне не найдены')
+                success = False
+                continue
+            path = os.path.join(output, f'{session} camera_{number}.avi')
+            started = time.perf_counter()
+            result = export_clip(frames, path, fps, workers=workers)
+            print(f"Камера {number}: {path}, кадров {result['frames']}, пропущено {result['skipped']}, {result['fps']:.1f} FPS, "
+                  f"{time.perf_counter() - started:.1f} с")
+    finally:
+        if frame_index is not None:
+            frame_index.close()
+    return success
+
+
+def _peak_memory_mb() -> float | None:
+    """
+    Возвращает пиковый объем памяти процесса в МБ (None, если модуль resource недоступен, например в Windows).
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # В Linux ru_maxrss в килобайтах, в macOS - в байтах
+    return peak / (1024 * 1024) if platform.system() == 'Darwin' else peak / 1024
+
+
+def _folder_size(folder_name: str) -> int:
+    """
+    Возвращает суммарный размер файлов в папке и ее подпапках в байтах.
+    """
+    return sum(os.path.getsize(os.path.join(path, name)) for path, _, names in os.walk(folder_name) for name in names)
+
+
+def benchmark_run(mode: str, num_cameras: int, duration: float = 10.0, source: str = SYNTHETIC_PREFIX, fps: float = 30,
+                  width: int = 640, height: int = 480, writer_settings: dict | None = None, encoder: str = 'thread',
+                  encoder_processes: int = 0, display: str = 'null', processes: bool = False) -> dict:
+    """
+    Запускает настоящий конвейер записи (connection, capture_and_save, FrameWriter и приемник режима mode) для num_cameras
+    камер на duration секунд и измеряет его производительность. Кадры пишутся во временную папку, которая затем удаляется.
+
+    :param mode: Режим записи: jpeg, segments или archive
+    :param num_cameras: Кол-во камер
+    :param duration: Длительность замера в секундах (По умолчанию 10)
+    :param source: Источник кадров каждой камеры (По умолчанию генерируемое изображение SyntheticCapture)
+    :param fps: Частота кадров камер (По умолчанию 30)
+    :param width: Ширина кадра (По умолчанию 640)
+    :param height: Высота кадра (По умолчанию 480)
+    :param writer_settings: Настройки пула записи: threads, queue_size (По умолчанию 2 и 32)
+    :param encoder: Кодировщик JPEG: thread или process (По умолчанию thread). Процессы камер всегда используют thread
+    :param encoder_processes: Кол-во процессов кодировщика process, 0 - по кол-ву ядер (По умолчанию 0)
+    :param display: Окно предпросмотра: null (без окна) или compositor (общее окно PreviewCompositor) (По умолчанию null)
+    :param processes: Запускать каждую камеру в отдельном процессе через CameraProcess (По умолчанию False)
+    :return: Словарь с результатами замера
+    """
+    writer_settings = writer_settings or {'threads': 2, 'queue_size': 32}
+    if processes:
+        encoder = 'thread'  # Процесс камеры кодирует кадры в своих потоках
+    if source.startswith(SYNTHETIC_PREFIX) and 'fps=' not in source:
+        source = f"{source}{'&' if '?' in source else '?'}fps={fps}"  # Имитация камеры выдает кадры с частотой замера
+    folder = tempfile.mkdtemp(prefix='videoproject_benchmark_')
+    run_stop_event = threading.Event()  # Собственное событие остановки, чтобы не затрагивать глобальное stop_event
+    run_errors = queue.Queue()
+    preview = NullDisplay()
+    if display == 'compositor':
+        preview = PreviewCompositor(list(range(num_cameras)), math.ceil(math.sqrt(num_cameras)))
+    cameras = [{'index': i, 'source': source, 'folder': os.path.join(folder, f'camera{i + 1}'), 'fps': fps, 'width': width,
+                'height': height} for i in range(num_cameras)]
+    writer = None
+    stats_queue = None
+    try:
+        if processes:
+            # Процессы камер передают статистику своего пула записи через очередь
+            stats_queue = multiprocessing.get_context('spawn').Queue()
+            settings = {'writer': writer_settings, 'recording': {'mode': mode}, 'capture': {'grabber': False},
+                        'stats_queue': stats_queue}
+            targets = [(CameraProcess(camera, 0, settings, preview, run_stop_event, run_errors).run, ()) for camera in cameras]
+        else:
+            writer = FrameWriter(writer_settings['threads'], writer_settings['queue_size'],
+                                 create_encoder(encoder, encoder_processes), recording={'mode': mode})
+            targets = [(connection, (camera['source'], fps, camera['folder'], width, height, camera['index'], 0)) for camera in cameras]
+        run_threads = [threading.Thread(target=target, args=args,
+                                        kwargs={} if processes else {'lock': threading.Lock(), 'errors_queue': run_errors,
+                                                                     'stop_event': run_stop_event, 'writer': writer,
+                                                                     'display': preview},
+                                        daemon=True, name=f'Benchmark-{i + 1}')
+                       for i, (target, args) in enumerate(targets)]
+        if isinstance(preview, PreviewCompositor):
+            run_threads.append(threading.Thread(target=preview.run, args=(run_stop_event,), daemon=True, name='Benchmark-Display'))
+        cpu_start = time.process_time()
+        children_start = os.times()
+        start = time.monotonic()
+        for thread in run_threads:
+            thread.start()
+        run_stop_event.wait(duration)
+        run_stop_event.set()
+        for thread in run_threads:
+            thread.join()
+        if writer is not None:
+            writer.close()  # Дописываем кадры из очередей, запись входит в замер
+            stats = list(writer.stats().values())
+        else:
+            stats = []
+            for _ in cameras:
+                try:
+                    stats.append(stats_queue.get(timeout=5))
+                except queue.Empty:
                     break
+        elapsed = time.monotonic() - start
+        # Время процессора процессов камер и пула кодировщика учитывается после их завершения (в Windows не учитывается)
+        children_end = os.times()
+        cpu = (time.process_time() - cpu_start + children_end.children_user - children_start.children_user
+               + children_end.children_system - children_start.children_system)
+        written = sum(camera['written'] for camera in stats)
+        size = _folder_size(folder)
+        return {
+            'mode': mode,
+            'cameras': num_cameras,
+            'encoder': encoder,
+            'display': display,
+            'processes': processes,
+            'duration': elapsed,
+            'fps_per_camera': written / elapsed / num_cameras,  # Устойчивый FPS записи одной камеры
+            'frames_written': written,
+            'frames_dropped': sum(camera['dropped'] for camera in stats),
+            'write_errors': sum(camera['errors'] for camera in stats) + run_errors.qsize(),
+            'cpu_percent_per_camera': cpu / elapsed / num_cameras * 100,  # Доля одного ядра на камеру
+            'peak_memory_mb': _peak_memory_mb(),
+            'write_mb_per_second': size / elapsed / (1024 * 1024),
+        }
+    finally:
+        run_stop_event.set()
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def benchmark_key(result: dict) -> tuple:
+    """
+    Возвращает конфигурацию замера, по которой сравниваются результаты разных версий.
+
+    :param result: Результат benchmark_run (в результатах прежних версий нет encoder, display и processes)
+    :return: Кортеж (режим, кол-во камер, кодировщик, окно, процессы)
+    """
+    return (result['mode'], result['cameras'], result.get('encoder', 'thread'), result.get('display', 'null'),
+            bool(result.get('processes', False)))
+
+
+def benchmark_label(result: dict) -> str:
+    """
+    Возвращает описание конфигурации замера для вывода.
+    """
+    label = f"{result['mode']}, камер {result['cameras']}"
+    if result.get('encoder', 'thread') != 'thread':
+        label += f", кодировщик {result['encoder']}"
+    if result.get('display', 'null') != 'null':
+        label += f", окно {result['display']}"
+    if result.get('processes'):
+        label += ', процессы'
+    return label
+
+
+def compare_benchmarks(results: list[dict], baseline: list[dict], tolerance: float = 0.1) -> list[str]:
+    """
+    Сравнивает результаты бенчмарка с результатами предыдущей версии по одинаковым конфигурациям (benchmark_key).
+
+    :param results: Текущие результаты
+    :param baseline: Результаты предыдущей версии
+    :param tolerance: Допустимое относительное ухудшение (По умолчанию 0.1 - 10%)
+    :return: Список описаний регрессий (пустой, если регрессий нет)
+    """
+    previous = {benchmark_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(benchmark_key(result))
+        if old is None:
+            continue
+        # FPS должен не уменьшиться, а нагрузка на процессор - не вырасти больше допустимого
+        if result['fps_per_camera'] < old['fps_per_camera'] * (1 - tolerance):
+            regressions.append(f"{benchmark_label(result)}: FPS {old['fps_per_camera']:.1f} -> {result['fps_per_camera']:.1f}")
+        if result['cpu_percent_per_camera'] > old['cpu_percent_per_camera'] * (1 + tolerance):
+            regressions.append(f"{benchmark_label(result)}: CPU на камеру {old['cpu_percent_per_camera']:.1f}% -> "
+                               f"{result['cpu_percent_per_camera']:.1f}%")
+    return regressions
+
+
+def run_benchmark(config_file: str = 'settings.ini') -> bool:
+    """
+    Запускает бенчмарк по настройкам секции [Benchmark] для каждого сочетания кол-ва камер, режима записи, кодировщика, окна
+    предпросмотра и запуска камер в процессах, сохраняет результаты в JSON
+    и сравнивает их с результатами предыдущей версии, если задан baseline.
+
+    :param config_file: Путь к файлу конфигурации (По умолчанию 'settings.ini')
+    :return: True, если регрессий не обнаружено
+    """
+    settings = getting_section_settings('Benchmark', {'cameras': '1,4,16,32,48', 'modes': 'jpeg,segments,archive', 'duration': 10.0,
+                                                      'source': SYNTHETIC_PREFIX, 'fps': 30.0, 'width': 640, 'height': 480,
+                                                      'encoders': 'thread', 'encoder_processes': 0, 'displays': 'null',
+                                                      'processes': 'false', 'output': 'benchmark.json', 'baseline': '',
+                                                      'tolerance': 0.1}, config_file)
+    writer_settings = getting_section_settings('Writer', {'threads': 2, 'queue_size': 32}, config_file)
+    results = []
+    # Кол-во камер растет от замера к замеру, поэтому пиковая память процесса относится к текущему замеру
+    def values(key: str) -> list[str]:
+        return [value.strip() for value in str(settings[key]).split(',') if value.strip()]
+
+    configurations = []
+    for use_processes in [value.lower() in ('1', 'true', 'yes', 'on') for value in values('processes')]:
+        # Процессы камер кодируют кадры в своих потоках, поэтому кодировщик для них не перебирается
+        for encoder in ['thread'] if use_processes else values('encoders'):
+            for display in values('displays'):
+                configurations.append((encoder, display, use_processes))
+    for num_cameras in sorted(int(value) for value in values('cameras')):
+        for mode in values('modes'):
+            for encoder, display, use_processes in configurations:
+                result = benchmark_run(mode, num_cameras, settings['duration'], settings['source'], settings['fps'],
+                                       settings['width'], settings['height'], writer_settings, encoder,
+                                       settings['encoder_processes'], display, use_processes)
+                results.append(result)
+                peak_memory = f"{result['peak_memory_mb']:.0f} МБ" if result['peak_memory_mb'] is not None else 'н/д'
+                print(f"{benchmark_label(result)}: {result['fps_per_camera']:.1f} FPS на камеру из {settings['fps']:.0f}, "
+                      f"CPU {result['cpu_percent_per_camera']:.1f}% на камеру, память {peak_memory}, "
+                      f"запись {result['write_mb_per_second']:.1f} МБ/с, отброшено {result['frames_dropped']}")
+
+    report = {
+        'metadata': {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'opencv': cv2.__version__,
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'settings': settings,
+            'writer': writer_settings,
+        },
+        'results': results,
+    }
+    with open(settings['output'], 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    logger.info(f"Результаты бенчмарка сохранены в {settings['output']}")
+
+    if not settings['baseline']:
+        return True
+    with open(settings['baseline'], encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    regressions = compare_benchmarks(results, baseline, settings['tolerance'])
+    for regression in regressions:
+        print(f"Регрессия: {regression}")
+    if not regressions:
+        print(f"Регрессий относительно {settings['baseline']} не обнаружено")
+    return not regressions
+
+
+def main(headless: bool = False) -> None:
+    """
+    Главная функция
+
+    :param headless: Режим без графического интерфейса: без Tkinter, окон OpenCV и keyboard, настройки только из settings.ini,
+                     завершение по SIGINT/SIGTERM, ошибки камер только в лог (По умолчанию False)
+    """
+    try:
+        # Ротация файла лога и ограничение повторяющихся сообщений
+        logging_settings = getting_section_settings('Logging', {'max_mb': 10.0, 'backup_count': 5, 'rate_limit_interval': 60.0,
+                                                                'rate_limit_burst': 5})
+        setup_logging(logging_settings['max_mb'], logging_settings['backup_count'], logging_settings['rate_limit_interval'],
+                      logging_settings['rate_limit_burst'])
+        if headless:
+            # Завершение по Ctrl+C в терминале или по сигналу от системы
+            signal.signal(signal.SIGINT, request_stop)
+            signal.signal(signal.SIGTERM, request_stop)
+        else:
+            init_gui()  # Создаем скрытое главное окно для диалогов
+
+        # Инициализируем счетчик, считывая его значение из файла
+        start_count = start_counter()
+
+        # Получаем список камер: источник, папка, FPS и размеры кадра каждой камеры
+        cameras = getting_camera_settings(interactive=not headless)
+        if not cameras:
+            logger.error('Не настроено ни одной камеры, программа завершена')
+            return
+
+        # Настройки захвата: чтение камер в отдельных потоках со слотом последнего кадра, синхронный режим и процессы камер
+        capture_settings = getting_section_settings('Capture', {'grabber': False, 'synchronized': False, 'processes': False,
+                                                                'decode_skip': False, 'pacing': 'drop', 'shutdown_timeout': 10.0})
+        processes = capture_settings['processes'] and not capture_settings['synchronized']  # Синхронный режим важнее processes
+        # Метрики конвейера по адресу /metrics для Prometheus
+        metrics_settings = getting_section_settings('Metrics', {'enabled': False, 'host': '127.0.0.1', 'port': 9108})
+        # Индекс кадров сессии в SQLite для поиска кадров камеры за интервал времени
+        index_settings = getting_section_settings('Index', {'enabled': False, 'folder': 'index', 'batch_size': 500})
+        # Трассировка этапов обработки кадров в формате Chrome trace
+        tracing_settings = getting_section_settings('Tracing', {'enabled': False, 'sample_rate': 0.01, 'max_events': 100000,
+                                                                'output': 'trace.json'})
+        # Метрики, трассировка и индекс кадров собираются потоками записи и захвата главного процесса, в процессах камер их нет
+        unsupported = [section for section, settings in (('Metrics', metrics_settings), ('Tracing', tracing_settings),
+                                                         ('Index', index_settings)) if settings['enabled']]
+        if processes and unsupported:
+            logger.error(f"Секции {', '.join(unsupported)} не поддерживаются для камер в отдельных процессах "
+                         f"([Capture] processes), отключите их или processes. Программа завершена")
+            return
 
+        # Создаем пул записи кадров, отделяющий кодирование и запись на диск от захвата
+        # Очереди камер ограничены кол-вом кадров и памятью (МБ, 0 - без ограничения), при переполнении действует политика policy
+        writer_settings = getting_section_settings('Writer', {'threads': 2, 'queue_size': 32, 'camera_mb': 0.0, 'total_mb': 0.0,
+                                                              'policy': 'drop_newest', 'block_timeout': 1.0})
+        # Кодировщик JPEG: в потоках записи или в пуле процессов для использования всех ядер
+        encoder_settings = getting_section_settings('Encoder', {'backend': 'thread', 'processes': 0, 'quality': 95})
+        encoder = create_encoder(encoder_settings['backend'], encoder_settings['processes'], encoder_settings['quality'])
+        # Режим записи: отдельные JPG-файлы или сменяющиеся видеосегменты
+        recording_settings = getting_section_settings('Recording', {'mode': 'jpeg', 'codec': 'MJPG', 'segment_minutes': 10.0, 'segment_mb': 0.0,
+                                                                    'layout': 'flat', 'fsync': 'none', 'fsync_batch': 64,
+                                                                    'fsync_interval': 1.0})
+        # Запись только при движении в кадре с кадрами до и после события
+        motion_settings = getting_section_settings('Motion', {'enabled': False, 'threshold': 25, 'min_area': 0.005, 'downscale_width': 160,
+                                                              'pre_seconds': 2.0, 'post_seconds': 3.0, 'mask': ''})
+        metrics = PipelineMetrics() if metrics_settings['enabled'] else None
+        # Квоты хранения: при нехватке места удаляются самые старые сессии записи
+        storage_settings = getting_section_settings('Storage', {'enabled': False, 'camera_gb': 0.0, 'total_gb': 0.0, 'days': 0.0,
+                                                                'min_free_gb': 0.0, 'interval': 60.0})
+        storage = None
+        if storage_settings['enabled']:
+            # Процессы камер не сообщают о записанных кадрах, поэтому текущие сессии пересчитываются по файлам
+            storage = StorageManager(storage_settings['camera_gb'], storage_settings['total_gb'], storage_settings['days'],
+                                     storage_settings['min_free_gb'], storage_settings['interval'], scan_active=processes)
+            if processes:
+                sharded = recording_settings['mode'] == 'jpeg' and recording_settings['layout'] == 'sharded'
+                for camera in cameras:
+                    storage.open_session(camera['index'], camera['folder'], start_count, sharded)  # Текущие сессии не удаляются
+            storage.start()
+        frame_index = None
+        if index_settings['enabled']:
+            frame_index = FrameIndex(frame_index_path(index_settings['folder'], start_count), index_settings['batch_size'])
+        writer = FrameWriter(writer_settings['threads'], writer_settings['queue_size'], encoder, recording_settings, motion_settings,
+                             metrics, storage, frame_index, writer_settings)
+        metrics_server = None
+        if metrics is not None:
+            try:
+                metrics_server = MetricsServer(metrics, writer, metrics_settings['host'], metrics_settings['port']).start()
+            except OSError as e:
+                logger.error(f'Не удалось запустить сервер метрик: {e}')
+        # Трассировка этапов обработки кадров в формате Chrome trace, при выключенной трассировке tracer равен None
+        tracer = Tracer(tracing_settings['sample_rate'], tracing_settings['max_events']) if tracing_settings['enabled'] else None
+        # Переподключение камер, переставших присылать кадры, с растущей задержкой между попытками
+        supervisor_settings = getting_section_settings('Supervisor', {'enabled': False, 'timeout': 10.0, 'backoff_initial': 1.0,
+                                                                      'backoff_max': 30.0})
+
+        # Общее окно предпросмотра: мозаика всех камер, отрисовываемая одним потоком
+        camera_indices = [camera['index'] for camera in cameras]
+        display_settings = getting_section_settings('Display', {'enabled': True, 'preview_fps': 10.0, 'columns': 0,
+                                                                'tile_width': WINDOW_WIDTH, 'tile_height': WINDOW_HEIGHT, 'max_width': 1920})
+        display = None
+        if headless:
+            display = NullDisplay()  # Кадры не отображаются и не передаются в HighGUI
+        elif display_settings['enabled']:
+            # По умолчанию сетка близка к квадратной, а плитки уменьшаются, чтобы окно не было шире max_width
+            columns = display_settings['columns'] or math.ceil(math.sqrt(len(camera_indices)))
+            scale = min(1.0, display_settings['max_width'] / (columns * display_settings['tile_width']))
+            tile_size = (int(display_settings['tile_width'] * scale), int(display_settings['tile_height'] * scale))
+            display = PreviewCompositor(camera_indices, columns, tile_size, display_settings['preview_fps'])
+
+        # Событийный координатор: камеры в фоновых потоках, ошибки и остановка - события цикла asyncio
+        orchestrator = CaptureOrchestrator(cameras, start_count, writer, display, capture_settings, supervisor_settings,
+                                           interactive=not headless, shutdown_timeout=capture_settings['shutdown_timeout'],
+                                           stop_event=stop_event, tracer=tracer,
+                                           process_settings={'writer': writer_settings, 'encoder': encoder_settings,
+                                                             'recording': recording_settings, 'motion': motion_settings})
+
+        def stop_by_keyboard() -> None:
+            logger.info('Программа завершена нажатием клавиш.')  # Логируем сообщение о завершении
+            stop_event.set()  # Устанавливаем событие для завершения
+
+        hotkey = None
+        if not headless and keyboard is not None:
+            # Ctrl+C в графическом режиме обрабатывается событием keyboard, без опроса клавиш (без графического интерфейса - по сигналу)
+            hotkey = keyboard.add_hotkey('ctrl+c', stop_by_keyboard)
+        try:
+            asyncio.run(orchestrator.run())
+            logger.info('Программа завершена')  # Логируем сообщение о завершении
         except Exception as e:
-            # Логируем ошибку, если произошла ошибка в основном цикле
+            # Логируем ошибку, если произошла ошибка в координаторе
             logger.error(str(e))
             logger.info("Программа завершена из-за ошибки.")
-
         finally:
-            # Ожидаем завершения всех потоков перед выходом
-            for thread in threads:
-                thread.join()
-            cv2.destroyAllWindows()  # Закрываем все окна OpenCV
+            if hotkey is not None:
+                keyboard.remove_hotkey(hotkey)
+            if metrics_server is not None:
+                metrics_server.close()
+            if storage is not None:
+                storage.close()  # Сохраняем индексы занятого места после записи последних кадров
+            if frame_index is not None:
+                frame_index.close()  # Добавляем в базу последние записанные кадры
+            if tracer is not None:
+                try:
+                    count = tracer.export(tracing_settings['output'])
+                    logger.info(f"Трассировка сохранена в {tracing_settings['output']}, событий: {count}")
+                except OSError as e:
+                    logger.error(f'Не удалось сохранить трассировку: {e}')
+            if not headless:
+                cv2.destroyAllWindows()  # Закрываем все окна OpenCV
 
     except Exception as e:
         # Логируем непредвиденные ошибки
@@ -582,4 +5234,32 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Захват и сохранение кадров с камер")
+    parser.add_argument('--headless', action='store_true',
+                        help="режим без графического интерфейса: настройки из settings.ini, завершение по SIGINT/SIGTERM")
+    parser.add_argument('--probe', action='store_true',
+                        help="проверить камеры из settings.ini и вывести отчет о готовности без записи")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="замерить производительность записи на имитации камер по настройкам секции [Benchmark]")
+    parser.add_argument('--export', type=int, nargs='+', metavar='CAMERA',
+                        help="собрать видео из сохраненных кадров сессии --session для камер с указанными номерами")
+    parser.add_argument('--session', type=int, help="номер сессии (start_count) для --export")
+    parser.add_argument('--start', type=parse_time, help="начало интервала: \"ГГГГ-ММ-ДД ЧЧ:ММ:СС\" или секунды time.time()")
+    parser.add_argument('--end', type=parse_time, help="конец интервала: \"ГГГГ-ММ-ДД ЧЧ:ММ:СС\" или секунды time.time()")
+    parser.add_argument('--frames', help="диапазон номеров кадров ПЕРВЫЙ:ПОСЛЕДНИЙ, любую границу можно опустить")
+    parser.add_argument('--output', default='.', help="папка для видеофайлов --export (по умолчанию текущая)")
+    parser.add_argument('--fps', type=float, default=0.0, help="FPS видео (по умолчанию по времени захвата кадров)")
+    parser.add_argument('--workers', type=int, default=0, help="кол-во потоков декодирования (по умолчанию по кол-ву ядер)")
+    args = parser.parse_args()
+    if args.export:
+        if args.session is None:
+            parser.error('для --export нужен номер сессии --session')
+        first_frame, _, last_frame = (args.frames or ':').partition(':')
+        sys.exit(0 if export_recordings(args.export, args.session, args.output, args.start, args.end,
+                                        int(first_frame) if first_frame else None, int(last_frame) if last_frame else None,
+                                        args.fps, args.workers) else 1)
+    if args.benchmark:
+        sys.exit(0 if run_benchmark() else 1)
+    if args.probe:
+        sys.exit(0 if check_cameras() else 1)
+    main(headless=args.headless)
@@ -0,0 +1,78 @@
+import json
+import pytest
+from unittest.mock import patch
+
+from Video import benchmark_run, compare_benchmarks, run_benchmark
+
+
+def make_result(mode='jpeg', cameras=1, fps=30.0, cpu=10.0):
+    return {'mode': mode, 'cameras': cameras, 'fps_per_camera': fps, 'cpu_percent_per_camera': cpu}
+
+
+@pytest.mark.parametrize("mode", ['jpeg', 'segments', 'archive'])
+def test_benchmark_run_measures_real_pipeline(mode):
+    """Тест: Замер проходит через настоящий конвейер записи и возвращает FPS, CPU и скорость записи."""
+    result = benchmark_run(mode, 2, duration=0.5, fps=20, width=64, height=48)
+
+    assert result['mode'] == mode and result['cameras'] == 2
+    assert result['frames_written'] > 0
+    assert 0 < result['fps_per_camera'] <= 25
+    assert result['write_mb_per_second'] > 0
+    assert result['write_errors'] == 0
+
+
+@pytest.mark.parametrize("options", [{'encoder': 'process', 'encoder_processes': 2}, {'processes': True}, {'display': 'compositor'}])
+def test_benchmark_run_measures_encoder_display_and_processes(options):
+    """Тест: Замер поддерживает кодировщик в пуле процессов, общее окно предпросмотра и камеры в отдельных процессах."""
+    with patch('Video.cv2.namedWindow'), patch('Video.cv2.moveWindow'), patch('Video.cv2.imshow') as mock_imshow, \
+            patch('Video.cv2.waitKey'), patch('Video.cv2.destroyWindow'):
+        result = benchmark_run('jpeg', 2, duration=1.0, fps=20, width=64, height=48, **options)
+
+    assert result['frames_written'] > 0
+    assert result['write_errors'] == 0
+    assert result['processes'] == options.get('processes', False)
+    assert result['encoder'] == options.get('encoder', 'thread')
+    assert mock_imshow.called == (options.get('display') == 'compositor')
+
+
+def test_compare_benchmarks_reports_regressions():
+    """Тест: Снижение FPS и рост CPU сверх допуска считаются регрессией, новые конфигурации не сравниваются."""
+    baseline = [make_result('jpeg', 1), make_result('archive', 1)]
+    results = [make_result('jpeg', 1, fps=29.0, cpu=10.5), make_result('archive', 1, fps=20.0, cpu=15.0), make_result('jpeg', 4)]
+
+    regressions = compare_benchmarks(results, baseline, tolerance=0.1)
+
+    assert len(regressions) == 2
+    assert all(regression.startswith('archive') for regression in regressions)
+    # Конфигурация с другим кодировщиком сравнивается только с такой же конфигурацией
+    assert compare_benchmarks([dict(make_result('jpeg', 1, fps=1.0), encoder='process')], baseline) == []
+
+
+def test_run_benchmark_writes_json_and_compares_with_baseline(tmp_path, capsys):
+    """Тест: Результаты сохраняются в JSON с метаданными, а сравнение с предыдущей версией находит регрессию."""
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps({'results': [make_result('jpeg', 1, fps=1000.0)]}))
+    output = tmp_path / "result.json"
+    config = tmp_path / "settings.ini"
+    config.write_text(f"[Benchmark]\ncameras = 1\nmodes = jpeg\nduration = 0.3\nfps = 20\nwidth = 64\nheight = 48\n"
+                      f"output = {output}\nbaseline = {baseline}\n")
+
+    assert run_benchmark(str(config)) is False
+
+    report = json.loads(output.read_text())
+    assert report['metadata']['opencv']
+    assert [(result['mode'], result['cameras']) for result in report['results']] == [('jpeg', 1)]
+    assert 'Регрессия' in capsys.readouterr().out
+
+
+def test_run_benchmark_defaults_cover_target_camera_counts(tmp_path):
+    """Тест: По умолчанию замеры строят кривую пропускной способности до 48 камер."""
+    config = tmp_path / "settings.ini"
+    config.write_text(f"[Benchmark]\nmodes = jpeg\noutput = {tmp_path / 'result.json'}\n")
+    def fake_run(mode, cameras, *args):
+        return dict(make_result(mode, cameras), peak_memory_mb=None, write_mb_per_second=0.0, frames_dropped=0)
+
+    with patch('Video.benchmark_run', side_effect=fake_run) as mock_run:
+        assert run_benchmark(str(config))
+
+    assert [call.args[1] for call in mock_run.call_args_list] == [1, 4, 16, 32, 48]
@@ -0,0 +1,122 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+
+from Video import FrameRing, RingDisplay, CameraProcess, PreviewCompositor
+
+
+def crashing_process(camera, start_count, settings, stop_event, errors, log_queue):
+    """Точка входа процесса камеры, завершающаяся аварийно."""
+    os._exit(3)
+
+
+def report_logging(results):
+    """Точка входа процесса, сообщающая, открыл ли импорт модуля файл лога."""
+    import Video
+    results.put((Video.file_handler is None, Video.log_listener is None, Video.queue_handler in Video.logger.handlers))
+
+
+def make_camera(folder, source='synthetic://?fps=20'):
+    return {'index': 0, 'source': source, 'folder': str(folder), 'fps': 20, 'width': 64, 'height': 48}
+
+
+def test_frame_ring_publishes_latest_frame():
+    """Тест: Последний опубликованный кадр читается без копирования, после перехода по кольцу ячейки переиспользуются."""
+    ring = FrameRing(32, 24, slots=2)
+    try:
+        assert ring.latest() is None
+        for value in range(1, 4):
+            sequence = ring.publish(np.full((24, 32, 3), value, dtype=np.uint8), 15.0)
+        result = ring.latest()
+        assert result[0] == sequence == 3
+        assert (result[1] == 3).all()
+        assert np.shares_memory(result[1], ring.frames)
+        assert result[3] == 15.0
+        assert ring.latest(after=3) is None
+    finally:
+        ring.close()
+
+
+def test_frame_ring_resizes_frames_and_attaches_by_name():
+    """Тест: Кадр другого размера приводится к размеру буфера, второй экземпляр видит его по имени блока."""
+    ring = FrameRing(32, 24)
+    other = FrameRing(32, 24, name=ring.name)
+    try:
+        other.publish(np.full((48, 64, 3), 200, dtype=np.uint8))
+        other.mark_failed()
+        sequence, frame, _, fps = ring.latest()
+        assert sequence == 1 and frame.shape == (24, 32, 3) and (frame == 200).all()
+        assert fps is None
+        assert ring.failed
+    finally:
+        other.close()
+        ring.close()
+
+
+def test_ring_display_throttles_publications():
+    """Тест: RingDisplay публикует не больше preview_fps кадров в секунду."""
+    ring = MagicMock()
+    display = RingDisplay(ring, preview_fps=1)
+    for _ in range(5):
+        display.update(0, object(), 10.0)
+    display.mark_failed(0)
+
+    ring.publish.assert_called_once()
+    ring.mark_failed.assert_called_once()
+
+
+def test_camera_process_records_and_previews(tmp_path):
+    """Тест: Процесс камеры записывает кадры, а главный процесс получает кадры предпросмотра из разделяемой памяти."""
+    stop_event = threading.Event()
+    display = PreviewCompositor([0], 1, (32, 24), preview_fps=20)
+    display.update = MagicMock()
+    worker = CameraProcess(make_camera(tmp_path / 'camera'), 5, {'capture': {'grabber': False}}, display, stop_event,
+                           queue.Queue(), shutdown_timeout=10)
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    deadline = time.monotonic() + 30
+    while not display.update.called and time.monotonic() < deadline:
+        time.sleep(0.1)
+    time.sleep(0.5)
+    stop_event.set()
+    thread.join(30)
+
+    assert not thread.is_alive()
+    assert worker.exitcode == 0
+    index, frame, _ = display.update.call_args.args
+    assert index == 0 and frame.shape == (24, 32, 3)
+    assert any(name.startswith('5 frame_') for name in os.listdir(tmp_path / 'camera'))
+
+
+def test_camera_process_restarts_after_crash(tmp_path):
+    """Тест: Аварийно завершившийся процесс камеры перезапускается с задержкой."""
+    stop_event = threading.Event()
+    worker = CameraProcess(make_camera(tmp_path), 1, {}, None, stop_event, queue.Queue(), restart_initial=0.01,
+                           restart_max=0.05, target=crashing_process)
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    deadline = time.monotonic() + 60
+    while worker.restarts < 2 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    stop_event.set()
+    thread.join(30)
+
+    assert worker.restarts >= 2
+    assert worker.exitcode == 3
+
+
+def test_spawned_process_does_not_open_log_file():
+    """Тест: Процесс, созданный методом spawn, не открывает файл лога и не запускает поток записи лога."""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=report_logging, args=(results,))
+    process.start()
+    try:
+        assert results.get(timeout=60) == (True, True, False)
+    finally:
+        process.join(30)
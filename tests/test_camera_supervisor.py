@@ -0,0 +1,132 @@
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+from Video import CameraSupervisor, connection
+
+
+class FlakyCapture:
+    """Камера, которая присылает frames кадров, а затем перестает отвечать."""
+
+    def __init__(self, frames, opened=True):
+        self.frames = frames
+        self.count = 0
+        self.opened = opened
+        self.released = False
+
+    def read(self):
+        time.sleep(0.005)
+        if self.count >= self.frames:
+            return False, None
+        self.count += 1
+        return True, self.count
+
+    def grab(self):
+        return self.opened
+
+    def isOpened(self):
+        return self.opened
+
+    def get(self, prop):
+        return 0
+
+    def release(self):
+        self.released = True
+
+
+def read_until(supervisor, condition, limit=2.0):
+    """Читает кадры, пока не выполнится условие, и возвращает полученные кадры."""
+    frames = []
+    deadline = time.monotonic() + limit
+    while not condition(frames) and time.monotonic() < deadline:
+        ret, frame = supervisor.read()
+        if ret:
+            frames.append(frame)
+    return frames
+
+
+def test_supervisor_reconnects_after_stall():
+    """Тест: Если камера перестала присылать кадры, она закрывается и открывается заново."""
+    first, second = FlakyCapture(frames=2), FlakyCapture(frames=100)
+    stop_event = threading.Event()
+    with patch('Video.open_camera', return_value=second) as mock_open:
+        supervisor = CameraSupervisor('ip', 640, 480, 0, read_timeout=0.1, stop_event=stop_event).start(first)
+        frames = read_until(supervisor, lambda frames: len(frames) >= 4)
+        supervisor.release()
+
+    assert frames[:2] == [1, 2]
+    assert len(frames) >= 4
+    mock_open.assert_called_once_with('ip', 640, 480)
+    assert first.released and second.released
+    stats = supervisor.stats()
+    assert stats['outages'] == 1
+    assert stats['reconnects'] == 1
+    assert stats['outage_total'] >= 0
+    assert not stats['connected']
+
+
+def test_supervisor_backs_off_exponentially():
+    """Тест: Задержка между неудачными попытками подключения растет вдвое до backoff_max."""
+    stop_event = MagicMock()
+    stop_event.is_set.return_value = False
+    dead = [FlakyCapture(0, opened=False) for _ in range(4)]
+    with patch('Video.open_camera', side_effect=dead + [FlakyCapture(100)]):
+        supervisor = CameraSupervisor('ip', 640, 480, 1, read_timeout=0.1, backoff_initial=1.0, backoff_max=3.0,
+                                      stop_event=stop_event)
+        supervisor._outage_start = time.monotonic()
+        assert supervisor._reconnect()
+        supervisor.release()
+
+    assert [c.args[0] for c in stop_event.wait.call_args_list] == [1.0, 2.0, 3.0, 3.0]
+    assert all(capture.released for capture in dead)
+    assert supervisor.reconnects == 1
+
+
+def test_supervisor_stops_reconnecting_on_stop_event():
+    """Тест: При сигнале остановки попытки подключения прекращаются, и read() возвращает False."""
+    stop_event = threading.Event()
+    stop_event.set()
+    with patch('Video.open_camera') as mock_open:
+        supervisor = CameraSupervisor('ip', 640, 480, 2, stop_event=stop_event)
+        assert supervisor.read() == (False, None)
+
+    mock_open.assert_not_called()
+
+
+def test_supervisor_reconnect_does_not_hang_on_stalled_camera():
+    """Тест: Зависшее открытие камеры прерывается по read_timeout, и переподключение продолжается с задержкой."""
+    unblock = threading.Event()
+    stop_event = threading.Event()
+    def stalled_open(ip, width, height):
+        unblock.wait()  # Камера "зависла" при открытии
+        return FlakyCapture(0, opened=False)
+    stop_event.wait = MagicMock(side_effect=lambda delay: stop_event.set())
+    try:
+        with patch('Video.open_camera', side_effect=stalled_open):
+            supervisor = CameraSupervisor('ip', 640, 480, 3, read_timeout=0.1, stop_event=stop_event)
+            supervisor._outage_start = time.monotonic()
+            start = time.monotonic()
+            assert not supervisor._reconnect()
+    finally:
+        unblock.set()
+
+    assert time.monotonic() - start < 2
+    stop_event.wait.assert_called_once_with(supervisor.backoff_initial)
+
+
+def test_connection_wraps_camera_in_supervisor():
+    """Тест: connection с включенным [Supervisor] передает в capture_and_save CameraSupervisor с таймаутом connection."""
+    mock_cap = MagicMock()
+    mock_cap.grab.return_value = True
+    mock_cap.read.return_value = (True, object())
+    with patch('Video.cv2.VideoCapture', return_value=mock_cap), \
+            patch('Video.capture_and_save') as mock_capture_and_save:
+        connection('test_ip', 30, 'test_folder', 640, 480, 0, 1, timeout=5, stop_event=threading.Event(),
+                   supervisor={'enabled': True, 'backoff_initial': 0.5, 'backoff_max': 4.0})
+
+    supervisor = mock_capture_and_save.call_args.args[0]
+    assert isinstance(supervisor, CameraSupervisor)
+    assert (supervisor.read_timeout, supervisor.backoff_initial, supervisor.backoff_max) == (5, 0.5, 4.0)
+    supervisor.release()
+    mock_cap.release.assert_called_once()
@@ -55,7 +55,8 @@ def mock_time(mocker):
     """Мокает функции time."""
     mock_sleep = mocker.patch('Video.time.sleep')
     mock_perf_counter = mocker.patch('Video.time.perf_counter', side_effect=[1.0, 1.1, 1.2, 1.3, 1.4, 1.5, 1.6])
-    return {'sleep': mock_sleep, 'perf_counter': mock_perf_counter}
+    mock_monotonic = mocker.patch('Video.time.monotonic', return_value=10.0)
+    return {'sleep': mock_sleep, 'perf_counter': mock_perf_counter, 'monotonic': mock_monotonic}
 
 @pytest.fixture
 def mock_position_window(mocker):
@@ -110,8 +111,10 @@ def test_capture_and_save_creates_dir_saves_frames_and_cleans_up(
     mock_cv2.imshow.assert_called_with(f"Camera {index + 1}", ANY)
     mock_position_window.assert_called_with(f"Camera {index + 1}", index)
 
-    assert mock_time['sleep'].call_count == num_frames_to_capture
-    assert mock_time['perf_counter'].call_count >= num_frames_to_capture * 2
+    # Первый кадр выдается сразу, перед остальными ожидается дедлайн следующего слота
+    assert mock_time['sleep'].call_count == num_frames_to_capture - 1
+    mock_time['sleep'].assert_any_call(pytest.approx(1 / fps))
+    assert mock_time['perf_counter'].call_count >= num_frames_to_capture
 
     mock_cap.release_mock.assert_called_once()
 
@@ -150,7 +153,7 @@ def test_capture_and_save_handles_zero_fps(
 ):
     """
     Тестирует случай с fps = 0, чтобы убедиться в отсутствии деления на ноль
-    и правильной логике time.sleep.
+    и отсутствии пауз между кадрами.
     """
     num_frames_to_capture = 2
     folder_name = tmp_path / "test_output_zero_fps"
@@ -177,6 +180,59 @@ def test_capture_and_save_handles_zero_fps(
 
     assert mock_cv2.imwrite.call_count == num_frames_to_capture
 
-    mock_time['sleep'].assert_has_calls([call(0)] * num_frames_to_capture)
+    mock_time['sleep'].assert_not_called()
+
+    mock_cap.release_mock.assert_called_once()
+
 
+def test_capture_and_save_hands_frames_to_writer(
+    tmp_path, mock_cv2, mock_os, mock_time, mock_position_window
+):
+    """
+    Тестирует, что при заданном пуле записи кадры передаются в пул,
+    а cv2.imwrite в цикле захвата не вызывается.
+    """
+    folder_name = tmp_path / "test_output_writer"
+    stop_event = threading.Event()
+    writer = MagicMock()
+
+    frames = [MagicMock(name=f"frame_{i}") for i in range(2)]
+    mock_cap = MockVideoCapture()
+    def read_and_stop():
+        frame = frames[mock_cap._read_count]
+        mock_cap._read_count += 1
+        if mock_cap._read_count >= len(frames):
+            stop_event.set()
+        return True, frame
+    mock_cap.read_side_effect = read_and_stop
+
+    capture_and_save(mock_cap, str(folder_name), 30, 2, 400, stop_event, writer=writer)
+
+    writer.register.assert_called_once_with(2, ANY)
+    assert writer.submit.call_args_list == [call(2, 0, frames[0], ANY), call(2, 1, frames[1], ANY)]
+    writer.close_camera.assert_called_once_with(2)
+    mock_cv2.imwrite.assert_not_called()
     mock_cap.release_mock.assert_called_once()
+
+
+def test_capture_and_save_sends_frames_to_display(
+    tmp_path, mock_cv2, mock_os, mock_time, mock_position_window
+):
+    """
+    Тестирует, что при общем окне предпросмотра кадры передаются в него,
+    а HighGUI из потока захвата не вызывается.
+    """
+    stop_event = threading.Event()
+    display = MagicMock()
+    mock_cap = MockVideoCapture()
+    def read_and_stop():
+        stop_event.set()
+        return True, "frame"
+    mock_cap.read_side_effect = read_and_stop
+
+    capture_and_save(mock_cap, str(tmp_path), 30, 1, 500, stop_event, display=display)
+
+    display.update.assert_called_once_with(1, "frame", ANY)
+    mock_cv2.imshow.assert_not_called()
+    mock_cv2.waitKey.assert_not_called()
+    mock_position_window.assert_not_called()
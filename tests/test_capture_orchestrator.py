@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+from Video import CaptureOrchestrator
+
+CAMERAS = [{'index': 0, 'source': 'cam1', 'folder': 'f1', 'fps': 10, 'width': 640, 'height': 480},
+           {'index': 1, 'source': 'cam2', 'folder': 'f2', 'fps': 10, 'width': 640, 'height': 480}]
+
+
+def test_orchestrator_handles_error_events_until_stop():
+    """Тест: Ошибка камеры приходит событием в обработчик, остановка из другого потока завершает run()."""
+    stop_event = threading.Event()
+    orchestrator = CaptureOrchestrator(CAMERAS, 1, interactive=False, shutdown_timeout=2, stop_event=stop_event)
+
+    def fake_connection(source, *args, **kwargs):
+        if source == 'cam2':
+            kwargs['errors_queue'].put(1)  # Камера 2 не подключилась
+        else:
+            stop_event.wait()  # Камера 1 записывает до остановки
+
+    handled = []
+    def fake_error_handling(errors, stop, display, interactive):
+        handled.append(errors.get())
+        threading.Timer(0.05, orchestrator.stop).start()  # Остановка по API из стороннего потока
+
+    with patch('Video.connection', side_effect=fake_connection), \
+            patch('Video.error_handling', side_effect=fake_error_handling):
+        completed = asyncio.run(orchestrator.run())
+
+    assert completed
+    assert handled == [1]
+    assert orchestrator.failed == [1]
+    assert all(job.done() for job in orchestrator.camera_jobs.values())
+
+
+def test_orchestrator_shutdown_is_bounded_with_stuck_camera():
+    """Тест: Зависший поток камеры не задерживает завершение дольше shutdown_timeout, пул записи закрывается."""
+    stop_event = threading.Event()
+    stop_event.set()
+    writer = MagicMock()
+    hang = threading.Event()
+    orchestrator = CaptureOrchestrator(CAMERAS[:1], 1, writer, interactive=False, shutdown_timeout=0.2, stop_event=stop_event)
+
+    with patch('Video.connection', side_effect=lambda *args, **kwargs: hang.wait()):
+        start = time.monotonic()
+        completed = asyncio.run(orchestrator.run())
+        elapsed = time.monotonic() - start
+    hang.set()
+
+    assert not completed
+    assert elapsed < 1
+    writer.close.assert_called_once()
+
+
+def test_orchestrator_camera_lifecycle_is_awaitable():
+    """Тест: Завершение потока камеры можно ожидать через wait_camera()."""
+    stop_event = threading.Event()
+    release = threading.Event()
+    orchestrator = CaptureOrchestrator(CAMERAS, 1, interactive=False, stop_event=stop_event)
+
+    async def scenario():
+        task = asyncio.create_task(orchestrator.run())
+        await asyncio.sleep(0.05)
+        release.set()  # Камеры завершают работу
+        await asyncio.wait_for(orchestrator.wait_camera(0), 1)
+        await asyncio.wait_for(orchestrator.wait_camera(1), 1)
+        orchestrator.stop()
+        return await task
+
+    with patch('Video.connection', side_effect=lambda *args, **kwargs: release.wait()):
+        assert asyncio.run(scenario())
+
+
+def test_orchestrator_synchronized_mode_uses_single_job():
+    """Тест: В синхронном режиме все камеры захватываются одним координатором synchronized_connection."""
+    stop_event = threading.Event()
+    orchestrator = CaptureOrchestrator(CAMERAS, 5, capture={'synchronized': True}, interactive=False, stop_event=stop_event)
+
+    with patch('Video.synchronized_connection', side_effect=lambda *args, **kwargs: stop_event.set()) as mock_sync, \
+            patch('Video.connection') as mock_connection:
+        asyncio.run(orchestrator.run())
+
+    mock_connection.assert_not_called()
+    assert mock_sync.call_args.args[0] == ['cam1', 'cam2']
+    assert mock_sync.call_args.args[5] == [0, 1]
+    assert orchestrator.camera_jobs[0] is orchestrator.camera_jobs[1]
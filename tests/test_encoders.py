@@ -0,0 +1,82 @@
+import numpy as np
+import cv2
+import pytest
+
+from Video import ThreadEncoder, ProcessEncoder, create_encoder
+
+
+@pytest.fixture
+def frame():
+    """Тестовый кадр с градиентом."""
+    gradient = np.tile(np.arange(160, dtype=np.uint8), (120, 1))
+    return np.dstack([gradient, gradient[::-1], gradient])
+
+
+def test_thread_encoder_returns_decodable_jpeg(frame):
+    """Тест: ThreadEncoder возвращает корректный JPEG исходного размера."""
+    data = ThreadEncoder(quality=90).encode(frame)
+
+    decoded = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    assert data[:2] == b'\xff\xd8'
+    assert decoded.shape == frame.shape
+
+
+def test_process_encoder_matches_thread_encoder(frame):
+    """Тест: Кодирование в пуле процессов через разделяемую память дает тот же результат, что и в потоке."""
+    encoder = ProcessEncoder(processes=2, quality=90)
+    try:
+        first = encoder.encode(frame)
+        # Кадр большего размера должен заменить блок разделяемой памяти
+        large = cv2.resize(frame, (320, 240))
+        second = encoder.encode(large)
+    finally:
+        encoder.close()
+
+    assert first == ThreadEncoder(quality=90).encode(frame)
+    assert cv2.imdecode(np.frombuffer(second, np.uint8), cv2.IMREAD_COLOR).shape == large.shape
+
+
+def test_create_encoder_selects_backend(mocker):
+    """Тест: create_encoder выбирает кодировщик по названию и откатывается на потоки при ошибке."""
+    assert isinstance(create_encoder('thread'), ThreadEncoder)
+    assert isinstance(create_encoder('unknown'), ThreadEncoder)
+
+    mocker.patch('Video.ProcessEncoder', side_effect=OSError("No processes"))
+    assert isinstance(create_encoder('process'), ThreadEncoder)
+
+
+def test_encode_shared_frame_detaches_released_memory(frame, mocker):
+    """Тест: Процесс пула отключается от удаленных блоков разделяемой памяти, переданных с заданием."""
+    from multiprocessing import shared_memory
+    import Video
+
+    mocker.patch.dict(Video._attached_memory, clear=True)
+    mocker.patch('multiprocessing.resource_tracker.unregister')  # Блоки созданы этим же процессом
+    blocks = [shared_memory.SharedMemory(create=True, size=frame.nbytes) for _ in range(2)]
+    try:
+        for block in blocks:
+            np.ndarray(frame.shape, dtype=frame.dtype, buffer=block.buf)[...] = frame
+            Video._encode_shared_frame(block.name, frame.shape, frame.dtype.str, 90)
+        assert set(Video._attached_memory) == {block.name for block in blocks}
+
+        data = Video._encode_shared_frame(blocks[1].name, frame.shape, frame.dtype.str, 90, (blocks[0].name,))
+        assert set(Video._attached_memory) == {blocks[1].name}
+        assert data == ThreadEncoder(quality=90).encode(frame)
+    finally:
+        for memory in Video._attached_memory.values():
+            memory.close()
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+
+def test_process_encoder_uses_spawn_and_reports_released_blocks(frame):
+    """Тест: Пул создается методом spawn, а имена замененных блоков памяти запоминаются для процессов пула."""
+    encoder = ProcessEncoder(processes=1, quality=90)
+    try:
+        encoder.encode(frame)
+        encoder.encode(cv2.resize(frame, (320, 240)))  # Блок заменяется большим
+        assert encoder._pool._ctx.get_start_method() == 'spawn'
+        assert len(encoder._released) == 1
+    finally:
+        encoder.close()
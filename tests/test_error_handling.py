@@ -67,3 +67,26 @@ def test_error_handling_exception(mock_show_error, mock_thread, mock_askyesno, e
     assert "Непредвиденная ошибка в error_handling: Test Exception" in caplog.text
     mock_thread.assert_not_called()
     mock_show_error.assert_not_called()
+
+
+@patch('Video.messagebox.askyesno', return_value=True)
+@patch('Video.threading.Thread')
+def test_error_handling_continue_with_display(mock_thread, mock_askyesno, errors_queue, stop_event):
+    """Тест: При общем окне предпросмотра ошибка отображается плиткой без отдельного потока."""
+    display = Mock()
+    errors_queue.put(2)
+    error_handling(errors_queue, stop_event, display)
+    display.mark_failed.assert_called_once_with(2)
+    mock_thread.assert_not_called()
+
+
+@patch('Video.messagebox.askyesno')
+@patch('Video.threading.Thread')
+def test_error_handling_non_interactive(mock_thread, mock_askyesno, errors_queue, stop_event, caplog):
+    """Тест: Без графического интерфейса ошибка записывается в лог, работа продолжается без диалога."""
+    errors_queue.put(0)
+    error_handling(errors_queue, stop_event, interactive=False)
+    mock_askyesno.assert_not_called()
+    mock_thread.assert_not_called()
+    assert not stop_event.is_set()
+    assert "Не удалось открыть камеру 1" in caplog.text
@@ -0,0 +1,96 @@
+import os
+import cv2
+import numpy as np
+import pytest
+
+from Video import collect_frames, export_clip, export_recordings, recorded_fps, create_sink, ArchiveSink, ThreadEncoder
+
+
+def make_frame(value, size=(32, 24)):
+    return np.full((size[1], size[0], 3), value, dtype=np.uint8)
+
+
+def read_video(path):
+    capture = cv2.VideoCapture(str(path))
+    frames = []
+    while True:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        frames.append(frame)
+    fps = capture.get(cv2.CAP_PROP_FPS)
+    capture.release()
+    return frames, fps
+
+
+def write_jpeg_folder(folder, session, count, start_time=1000.0):
+    """Сохраняет кадры с яркостью 10 * n в раскладке flat, время изменения файлов - время захвата с шагом 0,1 с."""
+    folder.mkdir(exist_ok=True)
+    for i in range(count):
+        path = folder / f"{session} frame_{i}.jpg"
+        cv2.imwrite(str(path), make_frame(i * 10))
+        os.utime(path, (start_time + i * 0.1, start_time + i * 0.1))
+
+
+def test_collect_frames_filters_by_time_and_frame_range(tmp_path):
+    """Тест: Кадры JPG-файлов и архива находятся по интервалу времени и диапазону номеров в порядке номеров."""
+    write_jpeg_folder(tmp_path / "flat", 1, 10)
+    (tmp_path / "flat" / "2 frame_0.jpg").write_bytes(b'other session')
+    sink = ArchiveSink(str(tmp_path / "archive"), 1)
+    for i in range(10):
+        sink.append(i, f'jpeg-{i}'.encode(), 2000.0 + i)
+    sink.close()
+
+    flat = collect_frames(str(tmp_path / "flat"), 1, start=1000.25, end=1000.75)
+    archive = collect_frames(str(tmp_path / "archive"), 1, start=2002.0, first_frame=5, last_frame=7)
+
+    assert [frame for frame, *_ in flat] == [3, 4, 5, 6, 7]
+    assert [frame for frame, *_ in archive] == [5, 6, 7]
+    _, timestamp, path, offset, size = archive[0]
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        assert f.read(size) == b'jpeg-5'
+    assert timestamp == 2005.0
+
+
+def test_collect_frames_finds_sharded_layout(tmp_path):
+    """Тест: Кадры раскладки sharded находятся в папке сессии."""
+    sink = create_sink(str(tmp_path), 4, 10, recording={'layout': 'sharded'})
+    for i in range(3):
+        sink.write(i, make_frame(i), 1000.0 + i * 3600)  # Кадры в разных папках часа
+    sink.close()
+
+    assert [frame for frame, *_ in collect_frames(str(tmp_path), 4)] == [0, 1, 2]
+
+
+def test_export_clip_keeps_order_with_parallel_decoding(tmp_path):
+    """Тест: При декодировании в нескольких потоках кадры попадают в видео по порядку, FPS определяется по времени захвата."""
+    write_jpeg_folder(tmp_path / "cam", 1, 20)
+    frames = collect_frames(str(tmp_path / "cam"), 1)
+
+    result = export_clip(frames, str(tmp_path / "clip.avi"), workers=4)
+
+    video, fps = read_video(tmp_path / "clip.avi")
+    assert result['frames'] == 20 and result['skipped'] == 0
+    assert result['max_buffered'] <= 16
+    assert fps == pytest.approx(10, abs=0.1)
+    assert [int(round(frame.mean() / 10)) for frame in video] == list(range(20))
+
+
+def test_recorded_fps_uses_median_interval():
+    """Тест: Перерыв в записи не влияет на FPS, одинаковое время кадров дает FPS 1."""
+    assert recorded_fps([0.0, 0.2, 0.4, 0.6, 60.0, 60.2]) == pytest.approx(5)
+    assert recorded_fps([5.0, 5.0]) == 1.0
+
+
+def test_export_recordings_uses_camera_folders_from_settings(tmp_path, capsys):
+    """Тест: Команда экспорта находит папку камеры по settings.ini и сообщает о камерах без кадров."""
+    write_jpeg_folder(tmp_path / "cam1", 3, 5)
+    config = tmp_path / "settings.ini"
+    config.write_text(f"[Camera1]\nsource = 0\nfolder = {tmp_path / 'cam1'}\n[Camera2]\nsource = 1\nfolder = {tmp_path / 'cam2'}\n")
+
+    assert export_recordings([1, 2], 3, str(tmp_path / "out"), first_frame=1, config_file=str(config)) is False
+
+    video, _ = read_video(tmp_path / "out" / "3 camera_1.avi")
+    assert len(video) == 4
+    assert 'Камера 2: кадры сессии 3' in capsys.readouterr().out
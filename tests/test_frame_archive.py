@@ -0,0 +1,115 @@
+import os
+import numpy as np
+import pytest
+
+from Video import ArchiveSink, FrameArchiveReader, folder_to_archive, archive_to_folder, archive_paths, create_sink
+
+
+def test_archive_sink_and_reader_roundtrip(tmp_path):
+    """Тест: Кадры дописываются в архив и читаются по номеру, пропущенные номера возвращают None."""
+    sink = ArchiveSink(str(tmp_path), 3)
+    sink.append(0, b'frame-0', 100.0)
+    sink.append(1, b'frame-1', 100.5)
+    sink.append(4, b'frame-4', 102.0)  # Кадры 2 и 3 отброшены
+    sink.close()
+
+    with FrameArchiveReader(str(tmp_path), 3) as reader:
+        assert len(reader) == 5
+        assert reader.read_frame(0) == b'frame-0'
+        assert reader.read_frame(1) == b'frame-1'
+        assert reader.read_frame(2) is None
+        assert reader.read_frame(4) == b'frame-4'
+        assert reader.read_frame(5) is None
+
+
+def test_archive_sink_close_is_idempotent(tmp_path):
+    """Тест: Повторное закрытие архива не вызывает ошибку."""
+    sink = ArchiveSink(str(tmp_path), 1)
+    sink.append(0, b'frame-0', 100.0)
+    sink.close()
+    sink.close()
+
+    with FrameArchiveReader(str(tmp_path), 1) as reader:
+        assert reader.read_frame(0) == b'frame-0'
+
+
+def test_archive_reader_iterates_time_range(tmp_path):
+    """Тест: Кадры за интервал времени находятся по индексу."""
+    sink = ArchiveSink(str(tmp_path), 1)
+    for i in range(10):
+        sink.append(i, f'frame-{i}'.encode(), 1000.0 + i)
+    sink.close()
+
+    with FrameArchiveReader(str(tmp_path), 1) as reader:
+        frames = list(reader.iter_time_range(1003.0, 1005.5))
+
+    assert [(number, timestamp) for number, timestamp, _ in frames] == [(3, 1003.0), (4, 1004.0), (5, 1005.0)]
+    assert frames[0][2] == b'frame-3'
+
+
+def test_archive_sink_appends_to_existing_archive(tmp_path):
+    """Тест: Повторное открытие архива продолжает его, а не перезаписывает."""
+    sink = ArchiveSink(str(tmp_path), 2)
+    sink.append(0, b'a', 1.0)
+    sink.close()
+
+    sink = ArchiveSink(str(tmp_path), 2)
+    assert sink.next_frame == 1
+    sink.append(1, b'bb', 2.0)
+    sink.close()
+
+    with FrameArchiveReader(str(tmp_path), 2) as reader:
+        assert [reader.read_frame(i) for i in range(len(reader))] == [b'a', b'bb']
+
+
+def test_folder_archive_conversion_roundtrip(tmp_path):
+    """Тест: JPG-файлы упаковываются в архив и распаковываются обратно без изменений."""
+    source = tmp_path / "source"
+    source.mkdir()
+    for i in (0, 1, 3):
+        path = source / f"7 frame_{i}.jpg"
+        path.write_bytes(f'jpeg-{i}'.encode())
+        os.utime(path, (500.0 + i, 500.0 + i))
+    (source / "8 frame_0.jpg").write_bytes(b'other session')
+
+    assert folder_to_archive(str(source), 7, str(tmp_path / "archive")) == 3
+
+    target = tmp_path / "target"
+    assert archive_to_folder(str(tmp_path / "archive"), 7, str(target)) == 3
+    assert sorted(os.listdir(target)) == ["7 frame_0.jpg", "7 frame_1.jpg", "7 frame_3.jpg"]
+    assert (target / "7 frame_3.jpg").read_bytes() == b'jpeg-3'
+    assert os.path.getmtime(target / "7 frame_3.jpg") == pytest.approx(503.0)
+
+
+def test_create_sink_archive_mode_encodes_frames(tmp_path):
+    """Тест: В режиме archive кадры кодируются в JPEG и декодируются читателем."""
+    sink = create_sink(str(tmp_path), 4, 10, recording={'mode': 'archive'})
+    frame = np.full((24, 32, 3), 128, dtype=np.uint8)
+    sink.write(0, frame, 10.0)
+    sink.close()
+
+    with FrameArchiveReader(str(tmp_path), 4) as reader:
+        assert reader.decode_frame(0).shape == frame.shape
+    assert all(os.path.exists(path) for path in archive_paths(str(tmp_path), 4))
+
+
+def test_archive_sink_recovers_torn_index(tmp_path):
+    """Тест: Неполная запись в конце индекса после аварийного завершения отрезается, новые записи читаются корректно."""
+    sink = ArchiveSink(str(tmp_path), 1)
+    for i in range(3):
+        sink.append(i, f'frame-{i}'.encode(), 10.0 + i)
+    sink.close()
+    data_path, index_path = archive_paths(str(tmp_path), 1)
+    os.truncate(index_path, os.path.getsize(index_path) - 7)  # Запись кадра 2 оборвана
+    with open(data_path, 'ab') as f:
+        f.write(b'garbage')  # Данные без записи в индексе
+
+    sink = ArchiveSink(str(tmp_path), 1)
+    assert sink.next_frame == 2
+    sink.append(2, b'new-2', 12.0)
+    sink.append(3, b'new-3', 13.0)
+    sink.close()
+
+    with FrameArchiveReader(str(tmp_path), 1) as reader:
+        assert [reader.read_frame(i) for i in range(len(reader))] == [b'frame-0', b'frame-1', b'new-2', b'new-3']
+        assert float(reader.index['timestamp'][3]) == 13.0
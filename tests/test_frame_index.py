@@ -0,0 +1,80 @@
+import time
+import numpy as np
+import pytest
+
+from Video import FrameIndex, FrameWriter, FrameArchiveReader, frame_index_path
+
+
+def make_frame():
+    return np.zeros((24, 32, 3), dtype=np.uint8)
+
+
+def test_frame_index_queries_camera_time_range(tmp_path):
+    """Тест: Кадры находятся по камере и интервалу времени в порядке времени захвата."""
+    index = FrameIndex(frame_index_path(str(tmp_path), 5), batch_size=3)
+    for i in range(10):
+        index.add(0, i, 1000.0 + i, f'cam1/{i}.jpg', 0, 100 + i)
+        index.add(1, i, 1000.5 + i, 'cam2.pack', i * 10, 10)
+
+    frames = index.query(0, 1003.0, 1005.0)
+
+    assert frames == [(3, 1003.0, 'cam1/3.jpg', 0, 103), (4, 1004.0, 'cam1/4.jpg', 0, 104), (5, 1005.0, 'cam1/5.jpg', 0, 105)]
+    assert index.cameras() == {0: (10, 1000.0, 1009.0), 1: (10, 1000.5, 1009.5)}
+    index.close()
+
+
+def test_frame_index_batches_inserts_and_persists(tmp_path):
+    """Тест: Записи добавляются в базу пачками по batch_size, а после закрытия доступны при повторном открытии."""
+    path = frame_index_path(str(tmp_path / "index"), 1)
+    index = FrameIndex(path, batch_size=4)
+    for i in range(6):
+        index.add(2, i, float(i), 'f.jpg', 0, 1)
+
+    assert len(index._pending) == 2  # Первые 4 записи уже в базе
+    index.close()
+
+    reopened = FrameIndex(path)
+    assert [frame for frame, *_ in reopened.query(2, 0.0, 10.0)] == list(range(6))
+    reopened.close()
+
+
+def test_frame_index_query_is_fast_for_multi_day_session(tmp_path):
+    """Тест: Поиск кадров за минуту в многодневной сессии нескольких камер выполняется за миллисекунды."""
+    index = FrameIndex(str(tmp_path / "big.sqlite"), batch_size=50000)
+    for camera in range(4):
+        for i in range(50000):
+            index.add(camera, i, i * 5.0, 'x.pack', i, 1)  # Кадр каждые 5 секунд - почти 3 дня
+    index.flush()
+
+    start = time.perf_counter()
+    frames = index.query(2, 100000.0, 100060.0)
+    elapsed = time.perf_counter() - start
+
+    assert len(frames) == 13
+    assert elapsed < 0.05
+    index.close()
+
+
+@pytest.mark.parametrize("mode", ['jpeg', 'segments', 'archive'])
+def test_frame_writer_registers_written_frames(tmp_path, mode):
+    """Тест: Каждый записанный кадр регистрируется в индексе с файлом и смещением для всех режимов записи."""
+    index = FrameIndex(str(tmp_path / "index.sqlite"))
+    writer = FrameWriter(num_threads=1, recording={'mode': mode}, frame_index=index)
+    writer.register(3, writer.create_sink(str(tmp_path / "cam"), 7, 10, index=3))
+    for i in range(3):
+        writer.submit(3, i, make_frame(), 100.0 + i)
+    writer.close()
+
+    frames = index.query(3, 0.0, 200.0)
+    assert [(frame, timestamp) for frame, timestamp, *_ in frames] == [(0, 100.0), (1, 101.0), (2, 102.0)]
+    if mode == 'jpeg':
+        assert frames[1][2].endswith('7 frame_1.jpg') and frames[1][4] > 0
+    elif mode == 'segments':
+        assert [offset for *_, offset, size in frames] == [0, 1, 2]
+    else:
+        with FrameArchiveReader(str(tmp_path / "cam"), 7) as reader:
+            _, _, path, offset, size = frames[2]
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                assert f.read(size) == reader.read_frame(2)
+    index.close()
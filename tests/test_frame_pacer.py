@@ -0,0 +1,94 @@
+import pytest
+
+from Video import FramePacer
+
+
+class FakeClock:
+    """Часы для подмены time.monotonic и time.sleep: sleep сдвигает время без ожидания."""
+
+    def __init__(self, start=100.0):
+        self.now = start
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(mocker):
+    fake = FakeClock()
+    mocker.patch('Video.time.monotonic', side_effect=fake.monotonic)
+    mocker.patch('Video.time.sleep', side_effect=fake.sleep)
+    return fake
+
+
+def test_pacer_keeps_rate_without_accumulating_error(clock):
+    """Тест: Кадры выдаются по сетке дедлайнов, время обработки кадра вычитается из паузы."""
+    pacer = FramePacer(10)
+
+    for _ in range(5):
+        pacer.wait()
+        clock.now += 0.03  # Обработка кадра занимает 30 мс
+
+    assert clock.sleeps == [pytest.approx(0.07)] * 4
+    stats = pacer.stats()
+    assert stats['ticks'] == 5
+    assert stats['achieved_fps'] == pytest.approx(10)
+    assert stats['missed'] == 0
+    assert stats['jitter_max_ms'] == pytest.approx(0, abs=1e-6)
+    assert stats['jitter_hist']['<1ms'] == 4
+
+
+def test_pacer_drop_policy_skips_missed_slots_and_keeps_phase(clock):
+    """Тест: Политика drop пропускает опоздавшие слоты, следующий кадр ждет ближайший слот исходной сетки."""
+    pacer = FramePacer(10, 'drop')
+    pacer.wait()  # Слот 100.0
+    clock.now += 0.35  # Кадр обрабатывался 350 мс
+
+    assert pacer.wait() == 2  # Слоты 100.1 и 100.2 пропущены, кадр слота 100.3 выдается сразу
+    pacer.wait()
+
+    assert clock.sleeps == [pytest.approx(0.05)]  # Ждем слота 100.4
+    assert clock.now == pytest.approx(100.4)
+    assert pacer.stats()['missed'] == 2
+
+
+def test_pacer_catchup_policy_bursts_then_rebases(clock):
+    """Тест: Политика catchup догоняет опоздание кадрами без паузы, но не дольше max_burst кадров."""
+    pacer = FramePacer(10, 'catchup', max_burst=2)
+    pacer.wait()
+    clock.now += 0.45  # Отставание больше чем на 3 периода
+
+    results = [pacer.wait() for _ in range(4)]
+
+    assert results == [0, 0, 1, 0]  # Два кадра догоняют, затем сетка сдвигается на текущий момент
+    assert clock.sleeps == [pytest.approx(0.1)]
+
+
+def test_pacer_latest_policy_restarts_grid(clock):
+    """Тест: Политика latest начинает сетку заново от момента опоздавшего кадра."""
+    pacer = FramePacer(10, 'latest')
+    pacer.wait()
+    clock.now += 0.25
+
+    assert pacer.wait() == 1  # Слот 100.1 пропущен, кадр выдается сразу
+    pacer.wait()
+
+    assert clock.sleeps == [pytest.approx(0.1)]
+    assert clock.now == pytest.approx(100.35)
+
+
+def test_pacer_unknown_policy_and_zero_fps(clock):
+    """Тест: Неизвестная политика заменяется на drop, при fps = 0 пауз нет."""
+    assert FramePacer(10, 'unknown').policy == 'drop'
+
+    pacer = FramePacer(0)
+    for _ in range(3):
+        assert pacer.wait() == 0
+
+    assert clock.sleeps == []
+    assert pacer.stats()['ticks'] == 3
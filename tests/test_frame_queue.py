@@ -0,0 +1,115 @@
+import threading
+import numpy as np
+import pytest
+
+from Video import FrameQueue, FrameWriter, PipelineMetrics
+
+
+def make_frame(size=10, value=0):
+    """Создает кадр size x size x 3 (size * size * 3 байт)."""
+    return np.full((size, size, 3), value, dtype=np.uint8)
+
+
+def test_frame_queue_drops_newest_over_byte_budget():
+    """Тест: Кадр, не помещающийся в бюджет камеры, отбрасывается, а максимум заполнения сохраняется."""
+    frames = FrameQueue(maxsize=10, max_bytes=700, policy='drop_newest')  # Помещаются два кадра по 300 байт
+
+    assert frames.put(0, make_frame(), 0.0)
+    assert frames.put(1, make_frame(), 0.1)
+    assert not frames.put(2, make_frame(), 0.2)
+    assert frames.get_nowait()[0] == 0
+    frames.task_done()
+
+    stats = frames.stats()
+    assert stats['queue_depth'] == 1 and stats['queue_bytes'] == 300
+    assert stats['high_water'] == 2 and stats['high_water_bytes'] == 600
+    assert stats['dropped'] == 1
+
+
+def test_frame_queue_drop_oldest_keeps_newest_frames():
+    """Тест: В политике drop_oldest новые кадры вытесняют старые, а join не ждет вытесненные кадры."""
+    frames = FrameQueue(maxsize=2, policy='drop_oldest')
+    for i in range(5):
+        assert frames.put(i, make_frame(), float(i))
+
+    numbers = []
+    while frames.qsize():
+        numbers.append(frames.get_nowait()[0])
+        frames.task_done()
+    frames.join()
+
+    assert numbers == [3, 4]
+    assert frames.stats()['dropped'] == 3
+
+
+def test_frame_queue_block_waits_for_free_space():
+    """Тест: В политике block поток захвата ждет, пока поток записи освободит место, а по таймауту кадр отбрасывается."""
+    frames = FrameQueue(maxsize=1, policy='block', block_timeout=2.0)
+    frames.put(0, make_frame(), 0.0)
+    consumer = threading.Timer(0.1, frames.get_nowait)
+    consumer.start()
+
+    assert frames.put(1, make_frame(), 0.1)
+    consumer.join()
+    assert frames.stats()['blocked_seconds'] >= 0.05
+
+    frames.block_timeout = 0.05
+    assert not frames.put(2, make_frame(), 0.2)
+    assert frames.stats()['dropped'] == 1
+
+
+def test_frame_queue_degrade_downscales_frames():
+    """Тест: В политике degrade кадр уменьшается, чтобы поместиться в бюджет памяти."""
+    frames = FrameQueue(maxsize=10, max_bytes=64 * 64 * 3 + 32 * 32 * 3, policy='degrade')
+
+    assert frames.put(0, make_frame(64), 0.0)
+    assert frames.put(1, make_frame(64), 0.1)
+    assert not frames.put(2, make_frame(64), 0.2)  # Даже уменьшенный в 4 раза кадр не помещается
+
+    assert frames.get_nowait()[1].shape == (64, 64, 3)
+    assert frames.get_nowait()[1].shape == (32, 32, 3)
+    assert frames.stats()['degraded'] == 1
+    assert frames.stats()['dropped'] == 1
+
+
+def test_frame_writer_rejects_degrade_for_size_sensitive_sinks():
+    """Тест: В режиме segments и при записи по движению политика degrade заменяется на drop_newest."""
+    for recording, motion in (({'mode': 'segments'}, None), (None, {'enabled': True})):
+        writer = FrameWriter(num_threads=1, recording=recording, motion=motion, queues={'policy': 'degrade'})
+        writer.close()
+        assert writer.queues['policy'] == 'drop_newest'
+
+    writer = FrameWriter(num_threads=1, queues={'policy': 'degrade'})
+    writer.close()
+    assert writer.queues['policy'] == 'degrade'
+
+
+def test_frame_writer_shares_global_budget_and_exports_metrics():
+    """Тест: Очереди камер пула записи ограничены общим бюджетом памяти, заполнение попадает в метрики."""
+    block_event = threading.Event()
+
+    class BlockingSink:
+        ordered = False
+
+        def write(self, frame_count, frame, timestamp):
+            block_event.wait()
+
+        def close(self):
+            pass
+
+    writer = FrameWriter(num_threads=1, queue_size=10, queues={'total_mb': 1000 / 1024 ** 2})
+    writer.register(0, BlockingSink())
+    writer.register(1, BlockingSink())
+    results = [writer.submit(i % 2, i, make_frame(), float(i)) for i in range(8)]
+
+    assert writer.budget.used <= 1000
+    assert results.count(False) >= 4
+    text = PipelineMetrics().render(writer)
+    assert f'videoproject_queue_memory_high_water_bytes {writer.budget.high_water}' in text
+    assert 'videoproject_queue_high_water_bytes{camera="1"}' in text
+
+    block_event.set()
+    writer.close()
+    assert writer.budget.used == 0
+    stats = writer.stats()
+    assert sum(camera['written'] + camera['dropped'] for camera in stats.values()) == 8
@@ -0,0 +1,107 @@
+import threading
+import pytest
+from unittest.mock import MagicMock
+
+from Video import FrameWriter, JpegFolderSink
+
+
+class RecordingSink:
+    """Приемник, запоминающий записанные кадры."""
+    ordered = True
+
+    def __init__(self, block_event=None):
+        self.frames = []
+        self.closed = False
+        self.block_event = block_event
+
+    def write(self, frame_count, frame, timestamp):
+        if self.block_event is not None:
+            self.block_event.wait()
+        self.frames.append(frame_count)
+
+    def close(self):
+        self.closed = True
+
+
+def test_frame_writer_writes_all_frames_in_order():
+    """Тест: Все переданные кадры записываются в приемник в порядке поступления."""
+    writer = FrameWriter(num_threads=3, queue_size=100)
+    sink = RecordingSink()
+    writer.register(0, sink)
+
+    for i in range(50):
+        assert writer.submit(0, i, object(), float(i))
+
+    writer.close()
+
+    assert sink.frames == list(range(50))
+    assert sink.closed
+    assert writer.stats()[0]['written'] == 50
+    assert writer.stats()[0]['dropped'] == 0
+
+
+def test_frame_writer_drops_frames_when_queue_is_full():
+    """Тест: При переполнении очереди кадры отбрасываются, а поток захвата не блокируется."""
+    block_event = threading.Event()
+    writer = FrameWriter(num_threads=1, queue_size=2)
+    sink = RecordingSink(block_event)
+    writer.register(0, sink)
+
+    results = [writer.submit(0, i, object(), float(i)) for i in range(10)]
+
+    assert results.count(False) >= 7
+    assert writer.stats()[0]['dropped'] == results.count(False)
+    assert writer.stats()[0]['queue_depth'] <= 2
+
+    block_event.set()
+    writer.close()
+    assert writer.stats()[0]['written'] == results.count(True)
+
+
+def test_frame_writer_counts_sink_errors():
+    """Тест: Ошибки приемника учитываются и не останавливают потоки пула."""
+    writer = FrameWriter(num_threads=1, queue_size=4)
+    sink = MagicMock()
+    sink.ordered = False
+    sink.write.side_effect = [Exception("Disk error"), None]
+    writer.register(1, sink)
+
+    writer.submit(1, 0, object(), 0.0)
+    writer.submit(1, 1, object(), 0.1)
+    writer.close()
+
+    assert writer.stats()[1]['errors'] == 1
+    assert writer.stats()[1]['written'] == 1
+    sink.close.assert_called_once()
+
+
+def test_frame_writer_closes_each_sink_once():
+    """Тест: Приемник, закрытый close_camera, не закрывается повторно при close(), а счетчики камеры сохраняются."""
+    writer = FrameWriter(num_threads=1)
+    sink = MagicMock()
+    sink.ordered = False
+    writer.register(0, sink)
+    writer.submit(0, 0, object(), 0.0)
+
+    writer.close_camera(0)
+    writer.close_camera(0)
+    writer.close()
+
+    sink.close.assert_called_once()
+    assert writer.stats()[0]['written'] == 1
+
+
+def test_jpeg_folder_sink_writes_named_file(tmp_path):
+    """Тест: Приемник кодирует кадр и сохраняет его в файл "{start_count} frame_{n}.jpg"."""
+    folder = tmp_path / "camera"
+    encoder = MagicMock()
+    encoder.encode.return_value = b"jpeg-bytes"
+    sink = JpegFolderSink(str(folder), 7, encoder)
+    frame = object()
+
+    written = sink.write(12, frame, 0.0)
+
+    assert folder.is_dir()
+    encoder.encode.assert_called_once_with(frame)
+    assert (folder / "7 frame_12.jpg").read_bytes() == b"jpeg-bytes"
+    assert written == len(b"jpeg-bytes")
@@ -0,0 +1,73 @@
+import pytest
+from unittest.mock import patch
+
+from Video import getting_camera_settings
+
+
+def write_config(tmp_path, text):
+    config_file = tmp_path / "settings.ini"
+    config_file.write_text(text, encoding='utf-8')
+    return str(config_file)
+
+
+def test_camera_sections_in_any_number(tmp_path):
+    """Тест: Камеры читаются из секций [CameraN] по порядку номеров, недостающие параметры берутся из [General]."""
+    config_file = write_config(tmp_path, """
+[General]
+fps = 15
+width = 800
+height = 600
+
+[Camera10]
+source = rtsp://10.0.0.10/
+folder = cam10
+fps = 5
+
+[Camera2]
+source = 0
+folder = usb
+width = 1280
+height = 720
+""")
+
+    cameras = getting_camera_settings(interactive=False, config_file=config_file)
+
+    assert cameras == [
+        {'index': 1, 'source': 0, 'folder': 'usb', 'fps': 15, 'width': 1280, 'height': 720},
+        {'index': 9, 'source': 'rtsp://10.0.0.10/', 'folder': 'cam10', 'fps': 5, 'width': 800, 'height': 600},
+    ]
+
+
+def test_camera_section_without_folder_is_skipped(tmp_path):
+    """Тест: Камера без source или folder пропускается, остальные загружаются."""
+    config_file = write_config(tmp_path, """
+[Camera1]
+source = rtsp://a/
+
+[Camera2]
+source = rtsp://b/
+folder = b
+""")
+
+    cameras = getting_camera_settings(interactive=False, config_file=config_file)
+
+    assert [camera['source'] for camera in cameras] == ['rtsp://b/']
+    assert (cameras[0]['fps'], cameras[0]['width'], cameras[0]['height']) == (30, 640, 480)
+
+
+def test_legacy_sections_are_converted(tmp_path):
+    """Тест: Без секций [CameraN] используются прежние настройки, USB-камера получает индекс 3."""
+    legacy = (25, 640, 480, 1, 'usb_folder', ['ip1', 'ip2'], ['f1', 'f2'])
+    with patch('Video.getting_settings', return_value=legacy) as mock_settings:
+        cameras = getting_camera_settings(interactive=False, config_file=str(tmp_path / "missing.ini"))
+
+    mock_settings.assert_called_once_with(interactive=False)
+    assert [(camera['index'], camera['source'], camera['folder']) for camera in cameras] == [
+        (0, 'ip1', 'f1'), (1, 'ip2', 'f2'), (3, 1, 'usb_folder')]
+    assert all(camera['fps'] == 25 for camera in cameras)
+
+
+def test_legacy_sections_missing_returns_none(tmp_path):
+    """Тест: Если настроек нет ни в каком формате, возвращается None."""
+    with patch('Video.getting_settings', return_value=None):
+        assert getting_camera_settings(interactive=False, config_file=str(tmp_path / "missing.ini")) is None
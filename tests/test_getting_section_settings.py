@@ -0,0 +1,32 @@
+import pytest
+
+from Video import getting_section_settings
+
+
+DEFAULTS = {'threads': 2, 'ratio': 0.5, 'enabled': False, 'mode': 'jpeg'}
+
+
+def test_getting_section_settings_missing_file(tmp_path):
+    """Тест: Файл конфигурации отсутствует - возвращаются значения по умолчанию."""
+    result = getting_section_settings('Writer', DEFAULTS, str(tmp_path / "missing.ini"))
+    assert result == DEFAULTS
+
+
+def test_getting_section_settings_reads_typed_values(tmp_path):
+    """Тест: Значения приводятся к типам значений по умолчанию."""
+    config_file = tmp_path / "settings.ini"
+    config_file.write_text("[Writer]\nthreads = 4\nratio = 0.25\nenabled = yes\nmode = segments\n")
+
+    result = getting_section_settings('Writer', DEFAULTS, str(config_file))
+
+    assert result == {'threads': 4, 'ratio': 0.25, 'enabled': True, 'mode': 'segments'}
+
+
+def test_getting_section_settings_invalid_value_uses_default(tmp_path):
+    """Тест: Некорректное значение заменяется значением по умолчанию."""
+    config_file = tmp_path / "settings.ini"
+    config_file.write_text("[Writer]\nthreads = many\n")
+
+    result = getting_section_settings('Writer', DEFAULTS, str(config_file))
+
+    assert result['threads'] == 2
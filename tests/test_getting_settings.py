@@ -158,4 +158,15 @@ def test_getting_settings_with_error():
 
         # Проверка результата
         assert result is None
-        mock_logger.assert_called_once_with('Непредвиденная ошибка в getting_settings: Test error')
\ No newline at end of file
+        mock_logger.assert_called_once_with('Непредвиденная ошибка в getting_settings: Test error')
+
+def test_getting_settings_non_interactive_without_config():
+    """Тест: Без диалогов и без файла настроек функция возвращает None и ничего не спрашивает."""
+    with patch('os.path.exists', return_value=False), \
+            patch.object(simpledialog, 'askinteger') as mock_askinteger, \
+            patch.object(messagebox, 'askyesno') as mock_askyesno:
+        result = getting_settings(interactive=False)
+
+    assert result is None
+    mock_askinteger.assert_not_called()
+    mock_askyesno.assert_not_called()
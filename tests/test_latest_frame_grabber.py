@@ -0,0 +1,114 @@
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+from Video import LatestFrameGrabber, connection
+
+
+class CountingCapture:
+    """Камера, выдающая номера кадров с заданной частотой."""
+
+    def __init__(self, interval=0.002, frames=None):
+        self.interval = interval
+        self.frames = frames
+        self.count = 0
+        self.released = False
+
+    def read(self):
+        time.sleep(self.interval)
+        if self.frames is not None and self.count >= self.frames:
+            return False, None
+        self.count += 1
+        return True, self.count
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        self.released = True
+
+
+def test_grabber_returns_latest_frame_and_counts_skipped():
+    """Тест: Медленный потребитель получает последний кадр, а пропущенные кадры учитываются."""
+    grabber = LatestFrameGrabber(CountingCapture(), 0).start()
+    try:
+        ret, first = grabber.read()
+        time.sleep(0.05)  # Потребитель отстает, камера успевает прислать несколько кадров
+        ret2, second = grabber.read()
+    finally:
+        grabber.release()
+
+    assert ret and ret2
+    assert second > first + 1
+    stats = grabber.stats()
+    assert stats['consumed'] == 2
+    assert stats['skipped'] >= second - first - 1
+    assert stats['grabbed'] >= second
+    assert stats['latency_max'] >= 0
+
+
+def test_grabber_never_returns_same_frame_twice():
+    """Тест: Если камера перестала присылать кадры, read() возвращает False по таймауту вместо старого кадра."""
+    unblock = threading.Event()
+    capture = CountingCapture()
+    original_read = capture.read
+    def read_once():
+        if capture.count >= 1:
+            unblock.wait()  # Камера "зависла" после первого кадра
+        return original_read()
+    capture.read = read_once
+
+    grabber = LatestFrameGrabber(capture, 0, read_timeout=0.05).start()
+    try:
+        assert grabber.read() == (True, 1)
+        assert grabber.read() == (False, None)
+    finally:
+        unblock.set()
+        grabber.release()
+
+
+def test_grabber_release_stops_thread_and_releases_camera():
+    """Тест: release() останавливает поток чтения и освобождает камеру."""
+    capture = CountingCapture()
+    grabber = LatestFrameGrabber(capture, 2).start()
+    grabber.release()
+
+    assert capture.released
+    assert not grabber._thread.is_alive()
+    assert grabber.last_timestamp == 0.0
+
+
+def test_grabber_release_leaves_stalled_camera_to_reader_thread():
+    """Тест: Камера, зависшая в read(), не освобождается из другого потока, а освобождается потоком чтения после выхода из read()."""
+    unblock = threading.Event()
+    capture = CountingCapture()
+    original_read = capture.read
+    def stalled_read():
+        unblock.wait()
+        assert not capture.released  # Камера не освобождена во время чтения
+        return original_read()
+    capture.read = stalled_read
+
+    grabber = LatestFrameGrabber(capture, 0, read_timeout=0.05).start()
+    grabber.release()
+    assert not capture.released and grabber._thread.is_alive()
+
+    unblock.set()
+    grabber._thread.join(5)
+    assert capture.released
+
+
+def test_connection_wraps_camera_in_grabber():
+    """Тест: connection с grabber=True передает в capture_and_save LatestFrameGrabber."""
+    mock_cap = MagicMock()
+    mock_cap.grab.return_value = True
+    mock_cap.read.return_value = (True, object())
+    with patch('Video.cv2.VideoCapture', return_value=mock_cap), \
+            patch('Video.capture_and_save') as mock_capture_and_save:
+        connection('test_ip', 30, 'test_folder', 640, 480, 0, 1, stop_event=threading.Event(), grabber=True)
+
+    grabber = mock_capture_and_save.call_args.args[0]
+    assert isinstance(grabber, LatestFrameGrabber)
+    grabber.release()
+    mock_cap.release.assert_called_once()
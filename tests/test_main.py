@@ -1,8 +1,9 @@
 import pytest
 import threading
 import time
-import keyboard
-from unittest.mock import patch, MagicMock
+import signal
+from unittest.mock import patch, MagicMock, ANY
+import Video
 from Video import main, getting_settings, connection, error_handling, start_counter
 
 
@@ -44,7 +45,8 @@ def mock_threads():
 @pytest.fixture
 def mock_stop_event():
     stop_event = threading.Event()
-    yield stop_event
+    with patch('Video.stop_event', stop_event):
+        yield stop_event
 
 @pytest.fixture
 def mock_errors_queue():
@@ -56,31 +58,83 @@ def mock_keyboard():
     with patch('Video.keyboard') as mock_key:
         yield mock_key
 
+@pytest.fixture(autouse=True)
+def mock_init_gui():
+    with patch('Video.init_gui') as mock_gui:
+        yield mock_gui
 
 
 
+
+def report_error_and_stop(mock_connection, mock_error_handling, stop_event):
+    """Камера сообщает об ошибке подключения, а обработчик ошибки останавливает программу."""
+    mock_connection.side_effect = lambda *args, **kwargs: kwargs['errors_queue'].put(args[5])
+    mock_error_handling.side_effect = lambda *args, **kwargs: stop_event.set()
+
+
 def test_main_ip_camera(mock_settings, mock_connection, mock_error_handling, mock_start_counter, mock_threads, mock_stop_event, mock_errors_queue, mock_keyboard, mock_sleep):
-    mock_keyboard.is_pressed.return_value = True
+    report_error_and_stop(mock_connection, mock_error_handling, mock_stop_event)
     main()
 
-    mock_connection.assert_called_with(0, 30, 'usb_folder', 640, 480, 3, 0)
+    mock_connection.assert_any_call("rtsp://127.0.0.1:8554/test", 30, 'ip_folder', 640, 480, 0, 0, grabber=False, pacing='drop', timeout=10.0,
+                                    supervisor=ANY, tracer=None, decode_skip=False, lock=ANY, errors_queue=ANY, stop_event=mock_stop_event, writer=ANY, display=ANY)
+    mock_connection.assert_any_call(0, 30, 'usb_folder', 640, 480, 3, 0, grabber=False, pacing='drop', timeout=10.0,
+                                    supervisor=ANY, tracer=None, decode_skip=False, lock=ANY, errors_queue=ANY, stop_event=mock_stop_event, writer=ANY, display=ANY)
     mock_error_handling.assert_called()
+    assert mock_error_handling.call_args.args[0].get() in (0, 3)
 
 
 def test_main_usb_camera(mock_settings, mock_connection, mock_error_handling, mock_start_counter, mock_threads, mock_stop_event, mock_errors_queue, mock_keyboard, mock_sleep):
     mock_settings.return_value = (30, 640, 480, 0, "usb_folder", [], [])
-    mock_keyboard.is_pressed.return_value = True
+    report_error_and_stop(mock_connection, mock_error_handling, mock_stop_event)
     main()
-    mock_connection.assert_called_with(0, 30, "usb_folder", 640, 480, 3, 0)
-
-
+    mock_connection.assert_called_once_with(0, 30, "usb_folder", 640, 480, 3, 0, grabber=False, pacing='drop', timeout=10.0,
+                                            supervisor=ANY, tracer=None, decode_skip=False, lock=ANY, errors_queue=ANY, stop_event=mock_stop_event, writer=ANY, display=ANY)
+    assert not mock_connection.call_args.kwargs['supervisor']['enabled']  # Переподключение включается явно в секции [Supervisor]
 
 
 def test_main_keyboard_interrupt(mock_settings, mock_connection, mock_error_handling, mock_start_counter, mock_threads, mock_stop_event, mock_errors_queue, mock_keyboard, mock_sleep):
-
-    mock_keyboard.is_pressed.side_effect = [False, True]
+    """Тест: Ctrl+C обрабатывается горячей клавишей keyboard, без опроса клавиш."""
+    # Камера "нажимает" Ctrl+C во время работы
+    mock_connection.side_effect = lambda *args, **kwargs: mock_keyboard.add_hotkey.call_args.args[1]()
     main()
-    assert not mock_stop_event.is_set()
-
-
 
+    mock_keyboard.add_hotkey.assert_called_once_with('ctrl+c', ANY)
+    mock_keyboard.is_pressed.assert_not_called()
+    mock_keyboard.remove_hotkey.assert_called_once_with(mock_keyboard.add_hotkey.return_value)
+    assert mock_stop_event.is_set()
+
+
+def test_main_headless(mock_settings, mock_connection, mock_start_counter, mock_keyboard, mock_init_gui, mock_stop_event):
+    """Тест: В режиме без графического интерфейса не используются Tkinter, keyboard и окна, завершение - по сигналу."""
+    with patch('Video.signal.signal') as mock_signal, \
+            patch('Video.error_handling') as mock_err, \
+            patch('Video.cv2') as mock_cv2:
+        report_error_and_stop(mock_connection, mock_err, mock_stop_event)
+        main(headless=True)
+
+    mock_init_gui.assert_not_called()
+    mock_keyboard.add_hotkey.assert_not_called()
+    mock_settings.assert_called_once_with(interactive=False)
+    registered = {c.args[0] for c in mock_signal.call_args_list}
+    assert registered == {signal.SIGINT, signal.SIGTERM}
+    assert mock_err.call_args.kwargs['interactive'] is False
+    mock_cv2.destroyAllWindows.assert_not_called()
+    mock_cv2.imshow.assert_not_called()
+
+
+def test_main_refuses_unsupported_features_with_camera_processes(mock_settings, mock_connection, mock_start_counter, mock_keyboard):
+    """Тест: Трассировка вместе с камерами в отдельных процессах не отключается молча, а программа не запускается."""
+    real_settings = Video.getting_section_settings
+    overrides = {'Capture': {'processes': True}, 'Tracing': {'enabled': True}}
+    def section_settings(section, defaults, *args):
+        return dict(real_settings(section, defaults, *args), **overrides.get(section, {}))
+
+    with patch('Video.getting_section_settings', side_effect=section_settings), \
+            patch('Video.CameraProcess') as mock_process, \
+            patch('Video.logger') as mock_logger:
+        main(headless=True)
+
+    mock_process.assert_not_called()
+    mock_connection.assert_not_called()
+    assert 'Tracing' in mock_logger.error.call_args.args[0]
@@ -0,0 +1,110 @@
+import numpy as np
+import cv2
+import pytest
+
+from Video import MotionGate, JpegFolderSink, FrameWriter, create_sink
+
+
+class RecordingSink:
+    """Приемник, запоминающий номера записанных кадров."""
+    ordered = True
+
+    def __init__(self):
+        self.frames = []
+        self.closed = False
+
+    def write(self, frame_count, frame, timestamp):
+        self.frames.append(frame_count)
+
+    def close(self):
+        self.closed = True
+
+
+def still_frame():
+    return np.zeros((120, 160, 3), dtype=np.uint8)
+
+
+def moving_frame(position):
+    frame = still_frame()
+    frame[40:80, position:position + 40] = 255  # Белый квадрат на новом месте
+    return frame
+
+
+def test_motion_gate_writes_pre_and_post_event_frames():
+    """Тест: Записываются кадры с движением, pre_seconds до и post_seconds после, статичные кадры отбрасываются."""
+    sink = RecordingSink()
+    gate = MotionGate(sink, fps=10, pre_seconds=0.3, post_seconds=0.2)
+
+    frames = [still_frame()] * 10 + [moving_frame(0), moving_frame(60)] + [still_frame()] * 10
+    for i, frame in enumerate(frames):
+        gate.write(i, frame, i * 0.1)
+    gate.close()
+
+    # 7-9 - предзапись, 10-12 - движение (12 отличается от 11), 13-14 - постзапись
+    assert sink.frames == list(range(7, 15))
+    assert gate.events == 1
+    assert gate.frames_seen == 22
+    assert gate.frames_written == len(sink.frames)
+    assert sink.closed
+
+
+def test_motion_gate_ring_is_charged_to_camera_memory():
+    """Тест: Кадры кольцевого буфера учитываются в памяти камеры, а новый кадр очереди вытесняет их при нехватке памяти."""
+    frame_size = still_frame().nbytes
+    writer = FrameWriter(num_threads=1, queues={'camera_mb': 3 * frame_size / 1024 ** 2})
+    sink = RecordingSink()
+    gate = MotionGate(sink, fps=10, pre_seconds=1.0)  # Без учета памяти буфер хранил бы 10 кадров
+    writer.register(0, gate)
+    frames = writer._cameras[0]['queue']
+    for i in range(10):
+        assert writer.submit(0, i, still_frame(), i * 0.1)
+        frames.join()
+
+    assert len(gate._ring) == 3
+    assert writer.stats()[0]['queue_bytes'] == 3 * frame_size
+    assert frames.put(10, still_frame(), 1.0)  # Место для кадра очереди освобождено за счет буфера
+    assert len(gate._ring) == 2 and writer.budget.used == 3 * frame_size
+    frames.get_nowait()  # Кадр добавлен в очередь в обход пула записи, забираем его сами
+    frames.task_done()
+
+    writer.close()
+    assert writer.budget.used == 0 and writer.budget.reclaimers == []
+
+
+def test_motion_gate_ignores_motion_outside_mask(tmp_path):
+    """Тест: Движение вне белой области маски не вызывает запись."""
+    mask = np.zeros((120, 160), dtype=np.uint8)
+    mask[:, 120:] = 255  # Проверяется только правый край кадра
+    mask_path = str(tmp_path / "mask.png")
+    cv2.imwrite(mask_path, mask)
+    sink = RecordingSink()
+    gate = MotionGate(sink, fps=10, pre_seconds=0, post_seconds=0, mask_path=mask_path)
+
+    for i, position in enumerate([0, 20, 40, 60]):
+        gate.write(i, moving_frame(position), i * 0.1)
+
+    assert sink.frames == []
+    assert gate.events == 0
+
+
+def test_motion_gate_ignores_small_changes():
+    """Тест: Изменения меньше порога яркости (шум) не считаются движением."""
+    sink = RecordingSink()
+    gate = MotionGate(sink, fps=10, threshold=25, pre_seconds=0, post_seconds=0)
+
+    gate.write(0, still_frame(), 0.0)
+    gate.write(1, still_frame() + 10, 0.1)
+
+    assert sink.frames == []
+
+
+def test_create_sink_wraps_sink_with_camera_mask():
+    """Тест: При enabled create_sink оборачивает приемник и подставляет номер камеры в путь маски."""
+    motion = {'enabled': True, 'mask': 'masks/camera_{camera}.png'}
+
+    sink = create_sink('folder', 1, 10, motion=motion, index=1)
+
+    assert isinstance(sink, MotionGate)
+    assert isinstance(sink.sink, JpegFolderSink)
+    assert sink.mask_path == 'masks/camera_2.png'
+    assert isinstance(create_sink('folder', 1, 10, motion={'enabled': False}), JpegFolderSink)
@@ -0,0 +1,95 @@
+import threading
+import urllib.request
+import urllib.error
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+
+from Video import ShardedCounter, Histogram, PipelineMetrics, MetricsServer, FrameWriter, JpegFolderSink
+
+
+def test_sharded_counter_counts_from_many_threads():
+    """Тест: Счетчик без блокировок не теряет увеличения при записи из нескольких потоков."""
+    counter = ShardedCounter()
+
+    def work():
+        for _ in range(10000):
+            counter.inc()
+
+    workers = [threading.Thread(target=work) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert counter.value == 40000
+
+
+def test_histogram_snapshot_is_cumulative():
+    """Тест: Гистограмма возвращает накопительные кол-ва по границам, сумму и общее кол-во."""
+    histogram = Histogram(buckets=(0.01, 0.1))
+    for value in (0.005, 0.05, 0.05, 1.0):
+        histogram.observe(value)
+
+    cumulative, total, count = histogram.snapshot()
+
+    assert cumulative == [1, 3]
+    assert total == pytest.approx(1.105)
+    assert count == 4
+
+
+def test_frame_writer_records_pipeline_metrics(tmp_path):
+    """Тест: Пул записи с метриками учитывает длительности кодирования и записи и записанные байты."""
+    metrics = PipelineMetrics()
+    writer = FrameWriter(num_threads=1, queue_size=4, metrics=metrics)
+    writer.register(0, JpegFolderSink(str(tmp_path), 1))
+    for i in range(3):
+        writer.submit(0, i, np.zeros((16, 16, 3), dtype=np.uint8), float(i))
+    writer.close()
+
+    camera = metrics.camera(0)
+    assert camera.encode_latency.snapshot()[2] == 3
+    assert camera.write_latency.snapshot()[2] == 3
+    assert camera.bytes_written.value == sum(path.stat().st_size for path in tmp_path.iterdir())
+
+    text = metrics.render(writer)
+    assert 'videoproject_frames_written_total{camera="1"} 3' in text
+    assert 'videoproject_write_seconds_count{camera="1"} 3' in text
+    assert 'videoproject_write_seconds_bucket{camera="1",le="+Inf"} 3' in text
+
+
+def test_metrics_render_reports_rate_and_reconnects():
+    """Тест: Второй запрос содержит скорость записи, для CameraSupervisor выводится кол-во переподключений."""
+    from Video import CameraSupervisor
+    metrics = PipelineMetrics()
+    camera = metrics.camera(2)
+    camera.capture = CameraSupervisor('ip', 640, 480, 2)
+    camera.capture.reconnects = 4
+    camera.captured.inc(10)
+
+    first = metrics.render()
+    camera.bytes_written.inc(1000)
+    second = metrics.render()
+
+    assert 'videoproject_frames_captured_total{camera="3"} 10' in first
+    assert 'videoproject_reconnects_total{camera="3"} 4' in first
+    assert 'bytes_written_per_second' not in first
+    assert 'videoproject_bytes_written_per_second{camera="3"}' in second
+
+
+def test_metrics_server_serves_metrics_endpoint():
+    """Тест: Сервер отдает метрики по /metrics и 404 для других путей."""
+    metrics = PipelineMetrics()
+    metrics.camera(0).captured.inc(5)
+    server = MetricsServer(metrics, port=0).start()
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{server.port}/metrics') as response:
+            body = response.read().decode('utf-8')
+            content_type = response.headers['Content-Type']
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f'http://127.0.0.1:{server.port}/other')
+    finally:
+        server.close()
+
+    assert content_type.startswith('text/plain')
+    assert 'videoproject_frames_captured_total{camera="1"} 5' in body
@@ -0,0 +1,54 @@
+import threading
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+
+from Video import PreviewCompositor
+
+
+def test_compositor_layout_is_computed_once():
+    """Тест: Плитки располагаются сеткой, холст выделяется под все камеры."""
+    compositor = PreviewCompositor([0, 1, 2, 3, 4], columns=2, tile_size=(160, 90))
+
+    assert compositor.canvas.shape == (270, 320, 3)
+    assert compositor.tiles == {0: (0, 0), 1: (160, 0), 2: (0, 90), 3: (160, 90), 4: (0, 180)}
+
+
+def test_compositor_renders_downscaled_tiles_and_error_tile():
+    """Тест: Новые кадры уменьшаются в свои плитки, камера с ошибкой получает плитку ошибки."""
+    compositor = PreviewCompositor([0, 1], columns=2, tile_size=(160, 90))
+    frame = np.full((720, 1280, 3), 200, dtype=np.uint8)
+
+    compositor.update(0, frame)
+    compositor.mark_failed(1)
+    canvas = compositor.render()
+
+    assert np.all(canvas[:, :160] == 200)
+    assert np.any(canvas[:, 160:, 2] == 255)  # Красный текст ошибки
+    assert np.all(frame == 200)  # Исходный кадр не изменяется
+
+
+def test_compositor_renders_only_changed_tiles():
+    """Тест: Без новых кадров отрисовка не меняет холст."""
+    compositor = PreviewCompositor([0], tile_size=(64, 48))
+    compositor.update(0, np.full((48, 64, 3), 10, dtype=np.uint8), real_fps=25)
+    first = compositor.render().copy()
+
+    assert compositor._pending == {}
+    assert np.array_equal(compositor.render(), first)
+
+
+def test_compositor_run_uses_single_window(mocker):
+    """Тест: Поток отображения выводит одно окно и завершается по сигналу остановки."""
+    mock_cv2 = mocker.patch('Video.cv2')
+    stop_event = threading.Event()
+    compositor = PreviewCompositor.__new__(PreviewCompositor)
+    compositor.window_name = "Cameras"
+    compositor.preview_fps = 1000
+    compositor.render = MagicMock(side_effect=lambda: stop_event.set())
+
+    compositor.run(stop_event)
+
+    mock_cv2.imshow.assert_called_once()
+    mock_cv2.moveWindow.assert_called_once_with("Cameras", 0, 0)
+    mock_cv2.destroyWindow.assert_called_once_with("Cameras")
@@ -0,0 +1,100 @@
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+from Video import probe_camera, probe_cameras, check_cameras
+
+
+def make_camera(grab=True, width=1280, height=720, fps=25):
+    """Создает камеру, возвращающую заданные параметры через get()."""
+    cap = MagicMock()
+    cap.grab.return_value = grab
+    cap.get.side_effect = lambda prop: {3: width, 4: height, 5: fps}[prop]  # CAP_PROP_FRAME_WIDTH, HEIGHT, FPS
+    return cap
+
+
+def test_probe_camera_reports_negotiated_parameters():
+    """Тест: Отчет содержит задержки открытия и первого кадра, а также разрешение и FPS, установленные камерой."""
+    cap = make_camera()
+    with patch('Video.open_camera', return_value=cap):
+        report, opened = probe_camera('ip', 1920, 1080, 0, timeout=1)
+
+    assert opened is cap
+    assert report['ready']
+    assert (report['width'], report['height'], report['fps']) == (1280, 720, 25.0)
+    assert 0 <= report['open_latency'] <= report['first_frame_latency']
+    cap.release.assert_not_called()
+
+
+def test_probe_camera_releases_camera_without_frames():
+    """Тест: Камера без кадров освобождается, а в отчете указывается причина."""
+    cap = make_camera(grab=False)
+    with patch('Video.open_camera', return_value=cap):
+        report, opened = probe_camera('ip', 640, 480, 1, timeout=1)
+
+    assert opened is None
+    assert not report['ready']
+    assert report['error']
+    cap.release.assert_called_once()
+
+
+def test_probe_camera_times_out_and_releases_late_camera():
+    """Тест: Зависшая камера не задерживает проверку дольше таймаута и освобождается, когда все же ответит."""
+    unblock = threading.Event()
+    cap = make_camera()
+    def slow_open(ip, width, height):
+        unblock.wait()
+        return cap
+
+    with patch('Video.open_camera', side_effect=slow_open):
+        start = time.monotonic()
+        report, opened = probe_camera('ip', 640, 480, 2, timeout=0.1)
+        elapsed = time.monotonic() - start
+        unblock.set()
+        for _ in range(100):
+            if cap.release.called:
+                break
+            time.sleep(0.01)
+
+    assert elapsed < 1
+    assert opened is None
+    assert not report['ready']
+    cap.release.assert_called_once()
+
+
+def test_probe_cameras_runs_concurrently():
+    """Тест: Камеры проверяются одновременно, общее время не складывается из таймаутов."""
+    cameras = {'good': make_camera(), 'hung': None}
+    hang = threading.Event()
+    def open_camera(source, width, height):
+        if cameras[source] is None:
+            hang.wait()
+            return make_camera()
+        return cameras[source]
+
+    with patch('Video.open_camera', side_effect=open_camera):
+        start = time.monotonic()
+        results = probe_cameras(['hung', 'hung', 'good'], 640, 480, [0, 1, 3], timeout=0.2)
+        elapsed = time.monotonic() - start
+        hang.set()
+
+    assert elapsed < 0.5
+    assert [report['index'] for report, _ in results] == [0, 1, 3]
+    assert [report['ready'] for report, _ in results] == [False, False, True]
+    assert results[2][1] is cameras['good']
+
+
+def test_check_cameras_prints_report(capsys):
+    """Тест: check_cameras выводит отчет по каждой камере из настроек и освобождает камеры."""
+    cap = make_camera()
+    settings = (30, 640, 480, 0, 'usb', ['ip1'], ['f1'])
+    with patch('Video.getting_settings', return_value=settings), \
+            patch('Video.getting_section_settings', return_value={'timeout': 1.0}), \
+            patch('Video.open_camera', return_value=cap):
+        assert check_cameras()
+
+    output = capsys.readouterr().out
+    assert 'Камера 1 (ip1): готова' in output
+    assert 'Камера 4 (0): готова' in output
+    assert cap.release.call_count == 2
@@ -0,0 +1,108 @@
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+from Video import RateAdapter, LatestFrameGrabber, PipelineMetrics, connection, find_rate_adapter
+
+
+class FastCamera:
+    """Камера с частотой около 200 кадров в секунду, считающая декодированные кадры."""
+
+    def __init__(self, interval=0.005, decode_work=0):
+        self.interval = interval
+        self.decode_work = decode_work
+        self.grabs = 0
+        self.retrieves = 0
+        self.released = False
+
+    def grab(self):
+        time.sleep(self.interval)
+        self.grabs += 1
+        return True
+
+    def retrieve(self):
+        sum(range(self.decode_work))  # Имитация процессорной работы декодера
+        self.retrieves += 1
+        return True, self.grabs
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        self.released = True
+
+
+def test_rate_adapter_decodes_only_frames_on_fps_grid():
+    """Тест: Кадры сверх fps пропускаются через grab() без декодирования."""
+    camera = FastCamera()
+    adapter = RateAdapter(camera, 0, fps=20)
+    start = time.monotonic()
+    frames = [adapter.read() for _ in range(6)]
+    elapsed = time.monotonic() - start
+
+    assert all(ret for ret, _ in frames)
+    assert camera.retrieves == 6
+    assert camera.grabs > camera.retrieves * 3
+    assert elapsed >= 5 / 20 - 0.01  # Кадры выдаются с темпом fps
+    stats = adapter.stats()
+    assert stats['grabbed'] == camera.grabs
+    assert stats['decoded'] == 6
+    assert stats['skipped'] == camera.grabs - 6
+
+
+def test_rate_adapter_without_fps_decodes_every_frame():
+    """Тест: При fps <= 0 декодируется каждый полученный кадр."""
+    camera = FastCamera(interval=0)
+    adapter = RateAdapter(camera, 0, fps=0)
+    for _ in range(5):
+        adapter.read()
+
+    assert camera.grabs == camera.retrieves == 5
+    assert adapter.stats()['skipped'] == 0
+
+
+def test_rate_adapter_reports_saved_decode_cpu():
+    """Тест: Сэкономленное время оценивается по среднему процессорному времени декодирования."""
+    camera = FastCamera(decode_work=200000)
+    adapter = RateAdapter(camera, 2, fps=25)
+    for _ in range(3):
+        adapter.read()
+    adapter.release()
+
+    stats = adapter.stats()
+    assert stats['decode_cpu'] > 0
+    assert stats['decode_cpu_saved'] == pytest.approx(stats['skipped'] * stats['decode_cpu'] / 3)
+    assert camera.released
+
+
+def test_grabber_with_fps_skips_decoding_and_exports_metrics():
+    """Тест: LatestFrameGrabber с fps декодирует только нужные кадры, а метрики показывают пропущенные кадры."""
+    camera = FastCamera()
+    grabber = LatestFrameGrabber(camera, 0, fps=10).start()
+    try:
+        time.sleep(0.3)
+    finally:
+        grabber.release()
+    assert isinstance(grabber.cap, RateAdapter)
+    assert camera.retrieves < camera.grabs / 3
+
+    metrics = PipelineMetrics()
+    metrics.camera(0).capture = grabber
+    text = metrics.render()
+    assert f'videoproject_frames_decode_skipped_total{{camera="1"}} {grabber.cap.stats()["skipped"]}' in text
+    assert 'videoproject_decode_cpu_saved_seconds_total{camera="1"}' in text
+
+
+def test_connection_wraps_camera_in_rate_adapter():
+    """Тест: connection с decode_skip=True без потока чтения передает в capture_and_save RateAdapter с fps камеры."""
+    mock_cap = MagicMock()
+    with patch('Video.probe_camera', return_value=({'ready': True}, mock_cap)), \
+            patch('Video.capture_and_save') as mock_capture_and_save:
+        connection('test_ip', 15, 'test_folder', 640, 480, 0, 1, stop_event=threading.Event(), decode_skip=True)
+
+    adapter = mock_capture_and_save.call_args.args[0]
+    assert isinstance(adapter, RateAdapter)
+    assert adapter.cap is mock_cap and adapter.period == pytest.approx(1 / 15)
+    assert find_rate_adapter(adapter) is adapter
+    assert find_rate_adapter(mock_cap) is None
@@ -0,0 +1,88 @@
+import logging
+import queue
+import pytest
+
+from Video import RateLimitFilter, setup_logging, file_handler, rate_limit_filter, queue_handler, log_queue
+
+
+def make_record(message, level=logging.ERROR):
+    return logging.LogRecord('Video', level, __file__, 1, message, None, None)
+
+
+@pytest.fixture
+def mock_time(mocker):
+    mock = mocker.patch('Video.time.monotonic')
+    mock.return_value = 100.0
+    return mock
+
+
+def test_rate_limit_filter_suppresses_repeats_over_burst(mock_time):
+    """Тест: За интервал одинаковое сообщение пропускается не больше burst раз, сообщения других камер не ограничиваются."""
+    log_filter = RateLimitFilter(interval=60, burst=3)
+
+    results = [log_filter.filter(make_record('Камера 1 недоступна')) for _ in range(10)]
+
+    assert results == [True] * 3 + [False] * 7
+    assert log_filter.filter(make_record('Камера 2 недоступна'))
+    assert log_filter.filter(make_record('Камера 1 недоступна', logging.INFO))
+
+
+def test_rate_limit_filter_reports_suppressed_count_after_interval(mock_time):
+    """Тест: Первое сообщение после интервала содержит кол-во подавленных повторов."""
+    log_filter = RateLimitFilter(interval=60, burst=1)
+    for _ in range(5):
+        log_filter.filter(make_record('Камера 1 недоступна'))
+
+    mock_time.return_value = 161.0
+    record = make_record('Камера 1 недоступна')
+
+    assert log_filter.filter(record)
+    assert record.getMessage() == 'Камера 1 недоступна (подавлено повторов: 4)'
+    assert log_filter.filter(make_record('Камера 1 недоступна')) is False
+
+
+def test_rate_limit_filter_forgets_expired_messages(mock_time):
+    """Тест: При переполнении словаря забываются сообщения с истекшим интервалом; interval=0 отключает ограничение."""
+    log_filter = RateLimitFilter(interval=60, burst=1, max_keys=2)
+    log_filter.filter(make_record('a'))
+    log_filter.filter(make_record('b'))
+    mock_time.return_value = 200.0
+    log_filter.filter(make_record('c'))
+
+    assert len(log_filter._seen) == 1
+
+    log_filter.interval = 0
+    assert all(log_filter.filter(make_record('c')) for _ in range(10))
+
+
+def test_rate_limit_filter_reports_suppressed_count_of_evicted_messages(mock_time, mocker):
+    """Тест: Подавленные повторы забытого сообщения и оставшиеся при flush() записываются через обработчик."""
+    handler = mocker.Mock()
+    log_filter = RateLimitFilter(interval=60, burst=1, max_keys=2, handler=handler)
+    for _ in range(3):
+        log_filter.filter(make_record('Ошибка записи кадра 1'))
+    log_filter.filter(make_record('Ошибка записи кадра 2'))
+    log_filter.filter(make_record('Ошибка записи кадра 3'))  # Словарь переполнен, забывается самое старое сообщение
+
+    assert len(log_filter._seen) == 2
+    assert [call.args[0].getMessage() for call in handler.emit.call_args_list] == ['Ошибка записи кадра 1 (подавлено повторов: 2)']
+
+    log_filter.filter(make_record('Ошибка записи кадра 3'))
+    log_filter.flush()
+    assert handler.emit.call_args.args[0].getMessage() == 'Ошибка записи кадра 3 (подавлено повторов: 1)'
+    log_filter.flush()
+    assert handler.emit.call_count == 2
+
+
+def test_logger_writes_through_queue_and_setup_logging_configures_rotation():
+    """Тест: Логгер только кладет записи в очередь, а setup_logging настраивает ротацию и ограничение повторов."""
+    assert isinstance(queue_handler.queue, queue.SimpleQueue) and queue_handler.queue is log_queue
+    assert rate_limit_filter in queue_handler.filters
+    assert rate_limit_filter.handler is queue_handler
+    previous = (file_handler.maxBytes, file_handler.backupCount, rate_limit_filter.interval, rate_limit_filter.burst)
+    try:
+        setup_logging(max_mb=1, backup_count=2, interval=30, burst=7)
+        assert (file_handler.maxBytes, file_handler.backupCount) == (1024 * 1024, 2)
+        assert (rate_limit_filter.interval, rate_limit_filter.burst) == (30, 7)
+    finally:
+        file_handler.maxBytes, file_handler.backupCount, rate_limit_filter.interval, rate_limit_filter.burst = previous
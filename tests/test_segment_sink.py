@@ -0,0 +1,54 @@
+import csv
+import numpy as np
+import cv2
+import pytest
+
+from Video import SegmentSink, JpegFolderSink, create_sink
+
+
+def make_frame(value, size=(64, 48)):
+    """Создает однотонный кадр заданного размера (ширина, высота)."""
+    return np.full((size[1], size[0], 3), value, dtype=np.uint8)
+
+
+def read_sidecar(path):
+    with open(path, newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def test_segment_sink_rolls_segments_by_duration(tmp_path):
+    """Тест: Сегменты сменяются по длительности, а файл сопоставления описывает диапазоны кадров."""
+    sink = SegmentSink(str(tmp_path), 5, fps=10, codec='MJPG', segment_minutes=1 / 60)
+
+    for i in range(25):
+        sink.write(i, make_frame(i * 10), 1000.0 + i * 0.1)  # 10 кадров в секунду
+    sink.close()
+
+    rows = read_sidecar(tmp_path / "5 segments.csv")
+    assert [row['file'] for row in rows] == ["5 segment_0000.avi", "5 segment_0001.avi", "5 segment_0002.avi"]
+    assert [(int(row['first_frame']), int(row['last_frame'])) for row in rows] == [(0, 9), (10, 19), (20, 24)]
+    assert sum(int(row['frames']) for row in rows) == 25
+
+    capture = cv2.VideoCapture(str(tmp_path / "5 segment_0001.avi"))
+    assert int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) == 10
+    capture.release()
+
+
+def test_segment_sink_starts_new_segment_on_resolution_change(tmp_path):
+    """Тест: При смене разрешения начинается новый сегмент."""
+    sink = SegmentSink(str(tmp_path), 1, fps=10, segment_minutes=0)
+
+    sink.write(0, make_frame(0), 0.0)
+    sink.write(1, make_frame(0), 0.1)
+    sink.write(2, make_frame(0, size=(32, 24)), 0.2)
+    sink.close()
+
+    rows = read_sidecar(tmp_path / "1 segments.csv")
+    assert [(int(row['first_frame']), int(row['last_frame'])) for row in rows] == [(0, 1), (2, 2)]
+
+
+def test_create_sink_selects_recording_mode(tmp_path):
+    """Тест: create_sink создает приемник по режиму записи."""
+    assert isinstance(create_sink(str(tmp_path), 1, 10), JpegFolderSink)
+    assert isinstance(create_sink(str(tmp_path), 1, 10, recording={'mode': 'segments'}), SegmentSink)
+    assert isinstance(create_sink(str(tmp_path), 1, 10, recording={'mode': 'unknown'}), JpegFolderSink)
@@ -0,0 +1,109 @@
+import os
+import time
+import numpy as np
+import pytest
+from unittest.mock import MagicMock
+
+from Video import JpegFolderSink, FrameWriter, StorageManager, create_sink, session_folder
+
+
+@pytest.fixture
+def encoder():
+    encoder = MagicMock()
+    encoder.encode.return_value = b"jpeg-bytes"
+    return encoder
+
+
+def test_sharded_layout_writes_session_date_hour_folders(tmp_path, encoder):
+    """Тест: В раскладке sharded кадры пишутся в папки сессии, даты и часа с сортируемыми именами."""
+    sink = JpegFolderSink(str(tmp_path), 42, encoder, layout='sharded')
+    timestamp = time.mktime((2024, 3, 5, 14, 30, 0, 0, 0, -1))
+
+    sink.write(7, object(), timestamp)
+    sink.write(8, object(), timestamp + 3600)
+    sink.close()
+
+    assert (tmp_path / "000042" / "2024-03-05" / "14" / "frame_000000007.jpg").read_bytes() == b"jpeg-bytes"
+    assert (tmp_path / "000042" / "2024-03-05" / "15" / "frame_000000008.jpg").exists()
+    assert session_folder(str(tmp_path), 42) == str(tmp_path / "000042")
+
+
+def test_sharded_layout_caches_created_folders(tmp_path, encoder, mocker):
+    """Тест: os.makedirs вызывается один раз на папку часа, а не на каждый кадр."""
+    sink = JpegFolderSink(str(tmp_path), 1, encoder, layout='sharded')
+    makedirs = mocker.spy(os, 'makedirs')
+    timestamp = time.mktime((2024, 3, 5, 14, 0, 0, 0, 0, -1))
+
+    for i in range(20):
+        sink.write(i, object(), timestamp + i)
+
+    hour_folder = str(tmp_path / "000001" / "2024-03-05" / "14")
+    assert [call.args[0] for call in makedirs.call_args_list].count(hour_folder) == 1  # Остальные вызовы - рекурсия os.makedirs
+    assert len(os.listdir(tmp_path / "000001" / "2024-03-05" / "14")) == 20
+
+
+def test_group_fsync_commits_files_in_batches(tmp_path, encoder, mocker):
+    """Тест: Политика group сбрасывает файлы группами по fsync_batch, а always - каждый файл."""
+    fsync = mocker.patch('Video.os.fsync')
+    sink = JpegFolderSink(str(tmp_path), 1, encoder, fsync='group', fsync_batch=4, fsync_interval=3600)
+
+    for i in range(10):
+        sink.write(i, object(), 0.0)
+    file_syncs = fsync.call_count
+    sink.close()
+
+    folder_syncs = 0 if os.name == 'nt' else 1
+    assert file_syncs == 8 + 2 * folder_syncs  # Две полные группы по 4 файла
+    assert fsync.call_count == 10 + 3 * folder_syncs  # Последняя группа сброшена при закрытии
+    assert (tmp_path / "1 frame_9.jpg").read_bytes() == b"jpeg-bytes"
+
+    fsync.reset_mock()
+    sink = JpegFolderSink(str(tmp_path), 2, encoder, fsync='always')
+    sink.write(0, object(), 0.0)
+    assert fsync.call_count == 1 + folder_syncs
+
+
+def test_group_fsync_keeps_no_open_files(tmp_path, encoder, mocker):
+    """Тест: Политика group не держит файлы группы открытыми до сброса и сбрасывает их, открывая заново по пути."""
+    fsync = mocker.patch('Video.os.fsync')
+    sink = JpegFolderSink(str(tmp_path), 1, encoder, fsync='group', fsync_batch=64, fsync_interval=3600)
+    for i in range(3):
+        sink.write(i, object(), 0.0)
+
+    assert sink._pending == [str(tmp_path / f"1 frame_{i}.jpg") for i in range(3)]
+    os.remove(tmp_path / "1 frame_0.jpg")  # Файл, удаленный до сброса, пропускается
+    assert sink.commit() == 3
+    assert fsync.call_count == 2 + (0 if os.name == 'nt' else 1)
+
+
+def test_frame_writer_commits_idle_group_by_timer(tmp_path, encoder, mocker):
+    """Тест: Пул записи сбрасывает неполную группу по таймеру, не дожидаясь следующего кадра или закрытия."""
+    fsync = mocker.patch('Video.os.fsync')
+    sink = JpegFolderSink(str(tmp_path), 1, encoder, fsync='group', fsync_batch=64, fsync_interval=0.1)
+    writer = FrameWriter(num_threads=1)
+    writer.register(0, sink)
+    for i in range(3):
+        writer.submit(0, i, np.zeros((4, 4, 3), dtype=np.uint8), 0.0)
+
+    deadline = time.monotonic() + 5
+    while fsync.call_count < 3 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    try:
+        assert fsync.call_count >= 3  # Все три файла сброшены, хотя группа не заполнена
+        assert sink.commit_due() == 0
+    finally:
+        writer.close()
+
+
+def test_storage_manager_removes_sharded_session_folder(tmp_path):
+    """Тест: Сессия раскладки sharded находится при первом просмотре папки и удаляется вместе с папкой сессии."""
+    sink = create_sink(str(tmp_path), 3, 10, recording={'layout': 'sharded'})
+    sink.write(0, np.zeros((24, 32, 3), dtype=np.uint8), 1000.0)
+    sink.close()
+
+    storage = StorageManager(camera_gb=1 / 1024 ** 3)
+    storage.open_session(0, str(tmp_path), 4, sharded=True)
+    assert storage.usage()[str(tmp_path)] > 0
+
+    assert storage.enforce() == [(str(tmp_path), 3)]
+    assert not (tmp_path / "000003").exists()
@@ -0,0 +1,122 @@
+import json
+import os
+import numpy as np
+import pytest
+
+from Video import StorageManager, FrameWriter
+
+
+def write_session(folder, session, frames, size=100, mtime=1000.0):
+    """Создает JPG-файлы сессии заданного размера и времени изменения."""
+    folder.mkdir(exist_ok=True)
+    for i in range(frames):
+        path = folder / f"{session} frame_{i}.jpg"
+        path.write_bytes(b'x' * size)
+        os.utime(path, (mtime + i, mtime + i))
+
+
+def test_storage_manager_builds_index_once_and_saves_it(tmp_path, mocker):
+    """Тест: Без индекса папка просматривается один раз, после сохранения индекс читается из storage.json без просмотра папки."""
+    folder = tmp_path / "cam1"
+    write_session(folder, 1, 3)
+    write_session(folder, 2, 2, size=50)
+    (folder / "notes.txt").write_text('не запись')
+
+    storage = StorageManager()
+    storage.open_session(0, str(folder), 3)
+    storage.save()
+    assert storage.usage() == {str(folder): 400}
+    index = json.loads((folder / "storage.json").read_text())['sessions']
+    assert index['1']['first_frame'] == 0 and index['1']['last_frame'] == 2
+
+    scandir = mocker.patch('Video.os.scandir')
+    storage = StorageManager()
+    storage.open_session(0, str(folder), 4)
+    assert storage.usage() == {str(folder): 400}
+    scandir.assert_not_called()
+
+
+def test_storage_manager_evicts_oldest_sessions_over_camera_quota(tmp_path):
+    """Тест: При превышении квоты на камеру удаляются самые старые сессии, текущая сессия не удаляется."""
+    folder = tmp_path / "cam1"
+    write_session(folder, 1, 4, mtime=1000.0)
+    write_session(folder, 2, 4, mtime=2000.0)
+    storage = StorageManager(camera_gb=900 / 1024 ** 3)
+    storage.open_session(0, str(folder), 3)
+    storage.record(0, 400, 0, 3000.0)
+
+    assert storage.enforce() == [(str(folder), 1)]
+
+    assert sorted(os.listdir(folder)) == [f"2 frame_{i}.jpg" for i in range(4)]
+    assert storage.usage() == {str(folder): 800}
+    assert storage.evicted == 1 and storage.freed == 400
+
+
+def test_storage_manager_enforces_total_quota_and_retention(tmp_path, mocker):
+    """Тест: Общая квота удаляет самые старые сессии всех камер, срок хранения - сессии старше заданного кол-ва дней."""
+    mocker.patch('Video.time.time', return_value=10 * 86400.0)
+    first, second = tmp_path / "cam1", tmp_path / "cam2"
+    write_session(first, 1, 2, mtime=1 * 86400.0)
+    write_session(second, 1, 2, mtime=5 * 86400.0)
+    write_session(second, 2, 2, mtime=9 * 86400.0)
+    storage = StorageManager(total_gb=300 / 1024 ** 3)
+    storage.open_session(0, str(first), 3)
+    storage.open_session(1, str(second), 3)
+
+    assert storage.enforce() == [(str(first), 1), (str(second), 1)]
+
+    storage.max_age = 0.5 * 86400
+    assert storage.enforce() == [(str(second), 2)]
+
+
+def test_storage_manager_frees_space_only_on_low_disk(tmp_path, mocker):
+    """Тест: При нехватке места удаляются только сессии с заполненного диска, пока освобожденного места не хватит."""
+    full, healthy = tmp_path / "cam1", tmp_path / "cam2"
+    write_session(full, 1, 2, mtime=1000.0)
+    write_session(full, 2, 2, mtime=2000.0)
+    write_session(healthy, 1, 2, mtime=500.0)
+    storage = StorageManager(min_free_gb=1000 / 1024 ** 3)
+    storage.open_session(0, str(full), 3)
+    storage.open_session(1, str(healthy), 3)
+
+    real_stat = os.stat
+    devices = {str(full): 1, str(healthy): 2}
+    def fake_stat(path, *args, **kwargs):
+        if str(path) in devices:
+            return mocker.Mock(st_dev=devices[str(path)])
+        return real_stat(path, *args, **kwargs)
+    mocker.patch('Video.os.stat', side_effect=fake_stat)
+    mocker.patch('Video.shutil.disk_usage', side_effect=lambda path: mocker.Mock(free=900 if str(path) == str(full) else 10 ** 9))
+
+    assert storage.enforce() == [(str(full), 1)]  # 900 + 200 байт освобожденного места достаточно
+
+
+def test_storage_manager_refreshes_sessions_written_by_other_processes(tmp_path):
+    """Тест: При scan_active размер текущей сессии, записанной другим процессом без record(), пересчитывается по файлам."""
+    folder = tmp_path / "cam1"
+    write_session(folder, 1, 2, mtime=1000.0)
+    storage = StorageManager(camera_gb=500 / 1024 ** 3, scan_active=True)
+    storage.open_session(0, str(folder), 2)
+    write_session(folder, 2, 4)  # Кадры текущей сессии пишет процесс камеры
+
+    storage.refresh()
+
+    assert storage.usage()[str(folder)] == 600
+    assert storage.enforce() == [(str(folder), 1)]  # Вместе с текущей сессией папка превышает квоту
+
+
+def test_frame_writer_reports_written_bytes_to_storage(tmp_path):
+    """Тест: Пул записи учитывает байты каждого кадра и размер последнего видеосегмента при закрытии камеры."""
+    storage = StorageManager()
+    writer = FrameWriter(num_threads=1, recording={'mode': 'segments'}, storage=storage)
+    folder = tmp_path / "cam1"
+    writer.register(0, writer.create_sink(str(folder), 7, 10, index=0))
+    for i in range(3):
+        writer.submit(0, i, np.zeros((24, 32, 3), dtype=np.uint8), 100.0 + i)
+    writer.close()
+    storage.close()
+
+    assert storage.usage()[str(folder)] == os.path.getsize(folder / "7 segment_0000.avi")
+    index = json.loads((folder / "storage.json").read_text())['sessions']
+    assert (index['7']['first_frame'], index['7']['last_frame']) == (0, 2)
+    assert storage._active == {}
@@ -0,0 +1,93 @@
+import csv
+import threading
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+
+from Video import SynchronizedCapture, synchronized_connection
+
+
+class FakeCamera:
+    """Камера, выдающая номер такта и запоминающая время grab()."""
+
+    def __init__(self, stop_event=None, stop_after=None, grab_result=True):
+        self.grab_times = []
+        self.stop_event = stop_event
+        self.stop_after = stop_after
+        self.grab_result = grab_result
+        self.released = False
+
+    def grab(self):
+        self.grab_times.append(time.perf_counter())
+        if self.stop_after is not None and len(self.grab_times) >= self.stop_after:
+            self.stop_event.set()
+        return self.grab_result
+
+    def retrieve(self):
+        return True, len(self.grab_times)
+
+    def release(self):
+        self.released = True
+
+
+def test_synchronized_capture_saves_groups_with_shared_frame_number(tmp_path):
+    """Тест: Кадры одного такта всех камер сохраняются под одним номером и временем."""
+    stop_event = threading.Event()
+    cameras = [FakeCamera(stop_event, stop_after=5)] + [FakeCamera() for _ in range(5)]
+    writer = MagicMock()
+    skew_log = tmp_path / "sync.csv"
+
+    capture = SynchronizedCapture(cameras, list(range(6)), 100, stop_event, writer, str(skew_log))
+    capture.run()
+
+    assert capture.groups == 5
+    for group in range(5):
+        calls = [c.args for c in writer.submit.call_args_list if c.args[1] == group]
+        assert sorted(args[0] for args in calls) == list(range(6))
+        assert len({args[3] for args in calls}) == 1  # Общее время такта
+
+    with open(skew_log, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 5
+    assert all(float(row['skew_ms']) >= 0 for row in rows)
+    assert capture.stats()['skew_max'] == pytest.approx(max(float(row['skew_ms']) for row in rows) / 1000, abs=1e-5)
+
+
+def test_synchronized_capture_skips_failed_grab():
+    """Тест: Камера, не выполнившая grab(), не сохраняет кадр и не учитывается в разбросе."""
+    stop_event = threading.Event()
+    good = FakeCamera(stop_event, stop_after=3)
+    failed = FakeCamera(grab_result=False)
+    writer = MagicMock()
+
+    capture = SynchronizedCapture([good, failed], [0, 1], 0, stop_event, writer)
+    capture.run()
+
+    assert {c.args[0] for c in writer.submit.call_args_list} == {0}
+    assert capture.stats()['skew_max'] == 0.0
+
+
+def test_synchronized_connection_reports_failed_cameras(tmp_path, monkeypatch):
+    """Тест: Неподключившиеся камеры попадают в очередь ошибок, остальные захватываются синхронно."""
+    monkeypatch.chdir(tmp_path)
+    stop_event = threading.Event()
+    stop_event.set()
+    good = MagicMock()
+    good.grab.return_value = True
+    bad = MagicMock()
+    bad.grab.return_value = False
+    errors = MagicMock()
+    writer = MagicMock()
+
+    cameras = {'cam1': good, 'cam2': bad}  # Камеры проверяются параллельно, поэтому выбираем по адресу, а не по порядку вызова
+    with patch('Video.open_camera', side_effect=lambda source, width, height: cameras[source]), \
+            patch('Video.SynchronizedCapture') as mock_sync:
+        synchronized_connection(['cam1', 'cam2'], 10, ['f1', 'f2'], 640, 480, [0, 1], 3,
+                                errors_queue=errors, stop_event=stop_event, writer=writer)
+
+    errors.put.assert_called_once_with(1)
+    assert mock_sync.call_args.args[0] == [good]
+    assert mock_sync.call_args.args[1] == [0]
+    bad.release.assert_called_once()
+    good.release.assert_called_once()
+    writer.close_camera.assert_called_once_with(0)
@@ -0,0 +1,57 @@
+import time
+import cv2
+import numpy as np
+import pytest
+
+from Video import SyntheticCapture, open_camera
+
+
+def test_synthetic_capture_generates_moving_frames():
+    """Тест: Генерируемые кадры имеют заданный размер и отличаются друг от друга."""
+    cap = SyntheticCapture(64, 48, fps=0)
+
+    ret, first = cap.read()
+    ret2, second = cap.read()
+
+    assert ret and ret2
+    assert first.shape == (48, 64, 3) and first.dtype == np.uint8
+    assert not np.array_equal(first, second)
+    assert cap.frames == 2
+
+
+def test_synthetic_capture_paces_frames_like_camera():
+    """Тест: Кадры выдаются с заданной частотой."""
+    cap = SyntheticCapture(32, 24, fps=50)
+
+    start = time.monotonic()
+    for _ in range(6):
+        cap.read()
+
+    assert time.monotonic() - start >= 5 / 50 * 0.9
+
+
+def test_synthetic_capture_replays_video_file_in_loop(tmp_path):
+    """Тест: Видеофайл воспроизводится по кругу с приведением кадров к заданному размеру."""
+    path = str(tmp_path / "clip.avi")
+    video = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 10, (32, 24))
+    for value in (0, 255):
+        video.write(np.full((24, 32, 3), value, dtype=np.uint8))
+    video.release()
+
+    cap = SyntheticCapture(16, 12, fps=0, video_path=path)
+    frames = [cap.read()[1] for _ in range(3)]
+
+    assert all(frame.shape == (12, 16, 3) for frame in frames)
+    assert frames[0].mean() < 50 and frames[1].mean() > 200 and frames[2].mean() < 50
+
+
+def test_open_camera_creates_synthetic_capture_from_url():
+    """Тест: open_camera открывает имитацию камеры по адресу synthetic:// с FPS из адреса и размером кадра из настроек."""
+    cap = open_camera('synthetic://?fps=12', 80, 60)
+
+    assert isinstance(cap, SyntheticCapture)
+    assert cap.get(cv2.CAP_PROP_FPS) == 12
+    assert cap.read()[1].shape == (60, 80, 3)
+    cap.release()
+    assert not cap.isOpened()
+    assert cap.read() == (False, None)
@@ -0,0 +1,73 @@
+import json
+import threading
+import pytest
+from unittest.mock import MagicMock
+
+from Video import Tracer, SyntheticCapture, NullDisplay, FrameWriter, capture_and_save
+
+
+class StopAfterCapture(SyntheticCapture):
+    """Имитация камеры, останавливающая захват после заданного кол-ва кадров."""
+
+    def __init__(self, frames, stop_event):
+        super().__init__(32, 24, fps=0)
+        self.limit = frames
+        self.stop_event = stop_event
+
+    def read(self):
+        if self.frames + 1 >= self.limit:
+            self.stop_event.set()
+        return super().read()
+
+
+def test_tracer_samples_every_nth_iteration():
+    """Тест: Записывается каждая итерация с номером, кратным 1 / sample_rate; при sample_rate=0 не записывается ничего."""
+    tracer = Tracer(sample_rate=0.25)
+
+    assert [i for i in range(10) if tracer.sampled(i)] == [0, 4, 8]
+    assert not any(Tracer(sample_rate=0).sampled(i) for i in range(10))
+
+
+def test_tracer_keeps_only_latest_events():
+    """Тест: Хранится не больше max_events последних событий."""
+    tracer = Tracer(sample_rate=1, max_events=3)
+    for i in range(5):
+        tracer.span('read', 0, 0.0, 0.001, frame=i)
+
+    assert [event['args']['frame'] for event in tracer.events()] == [2, 3, 4]
+
+
+def test_tracer_exports_chrome_trace(tmp_path):
+    """Тест: События сохраняются в формате Chrome trace со строкой на каждую камеру."""
+    tracer = Tracer(sample_rate=1)
+    tracer.span('read', 0, tracer._origin + 0.5, tracer._origin + 0.75, frame=3)
+    tracer.span('pacing', 2, tracer._origin + 1.0, tracer._origin + 1.01)
+    path = tmp_path / "trace.json"
+
+    assert tracer.export(str(path)) == 2
+
+    trace = json.loads(path.read_text())
+    names = {event['tid']: event['args']['name'] for event in trace['traceEvents'] if event['ph'] == 'M'}
+    assert names == {1: 'Camera 1', 3: 'Camera 3'}
+    read = next(event for event in trace['traceEvents'] if event['name'] == 'read')
+    assert read['ph'] == 'X'
+    assert read['ts'] == pytest.approx(500000)
+    assert read['dur'] == pytest.approx(250000)
+    assert read['args'] == {'frame': 3}
+
+
+def test_capture_and_save_traces_each_stage(tmp_path):
+    """Тест: При трассировке каждого кадра записываются этапы чтения, передачи в пул, отображения и ожидания темпа."""
+    stop_event = threading.Event()
+    tracer = Tracer(sample_rate=1)
+    writer = FrameWriter(num_threads=1)
+
+    capture_and_save(StopAfterCapture(3, stop_event), str(tmp_path), 0, 0, 1, stop_event, writer=writer, display=NullDisplay(),
+                     tracer=tracer)
+    writer.close()
+
+    stages = [event['name'] for event in tracer.events()]
+    assert stages.count('frame') == 3
+    for stage in ('read', 'submit', 'display', 'pacing'):
+        assert stages.count(stage) == 3
+    assert all(event['tid'] == 1 and event['dur'] >= 0 for event in tracer.events())